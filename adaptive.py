@@ -0,0 +1,285 @@
+import math
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+import config
+import metrics
+from questionnaire import get_questionnaire
+
+
+class InvalidAnswer(ValueError):
+    """
+    Raised when an answer names an unknown question or option, or a question
+    the session has already answered.
+    """
+
+
+class AdaptiveSession:
+    """
+    One respondent's progress: the log-posterior over career paths, the
+    questions already asked and the answers given so far.
+    """
+
+    def __init__(self, log_posterior, question_count, session_id=None):
+        self.id = session_id or uuid.uuid4().hex
+        self.log_posterior = log_posterior
+        self.asked = np.zeros(question_count, dtype=bool)
+        self.answers = []
+        self.next_question = None
+        self.done = False
+        self.stop_reason = None
+        self.created_at = time.time()
+
+    @property
+    def posterior(self):
+        probabilities = np.exp(self.log_posterior - self.log_posterior.max())
+        return probabilities / probabilities.sum()
+
+
+class AdaptiveQuestioner:
+    """
+    Chooses the most informative next question and decides when to stop.
+
+    The affinity weights of each question define how likely every answer is
+    for every career path: P(option | path) is a softmax over the question's
+    options of sharpness * weight. A session holds the log-posterior over
+    paths, so recording an answer adds one precomputed likelihood row, an
+    O(paths) update however many questions were asked before.
+
+    The next question is the unasked one whose answer is expected to tell
+    the most about the path (the mutual information between the two), scored
+    for the whole bank in one vectorized pass. A session is done when the
+    leading path's probability reaches confidence_threshold, when no question
+    is expected to gain min_gain bits, after max_questions, or when the bank
+    runs out; the first two only apply after min_questions.
+    """
+
+    def __init__(self, questionnaire=None, sharpness=None, confidence_threshold=None,
+                 min_questions=None, max_questions=None, min_gain=None):
+        self.questionnaire = get_questionnaire() if questionnaire is None else questionnaire
+        sharpness = config.ADAPTIVE_SHARPNESS if sharpness is None else sharpness
+        self.confidence_threshold = (
+            config.ADAPTIVE_CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+        )
+        self.min_questions = config.ADAPTIVE_MIN_QUESTIONS if min_questions is None else min_questions
+        self.max_questions = config.ADAPTIVE_MAX_QUESTIONS if max_questions is None else max_questions
+        self.min_gain = config.ADAPTIVE_MIN_GAIN if min_gain is None else min_gain
+
+        self.questions = self.questionnaire.questions
+        self.path_keys = list(self.questionnaire.career_paths)
+        self._category_titles = {category.key: category.title for category in self.questionnaire.categories}
+        self._index = {question.text: i for i, question in enumerate(self.questions)}
+        path_index = {key: i for i, key in enumerate(self.path_keys)}
+
+        # (questions, options, paths), padded to the longest option list
+        max_options = max(len(question.options) for question in self.questions)
+        weights = np.zeros((len(self.questions), max_options, len(self.path_keys)))
+        valid = np.zeros((len(self.questions), max_options), dtype=bool)
+        self._choices = []
+        for row, question in enumerate(self.questions):
+            affinities = self.questionnaire.affinities.get(question.text, {})
+            choices = {}
+            for position, (choice, option_text) in enumerate(question.options.items()):
+                valid[row, position] = True
+                choices[choice] = choices[" ".join(option_text.split())] = position
+                for path_key, weight in affinities.get(choice, {}).items():
+                    weights[row, position, path_index[path_key]] = weight
+            self._choices.append(choices)
+
+        logits = np.where(valid[..., np.newaxis], sharpness * weights, -np.inf)
+        peak = logits.max(axis=1, keepdims=True)
+        log_norm = peak + np.log(np.exp(logits - peak).sum(axis=1, keepdims=True))
+        # Padded options get probability 0 and a log-likelihood of 0, so they
+        # drop out of the information gain sums
+        self.likelihood = np.exp(logits - log_norm)
+        self.log_likelihood = np.where(valid[..., np.newaxis], logits - log_norm, 0.0)
+
+    def start(self, session_id=None):
+        """
+        Returns a new session with a uniform prior and its first question chosen.
+        """
+        prior = np.full(len(self.path_keys), -math.log(len(self.path_keys)))
+        session = AdaptiveSession(prior, len(self.questions), session_id)
+        self._advance(session)
+        return session
+
+    def answer(self, session, question_text, answer):
+        """
+        Records one answer and chooses the session's next question.
+
+        Args:
+            session (AdaptiveSession): The session to update
+            question_text (str): The question being answered, usually
+                session.next_question's text
+            answer (str): The option number or option text
+
+        Raises:
+            InvalidAnswer: If the question or option is unknown, the question
+                was already answered, or the session is done
+        """
+        if session.done:
+            raise InvalidAnswer("The session is already complete")
+        row = self._index.get(question_text)
+        if row is None:
+            raise InvalidAnswer(f"Unknown question: {question_text!r}")
+        if session.asked[row]:
+            raise InvalidAnswer(f"Question already answered: {question_text!r}")
+        position = self._choices[row].get(" ".join(str(answer).split()))
+        if position is None:
+            raise InvalidAnswer(f"Unknown option {answer!r} for {question_text!r}")
+
+        log_posterior = session.log_posterior + self.log_likelihood[row, position]
+        session.log_posterior = log_posterior - log_posterior.max()
+        session.asked[row] = True
+        question = self.questions[row]
+        session.answers.append({"question": question.text, "answer": list(question.options.values())[position]})
+        self._advance(session)
+        return session
+
+    def information_gain(self, posterior, asked=None):
+        """
+        Returns the expected information gain in bits of every question.
+
+        Args:
+            posterior (np.ndarray): Current probability of each path
+            asked (np.ndarray): Boolean mask of questions to exclude; they
+                score -inf
+
+        Returns:
+            np.ndarray: One gain per question
+        """
+        joint = self.likelihood * posterior
+        predictive = joint.sum(axis=2, keepdims=True)
+        log_ratio = self.log_likelihood - np.log(np.maximum(predictive, 1e-300))
+        gain = (joint * log_ratio).sum(axis=(1, 2)) / math.log(2)
+        if asked is not None:
+            gain[asked] = -np.inf
+        return gain
+
+    def _advance(self, session):
+        asked_count = len(session.answers)
+        session.next_question = None
+        if asked_count >= len(self.questions):
+            self._finish(session, "exhausted")
+            return
+        if self.max_questions and asked_count >= self.max_questions:
+            self._finish(session, "max_questions")
+            return
+        posterior = session.posterior
+        settled = asked_count >= self.min_questions
+        if settled and posterior.max() >= self.confidence_threshold:
+            self._finish(session, "confident")
+            return
+        gain = self.information_gain(posterior, session.asked)
+        best = int(np.argmax(gain))
+        if settled and gain[best] < self.min_gain:
+            self._finish(session, "no_gain")
+            return
+        session.next_question = best
+
+    def _finish(self, session, reason):
+        session.done = True
+        session.stop_reason = reason
+        metrics.ADAPTIVE_QUESTIONS.observe(len(session.answers), reason=reason)
+
+    def question_payload(self, row):
+        """
+        Returns the client-facing description of one question.
+        """
+        question = self.questions[row]
+        return {
+            "question": question.text,
+            "category": question.category,
+            "category_title": self._category_titles[question.category],
+            "options": dict(question.options),
+        }
+
+    def scores(self, session):
+        """
+        Returns {path_key: probability} for a session, most likely first.
+        """
+        posterior = session.posterior
+        order = np.argsort(-posterior, kind="stable")
+        return {self.path_keys[i]: float(posterior[i]) for i in order}
+
+    def state(self, session):
+        """
+        Returns the session as a JSON-ready dict. Once done, "answers" can be
+        posted to /api/analyze as is.
+        """
+        scores = self.scores(session)
+        return {
+            "session_id": session.id,
+            "done": session.done,
+            "stop_reason": session.stop_reason,
+            "question": None if session.next_question is None else self.question_payload(session.next_question),
+            "asked": len(session.answers),
+            "total_questions": len(self.questions),
+            "confidence": next(iter(scores.values())),
+            "scores": scores,
+            "answers": list(session.answers),
+        }
+
+
+class SessionStore:
+    """
+    In-memory LRU of adaptive sessions that expire after ttl_seconds idle.
+
+    Sessions live in the worker process that created them, so deployments
+    with several workers need sticky routing for the session endpoints.
+    """
+
+    def __init__(self, max_sessions=None, ttl_seconds=None):
+        self.max_sessions = config.ADAPTIVE_MAX_SESSIONS if max_sessions is None else max_sessions
+        self.ttl_seconds = config.ADAPTIVE_SESSION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._sessions = OrderedDict()
+
+    def add(self, session):
+        self._sessions[session.id] = (session, time.monotonic() + self.ttl_seconds)
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id):
+        """
+        Returns the session and extends its lifetime, or None if unknown or expired.
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        session, expires_at = entry
+        now = time.monotonic()
+        if expires_at < now:
+            del self._sessions[session_id]
+            return None
+        self._sessions[session_id] = (session, now + self.ttl_seconds)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+_questioner = None
+_session_store = None
+
+
+def get_questioner():
+    """
+    Returns the shared AdaptiveQuestioner for the configured questionnaire.
+    """
+    global _questioner
+    if _questioner is None:
+        _questioner = AdaptiveQuestioner()
+    return _questioner
+
+
+def get_session_store():
+    """
+    Returns the process-wide SessionStore.
+    """
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
@@ -0,0 +1,330 @@
+import config
+import llm_client
+import metrics
+from cache import get_result_cache, make_cache_key
+from nearest import get_nearest_index, nearest_stats
+from prompts import get_prompt_engine
+from schemas import REQUIRED_SECTIONS, InvalidAnalysisError, parse_analysis
+from singleflight import get_singleflight
+from stream_parser import ITEMIZED_SECTIONS, SectionStreamParser
+
+
+class RepairStats:
+    """
+    Counts targeted repairs and the completion tokens they saved.
+
+    Savings per repair are estimated as the average completion size of a
+    full analysis minus the completion tokens the repair actually used.
+    """
+
+    def __init__(self):
+        self.analyses = 0
+        self.repairs = 0
+        self.repair_failures = 0
+        self.repair_completion_tokens = 0
+        self.tokens_saved = 0
+        self._full_completion_tokens = 0
+        self._full_completions = 0
+
+    def record_completion(self, usage):
+        self.analyses += 1
+        if usage is not None:
+            self._full_completion_tokens += usage.completion_tokens
+            self._full_completions += 1
+
+    def average_completion_tokens(self):
+        """
+        Returns the average completion size of a full analysis so far,
+        assuming the whole budget before the first one.
+        """
+        if self._full_completions:
+            return int(self._full_completion_tokens / self._full_completions)
+        return config.ANALYSIS_MAX_TOKENS
+
+    def record_repair(self, usage):
+        self.repairs += 1
+        used = usage.completion_tokens if usage is not None else 0
+        self.repair_completion_tokens += used
+        self.tokens_saved += max(self.average_completion_tokens() - used, 0)
+
+    def stats(self):
+        return {
+            "analyses": self.analyses,
+            "repairs": self.repairs,
+            "repair_failures": self.repair_failures,
+            "retry_rate": self.repairs / self.analyses if self.analyses else 0.0,
+            "repair_completion_tokens": self.repair_completion_tokens,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+repair_stats = RepairStats()
+
+
+async def _repair(answers, engine, analysis, sections):
+    rendered = engine.render_repair(answers, sections, analysis)
+    with metrics.stage("repair"):
+        response = await llm_client.create_chat_completion(
+            messages=rendered.messages,
+            temperature=config.ANALYSIS_TEMPERATURE,
+            max_tokens=sum(config.REPAIR_SECTION_MAX_TOKENS[name] for name in sections),
+            response_format={"type": "json_object"}
+        )
+    repair_stats.record_repair(response.usage)
+    with metrics.stage("parse"):
+        repaired, _ = parse_analysis(response.choices[0].message.content)
+    merged = dict(analysis)
+    merged.update((name, repaired[name]) for name in sections if name in repaired)
+    return merged, [name for name in sections if name not in repaired]
+
+
+async def finalize_analysis(answers, engine, content, usage=None):
+    """
+    Validates model output, re-requesting only sections that are invalid.
+
+    Args:
+        answers: The assessment answers the output was generated for
+        engine (PromptEngine): Engine used to render repair prompts
+        content (str): Raw completion content
+        usage: The completion's usage block, if available
+
+    Returns:
+        dict: A validated analysis
+
+    Raises:
+        InvalidAnalysisError: If sections are still invalid after all repair attempts
+    """
+    repair_stats.record_completion(usage)
+    with metrics.stage("parse"):
+        analysis, invalid = parse_analysis(content)
+    for _ in range(config.REPAIR_MAX_ATTEMPTS):
+        if not invalid:
+            break
+        analysis, invalid = await _repair(answers, engine, analysis, invalid)
+    if invalid:
+        repair_stats.repair_failures += 1
+        raise InvalidAnalysisError(f"Analysis is missing valid sections: {', '.join(invalid)}")
+    return analysis
+
+
+async def reuse_nearest(answers, engine):
+    """
+    Answers from the nearest earlier analysis when one is close enough.
+
+    Within config.NEAREST_SERVE_DISTANCE (0 never serves) the neighbor is
+    returned as is, marked with "source": "nearest". Within
+    config.NEAREST_SEED_DISTANCE the model is asked for only the sections
+    that must change, and those are merged into the neighbor, marked with
+    "source": "nearest_seed" so it is never indexed in turn.
+
+    Args:
+        answers: The assessment answers (dict or list of question/answer items)
+        engine (PromptEngine): Engine used to render the adaptation prompt
+
+    Returns:
+        dict: The reused analysis, or None if no neighbor is close enough
+    """
+    with metrics.stage("nearest_lookup"):
+        neighbor = get_nearest_index().nearest(answers)
+    if neighbor is None or neighbor.distance > max(config.NEAREST_SERVE_DISTANCE, config.NEAREST_SEED_DISTANCE):
+        nearest_stats.record_miss()
+        metrics.NEAREST_LOOKUPS.inc(result="miss")
+        metrics.annotate(nearest="miss")
+        return None
+
+    # What a full analysis would have cost, for the savings estimate
+    prompt_saved = engine.render(answers).token_count
+    completion_saved = repair_stats.average_completion_tokens()
+    if config.NEAREST_SERVE_DISTANCE > 0 and neighbor.distance <= config.NEAREST_SERVE_DISTANCE:
+        result = "served"
+        analysis = {**neighbor.analysis, "source": "nearest"}
+    else:
+        result = "seeded"
+        rendered = engine.render_seed(answers, neighbor.changes(answers), neighbor.analysis)
+        metrics.observe_stage("prompt_build", rendered.render_seconds)
+        with metrics.stage("llm_wait"):
+            response = await llm_client.create_chat_completion(
+                messages=rendered.messages,
+                temperature=config.ANALYSIS_TEMPERATURE,
+                max_tokens=config.NEAREST_SEED_MAX_TOKENS,
+                response_format={"type": "json_object"}
+            )
+        with metrics.stage("parse"):
+            changed, _ = parse_analysis(response.choices[0].message.content)
+        # Sections the model left out still fit and are kept from the neighbor
+        analysis = {**neighbor.analysis, "source": "nearest_seed"}
+        analysis.update((name, changed[name]) for name in REQUIRED_SECTIONS if name in changed)
+        usage = response.usage
+        prompt_saved -= usage.prompt_tokens if usage is not None else rendered.token_count
+        completion_saved -= usage.completion_tokens if usage is not None else config.NEAREST_SEED_MAX_TOKENS
+        completion_saved = max(completion_saved, 0)
+    nearest_stats.record_hit(result, prompt_saved, completion_saved)
+    metrics.NEAREST_LOOKUPS.inc(result=result)
+    metrics.NEAREST_COMPLETION_TOKENS_SAVED.inc(completion_saved)
+    metrics.annotate(nearest=result, nearest_distance=round(neighbor.distance, 3))
+    return analysis
+
+
+async def generate_analysis(answers, result_cache=None, persist=True, expires=True, reuse=True):
+    """
+    Generates a career analysis for a set of answers, using the result cache.
+
+    Concurrent requests for the same uncached answers share one LLM call.
+    Unless reuse is False, a close enough earlier analysis is served or
+    adapted instead of writing a new one (see reuse_nearest).
+
+    Args:
+        answers: The assessment answers (dict or list of question/answer items)
+        result_cache (ResultCache): Cache to read and fill (default: shared cache)
+        persist (bool): Whether new results are written to the on-disk tier
+        expires (bool): Whether new on-disk entries expire after the cache TTL
+        reuse (bool): Whether near-duplicate reuse applies (with config.NEAREST_ENABLED)
+
+    Returns:
+        dict: The parsed analysis
+    """
+    result_cache = get_result_cache() if result_cache is None else result_cache
+    engine = get_prompt_engine()
+    cache_key = make_cache_key(answers, prompt_version=engine.version)
+    cached = await _lookup(result_cache, cache_key)
+    if cached is not None:
+        return cached
+
+    leader = False
+    reuse = reuse and config.NEAREST_ENABLED
+
+    async def complete():
+        nonlocal leader
+        leader = True
+        analysis = await reuse_nearest(answers, engine) if reuse else None
+        if analysis is None:
+            analysis = await _complete_full(answers, engine)
+        result_cache.set(cache_key, analysis, persist=persist, expires=expires)
+        if reuse:
+            get_nearest_index().add(answers, analysis)
+        return analysis
+
+    try:
+        return await get_singleflight().do(cache_key, complete)
+    finally:
+        # complete() only runs for the caller that started the shared call
+        outcome = "leader" if leader else "collapsed"
+        metrics.DEDUP_OUTCOMES.inc(outcome=outcome)
+        metrics.annotate(singleflight=outcome)
+
+
+async def estimate_tokens(answers, result_cache=None):
+    """
+    Estimates the LLM tokens an analysis of answers will use, for admission
+    control: the rendered prompt plus the average full completion so far, or
+    0 when the analysis is already cached.
+    """
+    result_cache = get_result_cache() if result_cache is None else result_cache
+    engine = get_prompt_engine()
+    if await result_cache.acontains(make_cache_key(answers, prompt_version=engine.version)):
+        return 0
+    return engine.render(answers).token_count + repair_stats.average_completion_tokens()
+
+
+async def _complete_full(answers, engine):
+    rendered = engine.render(answers)
+    metrics.observe_stage("prompt_build", rendered.render_seconds)
+
+    # Get response from ChatGPT
+    with metrics.stage("llm_wait"):
+        response = await llm_client.create_chat_completion(
+            messages=rendered.messages,
+            temperature=config.ANALYSIS_TEMPERATURE,
+            max_tokens=config.ANALYSIS_MAX_TOKENS,
+            response_format={"type": "json_object"}
+        )
+
+    # Parse and validate the response
+    return await finalize_analysis(answers, engine, response.choices[0].message.content, response.usage)
+
+
+async def _lookup(result_cache, cache_key):
+    cached = await result_cache.aget(cache_key)
+    result = "miss" if cached is None else "hit"
+    metrics.CACHE_LOOKUPS.inc(result=result)
+    metrics.annotate(cache=result)
+    return cached
+
+
+def _section_events(analysis):
+    for key, value in analysis.items():
+        if key in ITEMIZED_SECTIONS and isinstance(value, list):
+            for index, item in enumerate(value):
+                yield {"section": key, "index": index, "item": item}
+        else:
+            yield {"section": key, "value": value}
+
+
+async def stream_analysis(answers, result_cache=None):
+    """
+    Generates an analysis, yielding each section as soon as it is complete.
+
+    Yields section events from SectionStreamParser while the completion is
+    streaming, followed by a final {"event": "complete", "analysis": ...}.
+    Cached analyses are replayed as the same sequence of events. Concurrent
+    requests for the same uncached answers share one LLM stream, and each
+    receives all of its events.
+
+    Args:
+        answers: The assessment answers (dict or list of question/answer items)
+        result_cache (ResultCache): Cache to read and fill (default: shared cache)
+    """
+    result_cache = get_result_cache() if result_cache is None else result_cache
+    engine = get_prompt_engine()
+    cache_key = make_cache_key(answers, prompt_version=engine.version)
+    cached = await _lookup(result_cache, cache_key)
+    if cached is not None:
+        for event in _section_events(cached):
+            yield event
+        yield {"event": "complete", "analysis": cached}
+        return
+
+    leader = False
+
+    def produce():
+        nonlocal leader
+        leader = True
+        return _stream_uncached(answers, engine, cache_key, result_cache)
+
+    try:
+        async for event in get_singleflight().stream(cache_key, produce):
+            yield event
+    finally:
+        outcome = "leader" if leader else "collapsed"
+        metrics.DEDUP_OUTCOMES.inc(outcome=outcome)
+        metrics.annotate(singleflight=outcome)
+
+
+async def _stream_uncached(answers, engine, cache_key, result_cache):
+    if config.NEAREST_ENABLED:
+        reused = await reuse_nearest(answers, engine)
+        if reused is not None:
+            result_cache.set(cache_key, reused)
+            for event in _section_events(reused):
+                yield event
+            yield {"event": "complete", "analysis": reused}
+            return
+
+    parser = SectionStreamParser()
+    rendered = engine.render(answers)
+    metrics.observe_stage("prompt_build", rendered.render_seconds)
+    with metrics.stage("llm_wait"):
+        async for delta in llm_client.stream_chat_completion(
+            messages=rendered.messages,
+            temperature=config.ANALYSIS_TEMPERATURE,
+            max_tokens=config.ANALYSIS_MAX_TOKENS,
+            response_format={"type": "json_object"}
+        ):
+            for event in parser.feed(delta):
+                yield event
+
+    analysis = await finalize_analysis(answers, engine, parser.text)
+    result_cache.set(cache_key, analysis)
+    if config.NEAREST_ENABLED:
+        get_nearest_index().add(answers, analysis)
+    yield {"event": "complete", "analysis": analysis}
@@ -1,16 +1,46 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List
+import asyncio
 import json
-from openai import OpenAI
-import os
+import logging
 from dotenv import load_dotenv
+import config
+import llm_client
+import metrics
+from adaptive import InvalidAnswer, get_questioner, get_session_store
+from analysis import estimate_tokens, generate_analysis, repair_stats, stream_analysis
+from batch import aiter_lines, aiter_records, run_batch
+from cache import close_result_cache, get_result_cache, result_hash
+from compression import CompressionMiddleware
+from job_queue import JobQueue, QueueFull
+from nearest import get_nearest_index, nearest_stats
+from presynthesize import presynthesize
+from questionnaire import get_questionnaire
+from rate_limit import RateLimited, RequestTooLarge, client_key, get_rate_limiter
+from result_store import close_result_store, get_result_store
+from rules import get_rule_engine
+from singleflight import get_singleflight
+from tts_service import get_tts_service
 
 # Load environment variables
 load_dotenv()
+metrics.configure_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse that records its serialization time as an analysis stage.
+    """
+
+    def render(self, content):
+        with metrics.stage("serialize"):
+            return super().render(content)
+
+app = FastAPI(default_response_class=TimedJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -21,8 +51,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Added last so it is outermost and times the whole request, CORS included
+app.add_middleware(metrics.MetricsMiddleware)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body while
+    responding. The stock class listens for disconnects on the same receive
+    channel, which would swallow body chunks.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def etag_matches(request, etag):
+    """
+    Weak If-None-Match comparison, as used for GET revalidation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Compression turns ETags weak, so compare without the W/ prefix
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(headers):
+    return Response(status_code=304, headers=headers)
+
+ASSESSMENT_FIELDS = ("answers", "analysis")
 
 class Answer(BaseModel):
     question: str
@@ -31,101 +94,371 @@ class Answer(BaseModel):
 class AssessmentRequest(BaseModel):
     answers: List[Answer]
 
+# Pre-synthesized question audio (see presynthesize.py)
+app.mount("/audio", StaticFiles(directory=config.TTS_STATIC_DIR, check_dir=False), name="audio")
+
+async def analyze_and_store(answers):
+    try:
+        analysis = await generate_analysis(answers)
+        source = "llm"
+    except Exception:
+        if not config.RULES_FALLBACK_ENABLED:
+            raise
+        # LLM slow, rate-limited or down: answer from the local rule engine
+        logger.warning("LLM analysis failed, serving the rule-based analysis", exc_info=True)
+        analysis = get_rule_engine().analyze(answers)
+        source = "rules"
+    metrics.ANALYSIS_RESULTS.inc(source=source)
+    metrics.annotate(source=source)
+    record = get_result_store().add(answers, analysis)
+    return {**analysis, "assessment_id": record["id"]}
+
+job_queue = JobQueue(analyze_and_store)
+
+async def admit(request, answers=None):
+    """
+    Admits an LLM-backed request from this client, charging the estimated
+    tokens of analyzing answers to the shared budget. Waits briefly when the
+    request fits soon, else rejects it with 429 and Retry-After; a request
+    larger than the whole budget is rejected with 413.
+
+    Returns:
+        tuple: (client, tokens) charged, for refund(), or None when admission
+            control is off
+    """
+    if not config.RATE_LIMIT_ENABLED:
+        return None
+    client = client_key(request.headers, request.client and request.client.host)
+    tokens = await estimate_tokens(answers) if answers is not None else 0
+    try:
+        await get_rate_limiter().admit(client, tokens)
+    except RequestTooLarge as e:
+        metrics.annotate(rate_limited="too_large")
+        raise HTTPException(status_code=413, detail=str(e))
+    except RateLimited as e:
+        metrics.annotate(rate_limited=e.scope)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return client, tokens
+
+async def refund(admission):
+    """
+    Gives back the charge of an admit() whose request was not run.
+    """
+    if admission is not None:
+        await get_rate_limiter().refund(*admission)
+
+@app.on_event("startup")
+async def load_questionnaire():
+    # Parse and validate the questions once, so a broken config or question
+    # bank fails at boot
+    get_questionnaire()
+    get_questioner()
+
+@app.on_event("startup")
+async def warm_nearest_index():
+    if not config.NEAREST_ENABLED:
+        return
+    # Index the most recent stored assessments so near-duplicates of earlier
+    # sessions are found after a restart
+    index = get_nearest_index()
+    records = await asyncio.get_running_loop().run_in_executor(
+        None, get_result_store().recent, index.max_entries)
+    for record in reversed(records):
+        index.add(dict(record["answers"]), record["analysis"])
+    logger.info("Indexed %d stored analyses for near-duplicate reuse", len(index))
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def presynthesize_question_audio():
+    if config.TTS_PRESYNTHESIZE_ON_STARTUP:
+        # Run in the background so the worker starts accepting requests at once
+        app.state.presynthesize_task = asyncio.create_task(presynthesize(config.TTS_STATIC_DIR))
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.close()
+
+@app.on_event("shutdown")
+async def flush_result_store():
+    await asyncio.get_running_loop().run_in_executor(None, close_result_store)
+
+@app.on_event("shutdown")
+async def flush_result_cache():
+    await asyncio.get_running_loop().run_in_executor(None, close_result_cache)
+
 @app.get("/")
 async def read_root():
     return {"message": "Career Assessment API"}
 
 @app.post("/api/analyze")
-async def analyze_answers(request: AssessmentRequest):
+async def analyze_answers(
+    request: AssessmentRequest,
+    http_request: Request,
+    mode: str = Query("sync", pattern="^(sync|job)$"),
+    priority: int = Query(0, ge=0, le=config.JOB_MAX_PRIORITY)
+):
+    admission = await admit(http_request, request.answers)
+    if mode == "job":
+        # Return at once; the client polls or subscribes for the result
+        answers = [answer.model_dump() for answer in request.answers]
+        try:
+            job = await job_queue.submit(answers, priority)
+        except QueueFull as e:
+            # The job never runs, so it must not count against the client
+            # or the token budget
+            await refund(admission)
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+        return JSONResponse(status_code=202, content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.id}",
+            "events_url": f"/api/jobs/{job.id}/events"
+        })
+
     try:
-        # Format answers for ChatGPT
-        formatted_answers = "\n".join([
-            f"Q: {answer.question}\nA: {answer.answer}\n"
-            for answer in request.answers
-        ])
-
-        # Prepare the prompt for ChatGPT
-        prompt = f"""As a career counselor, analyze the following assessment answers from a fresh graduate and provide detailed career guidance in JSON format.
-
-Assessment Answers:
-{formatted_answers}
-
-Please provide a comprehensive analysis in the following JSON structure:
-{{
-    "profile_summary": "A detailed summary of the person's profile, including their skills, work style, and career aspirations. Focus on their strengths and potential areas for growth.",
-    "strengths": [
-        "List of key strengths identified from their answers, with specific examples from their responses",
-        "Include both technical and soft skills",
-        "Highlight unique combinations of skills that make them stand out"
-    ],
-    "areas_for_development": [
-        "List of areas that need improvement based on their responses",
-        "Include specific suggestions for development",
-        "Focus on both technical and soft skills"
-    ],
-    "recommended_paths": [
-        {{
-            "title": "Career path title",
-            "description": "Detailed description of why this path is suitable, based on their answers",
-            "required_skills": [
-                "List of specific skills needed for this path",
-                "Include both technical and soft skills",
-                "Prioritize skills based on their current level"
-            ],
-            "learning_resources": [
-                "List of specific learning resources (courses, books, platforms)",
-                "Include both free and paid options",
-                "Prioritize resources based on their learning style"
-            ],
-            "next_steps": [
-                "List of immediate actionable steps to pursue this path",
-                "Include both short-term and long-term goals",
-                "Make steps specific and measurable"
-            ]
-        }}
-    ]
-}}
-
-Guidelines for the analysis:
-1. Focus on actionable insights and specific recommendations
-2. Consider their learning style and work preferences
-3. Suggest realistic career paths based on their current skill level
-4. Provide specific resources and next steps
-5. Highlight unique combinations of skills that could lead to niche opportunities
-6. Consider both technical and soft skills in the recommendations
-7. Explore various industries and roles that match their profile
-8. Consider their preferred work environment and career goals
-9. Suggest both traditional and emerging career paths
-10. Include opportunities for growth and advancement
-
-Ensure the response is valid JSON and follows this exact structure. Provide detailed and specific recommendations based on the person's answers.
-"""
-
-        # Get response from ChatGPT
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a career counselor specializing in helping fresh graduates find their ideal career path. Provide detailed, specific, and actionable recommendations in valid JSON format. Consider all possible career paths and industries."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-            response_format={"type": "json_object"}
-        )
-
-        # Parse the response
-        analysis = json.loads(response.choices[0].message.content)
-        return analysis
+        return await analyze_and_store(request.answers)
+    except Exception as e:
+        logger.exception("Analysis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analyze/batch")
+async def analyze_batch(
+    request: Request,
+    format: str = Query(None, pattern="^(jsonl|csv)$"),
+    concurrency: int = Query(None, ge=1, le=64)
+):
+    # Rows are read from the request body and results written back as they
+    # complete, so neither side is ever held in memory in full
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    records = aiter_records(aiter_lines(request.stream()), format)
+    # The client limit counts the batch once; rows then wait for the token
+    # budget instead of failing halfway through the stream
+    await admit(request)
+
+    async def analyze_row(answers):
+        if config.RATE_LIMIT_ENABLED:
+            await get_rate_limiter().acquire_tokens(await estimate_tokens(answers))
+        return await analyze_and_store(answers)
 
+    async def ndjson_results():
+        async for result in run_batch(records, analyze_row, concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return DuplexStreamingResponse(ndjson_results(), media_type="application/x-ndjson")
+
+@app.post("/api/analyze/preview")
+async def preview_analysis(request: AssessmentRequest):
+    return get_rule_engine().analyze(request.answers)
+
+@app.post("/api/sessions", status_code=201)
+async def start_session():
+    # Adaptive questioning: the server picks each next question and stops
+    # once the answers point clearly to one career path
+    questioner = get_questioner()
+    session = questioner.start()
+    get_session_store().add(session)
+    return questioner.state(session)
+
+@app.get("/api/sessions/{session_id}")
+async def get_session(session_id: str):
+    session = get_session_store().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return get_questioner().state(session)
+
+@app.post("/api/sessions/{session_id}/answers")
+async def answer_session_question(session_id: str, answer: Answer):
+    session = get_session_store().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    questioner = get_questioner()
+    try:
+        questioner.answer(session, answer.question, answer.answer)
+    except InvalidAnswer as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return questioner.state(session)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    # wait > 0 long-polls until the job finishes or the timeout passes
+    job = await job_queue.wait(job_id, wait) if wait else await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def server_sent_events():
+        current = job
+        yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': current.status})}\n\n"
+        while not current.done:
+            # Wake up periodically so proxies keep the connection open
+            current = await job_queue.wait(job_id, timeout=15)
+            if not current.done:
+                yield ": keep-alive\n\n"
+        yield f"event: {current.status}\ndata: {json.dumps(current.to_dict(), ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(server_sent_events(), media_type="text/event-stream")
+
+@app.post("/api/analyze/stream")
+async def analyze_answers_stream(request: AssessmentRequest, http_request: Request):
+    await admit(http_request, request.answers)
+
+    async def ndjson_events():
+        # Instant rule-based preview while the LLM analysis streams in
+        preview = get_rule_engine().analyze(request.answers)
+        yield json.dumps({"event": "preview", "analysis": preview}, ensure_ascii=False) + "\n"
+        try:
+            async for event in stream_analysis(request.answers):
+                if event.get("event") == "complete":
+                    metrics.ANALYSIS_RESULTS.inc(source="llm")
+                    metrics.annotate(source="llm")
+                    record = get_result_store().add(request.answers, event["analysis"])
+                    event = {**event, "assessment_id": record["id"]}
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            if not config.RULES_FALLBACK_ENABLED:
+                logger.exception("Streaming analysis failed")
+                yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+                return
+            # As in analyze_and_store: finish with the rule-based analysis
+            logger.warning("LLM analysis failed, serving the rule-based analysis", exc_info=True)
+            metrics.ANALYSIS_RESULTS.inc(source="rules")
+            metrics.annotate(source="rules")
+            record = get_result_store().add(request.answers, preview)
+            event = {"event": "complete", "analysis": preview, "assessment_id": record["id"]}
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_events(), media_type="application/x-ndjson")
+
+@app.get("/api/assessments/{assessment_id}")
+async def get_assessment(
+    request: Request,
+    assessment_id: str,
+    fields: str = Query(",".join(ASSESSMENT_FIELDS), pattern="^(answers|analysis)(,(answers|analysis))?$")
+):
+    # A database read can wait on the writer thread's commit, so it runs in
+    # the thread pool rather than on the event loop
+    record = await asyncio.get_running_loop().run_in_executor(None, get_result_store().get, assessment_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+    # Stored assessments never change, so the result hash identifies the
+    # representation; revisits with a matching ETag get an empty 304
+    selected = [name for name in ASSESSMENT_FIELDS if name in fields.split(",")]
+    suffix = "" if len(selected) == len(ASSESSMENT_FIELDS) else "-" + "-".join(selected)
+    etag = f'"{result_hash(record["analysis"])[:32]}{suffix}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    body = {"assessment_id": record["id"], "created_at": record["created_at"]}
+    body.update((name, record[name]) for name in selected)
+    return TimedJSONResponse(body, headers=headers)
+
+@app.get("/api/tts")
+async def text_to_speech(
+    request: Request,
+    text: str = Query(..., min_length=1, max_length=3000),
+    voice: str = None,
+    format: str = Query("mp3", pattern="^(mp3|base64)$")
+):
+    # Audio is content-addressed, so it can be cached for good and revalidated
+    # without synthesizing anything
+    tts_service = get_tts_service()
+    key = tts_service.audio_key(text, voice)
+    etag = f'"{key}"' if format == "mp3" else f'"{key}-base64"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    try:
+        if format == "base64":
+            # For clients that need audio inside JSON; a third larger than mp3
+            return TimedJSONResponse(await tts_service.synthesize_speech(text, voice), headers=headers)
+        path = await tts_service.synthesize_to_file(text, voice)
+    except Exception as e:
+        logger.exception("Speech synthesis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    # Raw MP3 served from the audio cache file, so the bytes never pass
+    # through Python buffers when the server supports file sending
+    return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
+@app.get("/api/tts/stream")
+async def text_to_speech_stream(
+    text: str = Query(..., min_length=1, max_length=3000),
+    voice: str = None
+):
+    audio = get_tts_service().stream_speech(text, voice)
+    try:
+        # Pull the first chunk here so synthesis errors still become a 500
+        first_chunk = await audio.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
     except Exception as e:
+        logger.exception("Speech synthesis failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def chunks():
+        yield first_chunk
+        async for chunk in audio:
+            yield chunk
+
+    return StreamingResponse(chunks(), media_type="audio/mpeg")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {**get_result_cache().stats(), "singleflight": get_singleflight().stats()}
+
+@app.get("/api/stats")
+async def stats():
+    return {
+        "cache": get_result_cache().stats(),
+        "singleflight": get_singleflight().stats(),
+        "repair": repair_stats.stats(),
+        "nearest": {**nearest_stats.stats(), **get_nearest_index().stats()},
+        "rate_limit": get_rate_limiter().stats() if config.RATE_LIMIT_ENABLED else None,
+        "llm": llm_client.stats()
+    }
+
+@metrics.registry.collector
+def collect_state():
+    # Point-in-time values that live in other components, read at scrape time
+    cache = get_result_cache().stats()
+    samples = [
+        ("analysis_cache_entries", "gauge", "Analyses held in the in-memory cache", [({}, cache["entries"])]),
+        ("analysis_singleflight_in_flight", "gauge", "Distinct analyses currently running upstream",
+         [({}, get_singleflight().stats()["in_flight"])]),
+        ("job_queue_depth", "gauge", "Jobs waiting for a worker", [({}, job_queue.backend.qsize())]),
+        ("analysis_nearest_index_entries", "gauge", "Earlier analyses searchable for near-duplicate reuse",
+         [({}, len(get_nearest_index()))]),
+        ("adaptive_sessions_active", "gauge", "Adaptive question sessions held in memory",
+         [({}, len(get_session_store()))]),
+    ]
+    llm = llm_client.stats()
+    if llm is not None:
+        samples.append(("llm_backend_circuit_open", "gauge", "1 while a backend's circuit breaker is open",
+                        [({"backend": name}, int(backend["circuit"] == "open"))
+                         for name, backend in llm["backends"].items()]))
+        samples.append(("llm_hedges_total", "counter", "Requests hedged to a second backend",
+                        [({}, llm["hedges"])]))
+    return samples
+
+@app.get(config.METRICS_PATH, include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
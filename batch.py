@@ -0,0 +1,124 @@
+import asyncio
+import codecs
+import csv
+import json
+import config
+
+
+class RecordParser:
+    """
+    Turns input lines into answer records, one line at a time.
+
+    JSONL lines are objects with "answers" (a list of question/answer
+    items or a question -> answer mapping) and an optional "id". CSV input
+    starts with a header row; an "id" column is optional and every other
+    column is a question whose cells are the answers. Quoted CSV fields
+    must not contain line breaks.
+    """
+
+    def __init__(self, fmt="jsonl"):
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"Unsupported batch format: {fmt}")
+        self.fmt = fmt
+        self._header = None
+        self._row = 0
+
+    def parse_line(self, line):
+        """
+        Returns a record dict for a data line, or None for blank and header lines.
+
+        Records are {"row", "id", "answers"}, or {"row", "id", "error"}
+        when the line cannot be parsed.
+        """
+        line = line.strip("\r\n")
+        if not line.strip():
+            return None
+        if self.fmt == "csv" and self._header is None:
+            self._header = next(csv.reader([line]))
+            return None
+
+        self._row += 1
+        try:
+            if self.fmt == "jsonl":
+                data = json.loads(line)
+                answers = data["answers"]
+                record_id = data.get("id")
+            else:
+                cells = next(csv.reader([line]))
+                data = dict(zip(self._header, cells))
+                record_id = data.pop("id", None)
+                answers = {question: answer for question, answer in data.items() if answer}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return {"row": self._row, "id": None, "error": f"Invalid input line: {e}"}
+        return {"row": self._row, "id": record_id if record_id is not None else self._row, "answers": answers}
+
+
+async def aiter_lines(chunks):
+    """
+    Splits an async iterator of byte chunks into decoded lines.
+
+    Chunk boundaries are arbitrary, so a multibyte character may be split
+    across two chunks; the incremental decoder holds the partial bytes back.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def aiter_records(lines, fmt="jsonl"):
+    """
+    Yields records parsed from an async iterator of lines.
+    """
+    parser = RecordParser(fmt)
+    async for line in lines:
+        record = parser.parse_line(line)
+        if record is not None:
+            yield record
+
+
+async def run_batch(records, analyze, concurrency=None):
+    """
+    Analyzes records with bounded parallelism, yielding results as they finish.
+
+    Input is consumed only as fast as results complete, so memory use stays
+    flat however many rows there are. Duplicate answer sets are served by
+    the result cache and the single-flight layer behind analyze.
+
+    Args:
+        records: Async iterator of records from aiter_records
+        analyze: Async callable taking answers and returning an analysis
+        concurrency (int): Maximum analyses in flight (default: BATCH_CONCURRENCY)
+
+    Yields:
+        dict: {"row", "id", "status": "ok", "analysis"} or
+            {"row", "id", "status": "error", "error"}
+    """
+    concurrency = concurrency or config.BATCH_CONCURRENCY
+
+    async def process(record):
+        result = {"row": record["row"], "id": record["id"]}
+        if "error" in record:
+            return {**result, "status": "error", "error": record["error"]}
+        try:
+            return {**result, "status": "ok", "analysis": await analyze(record["answers"])}
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e)}
+
+    pending = set()
+    async for record in records:
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+        pending.add(asyncio.create_task(process(record)))
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
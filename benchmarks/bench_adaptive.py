@@ -0,0 +1,163 @@
+"""
+Simulates adaptive question sessions against a question bank.
+
+Each simulated respondent has a hidden career path and answers every
+question by sampling the answer model of that path, with --noise of the
+answers picked at random instead. The same respondents go through the
+adaptive flow (adaptive.AdaptiveQuestioner) and through the full
+questionnaire, and the benchmark reports questions asked, how often the
+leading path is the hidden one, prompt tokens for the LLM analysis and the
+time per adaptive step.
+
+By default the bank is generated (--questions items with --options options
+each and random affinities), written to a JSONL file and loaded through
+questionnaire.load_question_bank, like a QUESTION_BANK_PATH bank would be.
+--bank default uses the questions in config.py instead.
+
+Usage:
+    python benchmarks/bench_adaptive.py
+    python benchmarks/bench_adaptive.py --questions 500 --sessions 1000 --noise 0.3
+    python benchmarks/bench_adaptive.py --bank default --threshold 0.9
+    python benchmarks/bench_adaptive.py --write-bank bank.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from adaptive import AdaptiveQuestioner
+from prompts import get_prompt_engine
+from questionnaire import get_questionnaire, load_question_bank
+
+
+def generate_bank(path, questions, options, seed):
+    """
+    Writes a random JSONL question bank with per-question affinities.
+    """
+    rng = random.Random(seed)
+    paths = list(config.CAREER_PATHS)
+    categories = [f"topic_{index}" for index in range(max(1, questions // 25))]
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(questions):
+            category = categories[index % len(categories)]
+            record = {
+                "category": category,
+                "category_title": category.replace("_", " ").title(),
+                "question": f"Question {index}: which of these describes you best?",
+                "options": {str(number): f"Statement {number} for question {index}" for number in range(1, options + 1)},
+                # A few options lean towards a few paths, most weights are 0
+                "affinities": {
+                    str(number): {path: round(rng.uniform(0.2, 1.4), 1) for path in rng.sample(paths, rng.randint(1, 2))}
+                    for number in range(1, options + 1)
+                },
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def simulate(questioner, sessions, noise, seed):
+    rng = np.random.default_rng(seed)
+    question_count = len(questioner.questions)
+    option_counts = np.array([len(question.options) for question in questioner.questions])
+    results = {"adaptive": [], "full": [], "adaptive_asked": [], "step_seconds": [], "start_seconds": [],
+               "reasons": {}, "adaptive_answers": [], "full_answers": []}
+
+    for _ in range(sessions):
+        truth = int(rng.integers(len(questioner.path_keys)))
+        # Draw the respondent's answer to every question up front
+        answers = []
+        for row in range(question_count):
+            if rng.random() < noise:
+                answers.append(int(rng.integers(option_counts[row])))
+            else:
+                probabilities = questioner.likelihood[row, :option_counts[row], truth]
+                answers.append(int(rng.choice(option_counts[row], p=probabilities / probabilities.sum())))
+
+        start = time.perf_counter()
+        session = questioner.start()
+        results["start_seconds"].append(time.perf_counter() - start)
+        while not session.done:
+            row = session.next_question
+            start = time.perf_counter()
+            questioner.answer(session, questioner.questions[row].text, str(answers[row] + 1))
+            results["step_seconds"].append(time.perf_counter() - start)
+        results["adaptive"].append(questioner.path_keys.index(next(iter(questioner.scores(session)))) == truth)
+        results["adaptive_asked"].append(len(session.answers))
+        results["reasons"][session.stop_reason] = results["reasons"].get(session.stop_reason, 0) + 1
+        results["adaptive_answers"].append(session.answers)
+
+        full = np.full(len(questioner.path_keys), 0.0)
+        for row, position in enumerate(answers):
+            full += questioner.log_likelihood[row, position]
+        results["full"].append(int(np.argmax(full)) == truth)
+        results["full_answers"].append([
+            {"question": question.text, "answer": list(question.options.values())[position]}
+            for question, position in zip(questioner.questions, answers)
+        ])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive questioning simulation")
+    parser.add_argument("--bank", choices=["synthetic", "default"], default="synthetic")
+    parser.add_argument("--questions", type=int, default=300, help="Synthetic bank size")
+    parser.add_argument("--options", type=int, default=4, help="Options per synthetic question")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.2, help="Share of answers picked at random")
+    parser.add_argument("--threshold", type=float, default=config.ADAPTIVE_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-bank", metavar="PATH", help="Write the synthetic bank to PATH and exit")
+    args = parser.parse_args()
+
+    if args.write_bank:
+        generate_bank(args.write_bank, args.questions, args.options, args.seed)
+        print(f"Wrote {args.questions} questions to {args.write_bank}")
+        return
+
+    if args.bank == "default":
+        questionnaire = get_questionnaire()
+        print(f"Bank: config.py, {len(questionnaire.questions)} questions")
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-adaptive-"), "bank.jsonl")
+        generate_bank(path, args.questions, args.options, args.seed)
+        start = time.perf_counter()
+        questionnaire = load_question_bank(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"Bank: synthetic, {len(questionnaire.questions)} questions x {args.options} options "
+              f"(loaded and validated in {load_ms:.1f} ms)")
+
+    start = time.perf_counter()
+    questioner = AdaptiveQuestioner(questionnaire, confidence_threshold=args.threshold)
+    print(f"Answer model built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    results = simulate(questioner, args.sessions, args.noise, args.seed)
+
+    prompt_engine = get_prompt_engine()
+    # Prompt tokens for a sample of sessions; rendering is the slow part
+    sample = range(min(args.sessions, 100))
+    adaptive_tokens = statistics.mean(prompt_engine.render(results["adaptive_answers"][i]).token_count for i in sample)
+    full_tokens = statistics.mean(prompt_engine.render(results["full_answers"][i]).token_count for i in sample)
+    steps = sorted(results["step_seconds"])
+
+    print(f"\n{args.sessions} sessions, noise {args.noise:g}, confidence threshold {args.threshold:g}")
+    print(f"{'':<10} {'questions':>10} {'accuracy':>9} {'prompt tokens':>14}")
+    print(f"{'full':<10} {len(questioner.questions):>10.1f} {statistics.mean(results['full']):>9.1%} "
+          f"{full_tokens:>14.0f}")
+    print(f"{'adaptive':<10} {statistics.mean(results['adaptive_asked']):>10.1f} "
+          f"{statistics.mean(results['adaptive']):>9.1%} {adaptive_tokens:>14.0f}")
+    print(f"\nQuestions asked: median {statistics.median(results['adaptive_asked']):g}, "
+          f"max {max(results['adaptive_asked'])}; stopped because: "
+          + ", ".join(f"{reason} {count}" for reason, count in sorted(results["reasons"].items())))
+    print(f"Per step (answer + next question): mean {statistics.mean(steps) * 1e6:.0f} us, "
+          f"p99 {steps[int(len(steps) * 0.99)] * 1e6:.0f} us; "
+          f"session start {statistics.mean(results['start_seconds']) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Reproducible load and latency benchmark for the API.
+
+Starts the stub LLM server (see stub_llm_server.py) as a subprocess and
+drives api.app in-process through an ASGI transport, with the fake Polly
+client behind TTS, at increasing concurrency. Each level runs a closed loop:
+`concurrency` clients each send --rounds requests back to back.
+
+For every level it reports throughput, p50/p95/p99 latency, event-loop lag
+(how late a 10 ms ticker wakes up while the load runs) and memory per
+request (RSS growth per request; with --trace-memory also the peak traced
+allocation per in-flight request, at a large cost in speed), and writes
+everything to a JSON file tagged with the current commit.
+Pass --compare with an earlier file to print the change per level.
+
+Usage:
+    python benchmarks/bench_api.py --levels 1 4 16 64 --latency 0.2
+    python benchmarks/bench_api.py --scenario stream --tokens-per-second 200
+    python benchmarks/bench_api.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ("analyze", "stream", "preview", "tts")
+LAG_INTERVAL = 0.01
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_bytes():
+    # Current resident set size; /proc is Linux-only, so fall back to the peak
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class LoopLagMonitor:
+    """
+    Measures how late a periodic ticker wakes up on the running event loop.
+    """
+
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _tick(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - start - self.interval, 0.0))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def request_factory(scenario, unique):
+    """
+    Returns a function that builds the next (method, url, kwargs) to send.
+    """
+    from questionnaire import iter_answer_sets
+
+    answer_sets = itertools.cycle(iter_answer_sets()) if unique else itertools.repeat(next(iter_answer_sets()))
+    texts = (f"Question {index}: how do you prefer to work?" for index in itertools.count())
+
+    def next_request():
+        if scenario == "tts":
+            text = next(texts) if unique else "How do you prefer to work?"
+            return "GET", "/api/tts", {"params": {"text": text}}
+        path = {"analyze": "/api/analyze", "stream": "/api/analyze/stream", "preview": "/api/analyze/preview"}[scenario]
+        answers = [{"question": question, "answer": answer} for question, answer in next(answer_sets).items()]
+        return "POST", path, {"json": {"answers": answers}}
+
+    return next_request
+
+
+async def run_level(client, next_request, concurrency, rounds, trace_memory=False):
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for _ in range(rounds):
+            method, url, kwargs = next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    monitor = LoopLagMonitor()
+    rss_before = rss_bytes()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        traced_before, _ = tracemalloc.get_traced_memory()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    rss_growth = rss_bytes() - rss_before
+    requests = concurrency * rounds
+    memory = {
+        "rss_growth_kb": round(rss_growth / 1024, 1),
+        "rss_growth_kb_per_request": round(rss_growth / requests / 1024, 2),
+    }
+    if trace_memory:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        memory["traced_peak_kb_per_request"] = round((traced_peak - traced_before) / concurrency / 1024, 2)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round((requests - errors) / elapsed, 2),
+        "latency_ms": {
+            "mean": ms(statistics.mean(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(max(latencies)) if latencies else None,
+        },
+        "loop_lag_ms": {
+            "mean": ms(statistics.mean(monitor.samples)) if monitor.samples else None,
+            "p99": ms(percentile(monitor.samples, 99)),
+            "max": ms(max(monitor.samples)) if monitor.samples else None,
+        },
+        "memory": memory,
+    }
+
+
+async def wait_until_up(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def memory_per_request(level):
+    memory = level["memory"]
+    return memory.get("traced_peak_kb_per_request", memory["rss_growth_kb_per_request"])
+
+
+def print_levels(levels):
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'lag p99':>8} {'KB/req':>8} {'errors':>7}")
+    # KB/req is the traced peak when available, else RSS growth
+    for level in levels:
+        latency = level["latency_ms"]
+        print(f"{level['concurrency']:>5} {level['throughput_rps']:>9.1f} {latency['p50'] or 0:>9.1f} "
+              f"{latency['p95'] or 0:>9.1f} {latency['p99'] or 0:>9.1f} {level['loop_lag_ms']['p99'] or 0:>8.2f} "
+              f"{memory_per_request(level):>8.1f} {level['errors']:>7}")
+
+
+def print_comparison(baseline, current):
+    old_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    print(f"\nCompared with {baseline['meta']['commit']} ({baseline['meta']['scenario']}):")
+    print(f"{'conc':>5} {'req/s':>10} {'p95':>10} {'p99':>10}")
+
+    def change(old, new):
+        if not old or new is None:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    for level in current["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"{level['concurrency']:>5} {change(old['throughput_rps'], level['throughput_rps']):>10} "
+              f"{change(old['latency_ms']['p95'], level['latency_ms']['p95']):>10} "
+              f"{change(old['latency_ms']['p99'], level['latency_ms']['p99']):>10}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="API load and latency benchmark")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="analyze")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--rounds", type=int, default=5, help="Requests per client at each level")
+    parser.add_argument("--repeat", action="store_true",
+                        help="Send the same answers every time (measures the cache path)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM median time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Log-normal sigma of the stub latency")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Stub completion token rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub LLM failure rate")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Fake Polly latency in seconds")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Measure allocations with tracemalloc (slows the app down several times)")
+    parser.add_argument("--stub-port", type=int, default=9002)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>-<scenario>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    workdir = tempfile.mkdtemp(prefix="bench-api-")
+    # Configure the app before it is imported: isolated stores, no disk
+    # cache, the stub LLM and the fake Polly client
+    os.environ.update({
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "LLM_PROVIDERS": "",
+        "CACHE_DB_PATH": "",
+        "RESULT_STORE_PATH": os.path.join(workdir, "assessments.db"),
+        "TTS_BACKEND": "fake",
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+        "TTS_PRESYNTHESIZE_ON_STARTUP": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+    stub = subprocess.Popen([
+        sys.executable, "benchmarks/stub_llm_server.py", "--port", str(args.stub_port),
+        "--latency", str(args.latency), "--latency-sigma", str(args.latency_sigma),
+        "--tokens-per-second", str(args.tokens_per_second), "--error-rate", str(args.error_rate),
+    ], cwd=ROOT)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.stub_port}/stats")
+
+        import api
+        from fake_polly import FakePollyClient
+        from tts_service import TTSService
+        import tts_service
+        tts_service._tts_service = TTSService(polly_client=FakePollyClient(latency_seconds=args.tts_latency))
+
+        if args.trace_memory:
+            tracemalloc.start()
+        await api.app.router.startup()
+        next_request = request_factory(args.scenario, unique=not args.repeat)
+        transport = httpx.ASGITransport(app=api.app)
+        levels = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            # Warm up imports, connection pools and lazy singletons
+            method, url, kwargs = next_request()
+            await client.request(method, url, **kwargs)
+            for concurrency in args.levels:
+                levels.append(await run_level(client, next_request, concurrency, args.rounds, args.trace_memory))
+        await api.app.router.shutdown()
+        if args.trace_memory:
+            tracemalloc.stop()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    result = {
+        "meta": {
+            "commit": commit,
+            "scenario": args.scenario,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "levels": levels,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit}-{args.scenario}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_levels(levels)
+    print(f"\nSaved to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Measures near-duplicate reuse of analyses (nearest.py) on simulated traffic.
+
+Respondents are drawn around the career paths: each has a hidden path and
+answers like the adaptive answer model predicts for it, with --noise of the
+answers picked at random. The same stream of assessments runs through
+analysis.generate_analysis with the fake LLM provider under each setting
+below, with a fresh cache and index every time. The fake provider returns
+an analysis of about --completion-tokens tokens and, like a real model,
+stops at max_tokens.
+
+For every setting it reports exact cache hits, how often a neighbor was
+served or adapted, and the LLM tokens and estimated cost spent.
+
+Usage:
+    python benchmarks/bench_nearest.py
+    python benchmarks/bench_nearest.py --sessions 5000 --noise 0.3 --completion-tokens 1500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS = [
+    # label, reuse enabled, serve distance, seed distance
+    ("exact cache only", False, 0.0, 0.0),
+    ("seed <= 1.0", True, 0.0, 1.0),
+    ("serve <= 0.75, seed <= 1.0", True, 0.75, 1.0),
+    ("seed <= 2.0", True, 0.0, 2.0),
+]
+
+
+def realistic_analysis(completion_tokens):
+    """
+    Returns the fake analysis padded to about completion_tokens tokens,
+    mostly in recommended_paths, the last and largest section.
+    """
+    from fake_llm import SAMPLE_ANALYSIS
+    analysis = json.loads(json.dumps(SAMPLE_ANALYSIS))
+    filler = "Build on this with a concrete project and a measurable goal for the next quarter. "
+    missing = completion_tokens * 4 - len(json.dumps(analysis))
+    analysis["profile_summary"] += " " + filler * max(missing // 8 // len(filler), 0)
+    for path in analysis["recommended_paths"]:
+        path["description"] += " " + filler * max(missing * 7 // 8 // len(filler) // len(analysis["recommended_paths"]), 0)
+    return json.dumps(analysis)
+
+
+def simulated_answers(sessions, noise, seed):
+    from adaptive import AdaptiveQuestioner
+    questioner = AdaptiveQuestioner()
+    rng = np.random.default_rng(seed)
+    answer_sets = []
+    for _ in range(sessions):
+        truth = int(rng.integers(len(questioner.path_keys)))
+        answers = []
+        for row, question in enumerate(questioner.questions):
+            options = list(question.options.values())
+            if rng.random() < noise:
+                position = int(rng.integers(len(options)))
+            else:
+                probabilities = questioner.likelihood[row, :len(options), truth]
+                position = int(rng.choice(len(options), p=probabilities / probabilities.sum()))
+            answers.append({"question": question.text, "answer": options[position]})
+        answer_sets.append(answers)
+    return answer_sets
+
+
+async def run_setting(answer_sets, reuse, serve_distance, seed_distance):
+    import analysis
+    import config
+    import metrics
+    import nearest
+    from cache import ResultCache
+
+    config.NEAREST_SERVE_DISTANCE = serve_distance
+    config.NEAREST_SEED_DISTANCE = seed_distance
+    nearest._nearest_index = nearest.NearestIndex()
+    nearest.nearest_stats.__init__()
+    result_cache = ResultCache(db_path=None)
+    before = {kind: metrics.LLM_TOKENS.value(backend="fake", kind=kind) for kind in ("prompt", "completion")}
+
+    for answers in answer_sets:
+        await analysis.generate_analysis(answers, result_cache=result_cache, reuse=reuse)
+
+    stats = nearest.nearest_stats.stats()
+    spent = {kind: metrics.LLM_TOKENS.value(backend="fake", kind=kind) - before[kind] for kind in before}
+    cost = (spent["prompt"] * config.LLM_PROMPT_COST_PER_1K + spent["completion"] * config.LLM_COMPLETION_COST_PER_1K) / 1000
+    hits = stats["served"] + stats["seeded"]
+    return {
+        "served": stats["served"],
+        "seeded": stats["seeded"],
+        "exact": result_cache.hits,
+        "hit_rate": hits / len(answer_sets),
+        "prompt_tokens": spent["prompt"],
+        "completion_tokens": spent["completion"],
+        "cost": cost,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate reuse benchmark")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=0.2, help="Share of answers picked at random")
+    parser.add_argument("--completion-tokens", type=int, default=1200, help="Size of a full fake analysis")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_PROVIDERS": json.dumps([{"name": "fake", "type": "fake", "latency_median": 0.0, "latency_sigma": 0}]),
+        "CACHE_DB_PATH": "",
+        "NEAREST_ENABLED": "true",
+        "LOG_LEVEL": "WARNING",
+    })
+    import config
+    # Set before the first call builds the router
+    config.LLM_PROVIDERS[0]["content"] = realistic_analysis(args.completion_tokens)
+    answer_sets = simulated_answers(args.sessions, args.noise, args.seed)
+    print(f"{args.sessions} assessments, noise {args.noise:g}, full analysis ~{args.completion_tokens} tokens\n")
+    print(f"{'setting':<28} {'exact':>6} {'served':>7} {'seeded':>7} {'reuse':>6} "
+          f"{'prompt tok':>11} {'compl tok':>10} {'cost $':>8}")
+    baseline = None
+    for label, reuse, serve_distance, seed_distance in SETTINGS:
+        result = await run_setting(answer_sets, reuse, serve_distance, seed_distance)
+        baseline = baseline or result
+        saved = (1 - result["cost"] / baseline["cost"]) * 100 if baseline["cost"] else 0.0
+        print(f"{label:<28} {result['exact']:>6} {result['served']:>7} {result['seeded']:>7} "
+              f"{result['hit_rate']:>6.0%} {result['prompt_tokens']:>11} {result['completion_tokens']:>10} "
+              f"{result['cost']:>8.3f}  ({saved:+.1f}% cost saved)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+Compares prompt size and render time of the full and compact prompt modes.
+
+The "legacy" row rebuilds the whole prompt with an f-string on every call,
+as the entry points did before the shared prompt engine.
+
+Usage:
+    python benchmarks/bench_prompts.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import FULL_SCHEMA, PROMPT_HEADER, SYSTEM_PROMPT, PromptEngine, count_tokens, format_answers
+from questionnaire import iter_answer_sets
+
+
+def legacy_render(answers):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"""{PROMPT_HEADER}{format_answers(answers)}{FULL_SCHEMA}"""}
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt rendering")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    answers = next(iter_answer_sets())
+    engines = {"full": PromptEngine(), "compact": PromptEngine(compact=True)}
+
+    print(f"{'mode':>8} {'chars':>8} {'tokens':>8} {'us/render':>10}")
+    legacy_messages = legacy_render(answers)
+    legacy_chars = sum(len(m["content"]) for m in legacy_messages)
+    legacy_tokens = sum(count_tokens(m["content"]) for m in legacy_messages)
+    seconds = timeit.timeit(lambda: legacy_render(answers), number=args.iterations)
+    print(f"{'legacy':>8} {legacy_chars:>8} {legacy_tokens:>8} {seconds / args.iterations * 1e6:>10.2f}")
+
+    for name, engine in engines.items():
+        rendered = engine.render(answers)
+        chars = sum(len(m["content"]) for m in rendered.messages)
+        seconds = timeit.timeit(lambda: engine.render(answers), number=args.iterations)
+        print(f"{name:>8} {chars:>8} {rendered.token_count:>8} {seconds / args.iterations * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
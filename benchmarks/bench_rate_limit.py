@@ -0,0 +1,120 @@
+"""
+Shows admission control (rate_limit.py) shielding quiet clients from a noisy one.
+
+Runs the API in process with the fake LLM provider. For --seconds, one
+noisy client sends --noisy-rps analyses per second while --quiet clients
+send one every two seconds each, all with distinct answers so every request
+reaches the model. The benchmark prints, per client kind, how many requests
+were admitted at once, queued, or rejected with 429, the median latency of
+admitted requests and the LLM tokens spent per minute.
+
+Usage:
+    python benchmarks/bench_rate_limit.py
+    python benchmarks/bench_rate_limit.py --tokens-per-minute 60000 --backend sqlite
+    python benchmarks/bench_rate_limit.py --disabled
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def client_loop(client, kind, api_key, interval, deadline, answer_sets, results):
+    pending = []
+
+    async def one():
+        answers = [{"question": question, "answer": answer} for question, answer in next(answer_sets).items()]
+        start = time.perf_counter()
+        response = await client.post("/api/analyze", json={"answers": answers}, headers={"X-API-Key": api_key})
+        elapsed = time.perf_counter() - start
+        stats = results[kind]
+        if response.status_code == 429:
+            stats["rejected"] += 1
+            stats["retry_after"].append(int(response.headers["retry-after"]))
+        elif response.status_code == 200:
+            stats["ok"] += 1
+            stats["latency"].append(elapsed)
+        else:
+            stats["errors"] += 1
+
+    while time.monotonic() < deadline:
+        pending.append(asyncio.create_task(one()))
+        await asyncio.sleep(interval)
+    await asyncio.gather(*pending)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rate limiting benchmark")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--noisy-rps", type=float, default=20, help="Requests per second from the noisy client")
+    parser.add_argument("--quiet", type=int, default=5, help="Number of quiet clients")
+    parser.add_argument("--requests-per-minute", type=float, default=60)
+    parser.add_argument("--burst", type=float, default=20)
+    parser.add_argument("--tokens-per-minute", type=float, default=90000)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--disabled", action="store_true", help="Run without admission control")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-rate-limit-")
+    os.environ.update({
+        "LLM_PROVIDERS": '[{"name": "fake", "type": "fake", "latency_median": 0.2, "latency_sigma": 0.2}]',
+        "CACHE_DB_PATH": "",
+        "NEAREST_ENABLED": "false",
+        "RESULT_STORE_PATH": os.path.join(workdir, "assessments.db"),
+        "TTS_BACKEND": "fake",
+        "TTS_PRESYNTHESIZE_ON_STARTUP": "false",
+        "RATE_LIMIT_ENABLED": "false" if args.disabled else "true",
+        "RATE_LIMIT_REQUESTS_PER_MINUTE": str(args.requests_per_minute),
+        "RATE_LIMIT_BURST": str(args.burst),
+        "RATE_LIMIT_TOKENS_PER_MINUTE": str(args.tokens_per_minute),
+        "RATE_LIMIT_BACKEND": args.backend,
+        "RATE_LIMIT_DB_PATH": os.path.join(workdir, "rate_limit.db"),
+        "LOG_LEVEL": "WARNING",
+    })
+    import httpx
+    import api
+    import metrics
+    from questionnaire import iter_answer_sets
+
+    answer_sets = iter_answer_sets()
+    results = {kind: {"ok": 0, "rejected": 0, "errors": 0, "latency": [], "retry_after": []}
+               for kind in ("noisy", "quiet")}
+    tokens_before = sum(metrics.LLM_TOKENS.value(backend="fake", kind=kind) for kind in ("prompt", "completion"))
+
+    await api.app.router.startup()
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        deadline = time.monotonic() + args.seconds
+        loops = [client_loop(client, "noisy", "noisy", 1 / args.noisy_rps, deadline, answer_sets, results)]
+        loops += [client_loop(client, "quiet", f"quiet-{index}", 2.0, deadline, answer_sets, results)
+                  for index in range(args.quiet)]
+        start = time.monotonic()
+        await asyncio.gather(*loops)
+        elapsed = time.monotonic() - start
+        limiter = (await client.get("/api/stats")).json()["rate_limit"]
+    await api.app.router.shutdown()
+
+    tokens = sum(metrics.LLM_TOKENS.value(backend="fake", kind=kind) for kind in ("prompt", "completion"))
+    setting = "disabled" if args.disabled else (
+        f"{args.requests_per_minute:g}/min per client, burst {args.burst:g}, "
+        f"{args.tokens_per_minute:g} tokens/min, {args.backend} backend")
+    print(f"{args.seconds:g}s, noisy client at {args.noisy_rps:g} req/s, {args.quiet} quiet clients at 0.5 req/s")
+    print(f"Admission control: {setting}\n")
+    print(f"{'client':<8} {'ok':>6} {'429':>6} {'errors':>7} {'p50 ms':>8} {'retry-after':>12}")
+    for kind, stats in results.items():
+        p50 = statistics.median(stats["latency"]) * 1000 if stats["latency"] else 0.0
+        retry = f"{statistics.mean(stats['retry_after']):.1f}s" if stats["retry_after"] else "-"
+        print(f"{kind:<8} {stats['ok']:>6} {stats['rejected']:>6} {stats['errors']:>7} {p50:>8.0f} {retry:>12}")
+    print(f"\nLLM tokens spent: {(tokens - tokens_before) / elapsed * 60:,.0f} per minute")
+    if limiter is not None:
+        print(f"Limiter: {limiter['admitted']} admitted, {limiter['queued']} queued "
+              f"(avg wait {limiter['average_wait_seconds'] * 1000:.0f} ms), rejected {limiter['rejected']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Compares LLM routing strategies over fake providers with long-tailed latency.
+
+Runs the same request mix through a single backend, through the router
+without hedging, and through the router with hedging, then reports p50/p95/
+p99 latency, hedges fired and the calls each backend received. One backend
+can be made flaky to exercise failover and the circuit breaker.
+
+Usage:
+    python benchmarks/bench_router.py --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from fake_llm import FakeProvider
+from llm_router import LLMRouter
+
+MESSAGES = [{"role": "user", "content": "Analyze this career assessment."}]
+
+
+def make_providers(args):
+    return [
+        FakeProvider("primary", latency_median=args.latency, latency_sigma=args.sigma, seed=1),
+        FakeProvider("secondary", latency_median=args.latency * 1.2, latency_sigma=args.sigma, seed=2),
+        FakeProvider("flaky", latency_median=args.latency, latency_sigma=args.sigma,
+                     error_rate=args.flaky_error_rate, seed=3),
+    ]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(router, requests, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            try:
+                await router.complete(MESSAGES, max_tokens=100)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LLM router benchmark")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="Median fake latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.8, help="Log-normal sigma (tail heaviness)")
+    parser.add_argument("--flaky-error-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    config.LLM_HEDGE_MIN_DELAY = 0.0
+    scenarios = [("single backend", False, 1), ("router", False, None), ("router + hedging", True, None)]
+    print(f"{'scenario':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'hedges':>7}  calls")
+    for label, hedge, count in scenarios:
+        config.LLM_HEDGE_ENABLED = hedge
+        providers = make_providers(args)[:count]
+        router = LLMRouter(providers)
+        latencies, errors = await run(router, args.requests, args.concurrency)
+        calls = ", ".join(f"{provider.name}={provider.calls}" for provider in providers)
+        print(f"{label:<18} {percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 95) * 1000:8.1f} "
+              f"{percentile(latencies, 99) * 1000:8.1f} {errors:7d} {router.hedges:7d}  {calls}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Startup-time benchmark for the CLI and API entry points.
+
+Imports each entry point in a fresh interpreter under `python -X importtime`,
+takes the median cumulative import time over several runs, and lists the
+slowest direct imports. Fails (exit code 1) when an entry point exceeds its
+budget or eagerly loads an SDK it should only import on first use.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --budget main=50 --budget api=1000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budgets in milliseconds. FastAPI and pydantic dominate the API.
+BUDGETS_MS = {"main": 100, "api": 1500}
+
+# SDKs each entry point must not import until they are used
+LAZY_MODULES = {
+    "main": ["openai", "httpx", "rich", "numpy", "boto3", "botocore"],
+    "api": ["openai", "boto3", "botocore"],
+}
+
+
+def parse_importtime(stderr):
+    """
+    Returns [(depth, cumulative_us, module)] from -X importtime output.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(parts[1]), name.strip()))
+    return rows
+
+
+def measure(module):
+    """
+    Imports module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time in ms, rows imported by module, loaded lazy modules)
+    """
+    check = f"import sys; print(','.join(m for m in {LAZY_MODULES[module]!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; {check}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    # Children are listed before their parent, back to the previous top-level row
+    end = max(index for index, (depth, _, name) in enumerate(rows) if depth == 0 and name == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return rows[end][1] / 1000, rows[start:end], loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports to list")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override a budget, e.g. api=1000")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+
+    failed = False
+    for module, budget in budgets.items():
+        samples = []
+        for _ in range(args.runs):
+            total_ms, rows, loaded = measure(module)
+            samples.append(total_ms)
+        median = statistics.median(samples)
+        status = "ok" if median <= budget else "OVER BUDGET"
+        print(f"{module}: {median:.1f} ms median over {args.runs} runs (budget {budget:g} ms) {status}")
+        direct = sorted(((cumulative, name) for depth, cumulative, name in rows if depth == 1), reverse=True)
+        for cumulative, name in direct[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        if loaded:
+            print(f"    eagerly imported: {', '.join(loaded)}")
+        failed |= median > budget or bool(loaded)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
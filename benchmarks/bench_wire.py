@@ -0,0 +1,103 @@
+"""
+Measures bytes on the wire per assessment.
+
+Runs one assessment flow against api.app in-process (fake LLM provider and
+fake Polly), under different wire settings, and counts the response body
+bytes as sent:
+
+    POST /api/analyze                      the analysis itself
+    GET  /api/assessments/{id}             results page load
+    GET  /api/assessments/{id}             results page revisit
+    GET  /api/tts for every question       question audio
+
+"before" is identity encoding, base64 audio in JSON and no revalidation,
+which is what the API sent before compression and ETags. The other rows
+add gzip/brotli, raw MP3 audio, and If-None-Match revalidation.
+
+Usage:
+    python benchmarks/bench_wire.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS = [
+    # label, Accept-Encoding, audio format, revalidate, analysis-only results page
+    ("before (identity, base64)", "identity", "base64", False, False),
+    ("gzip", "gzip", "base64", False, False),
+    ("gzip + raw mp3", "gzip", "mp3", False, False),
+    ("gzip + raw mp3 + etag", "gzip", "mp3", True, True),
+    ("br + raw mp3 + etag", "br, gzip", "mp3", True, True),
+]
+
+
+async def measure(client, answers, questions, accept_encoding, audio_format, revalidate, analysis_only):
+    headers = {"Accept-Encoding": accept_encoding}
+    counts = {}
+
+    response = await client.post("/api/analyze", json={"answers": answers}, headers=headers)
+    response.raise_for_status()
+    counts["analyze"] = response.num_bytes_downloaded
+    assessment_id = response.json()["assessment_id"]
+
+    params = {"fields": "analysis"} if analysis_only else {}
+    url = f"/api/assessments/{assessment_id}"
+    first = await client.get(url, params=params, headers=headers)
+    counts["results"] = first.num_bytes_downloaded
+    revisit_headers = dict(headers)
+    if revalidate:
+        revisit_headers["If-None-Match"] = first.headers["etag"]
+    second = await client.get(url, params=params, headers=revisit_headers)
+    counts["revisit"] = second.num_bytes_downloaded
+
+    counts["audio"] = 0
+    for question in questions:
+        audio = await client.get("/api/tts", params={"text": question, "format": audio_format}, headers=headers)
+        audio.raise_for_status()
+        counts["audio"] += audio.num_bytes_downloaded
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+async def main():
+    workdir = tempfile.mkdtemp(prefix="bench-wire-")
+    os.environ.update({
+        "LLM_PROVIDERS": '[{"name": "fake", "type": "fake", "latency_median": 0.01, "latency_sigma": 0}]',
+        "CACHE_DB_PATH": "",
+        "RESULT_STORE_PATH": os.path.join(workdir, "assessments.db"),
+        "TTS_BACKEND": "fake",
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+        "TTS_PRESYNTHESIZE_ON_STARTUP": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+    import api
+    import compression
+    from questionnaire import get_questionnaire, iter_answer_sets
+
+    questions = [question.text for question in get_questionnaire().questions]
+    answer_sets = iter_answer_sets()
+    await api.app.router.startup()
+    transport = httpx.ASGITransport(app=api.app)
+    print(f"{'setting':<28} {'analyze':>8} {'results':>8} {'revisit':>8} {'audio':>9} {'total':>9}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = None
+        for label, accept_encoding, audio_format, revalidate, analysis_only in SETTINGS:
+            if accept_encoding.startswith("br") and compression.brotli is None:
+                print(f"{label:<28} skipped: install the optional brotli package")
+                continue
+            answers = [{"question": question, "answer": answer} for question, answer in next(answer_sets).items()]
+            counts = await measure(client, answers, questions, accept_encoding, audio_format, revalidate, analysis_only)
+            baseline = baseline or counts["total"]
+            saved = (1 - counts["total"] / baseline) * 100
+            print(f"{label:<28} {counts['analyze']:>8} {counts['results']:>8} {counts['revisit']:>8} "
+                  f"{counts['audio']:>9} {counts['total']:>9}  ({saved:+.1f}% saved)")
+    await api.app.router.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
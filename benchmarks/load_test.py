@@ -0,0 +1,99 @@
+"""
+Load test for /api/analyze against the stub LLM server.
+
+Starts the stub server and the API (pointed at the stub through
+OPENAI_BASE_URL) as subprocesses, then fires batches of concurrent requests
+and reports requests per second at each concurrency level. With a
+non-blocking LLM path throughput should grow roughly linearly with
+concurrency until LLM_MAX_CONCURRENCY is reached.
+
+Usage:
+    python benchmarks/load_test.py --levels 1 2 4 8 16 32 --latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_REQUEST = {
+    "answers": [
+        {"question": "What is your level of technical/professional expertise?",
+         "answer": "Intermediate - Can apply knowledge in practical situations"},
+        {"question": "How do you prefer to work?",
+         "answer": "In small teams - I like collaboration but prefer small groups"}
+    ]
+}
+
+
+def start_process(args, env=None):
+    return subprocess.Popen([sys.executable] + args, cwd=ROOT, env=env)
+
+
+async def wait_until_up(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def run_level(client, url, concurrency, rounds):
+    async def one():
+        response = await client.post(url, json=SAMPLE_REQUEST)
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return concurrency * rounds / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test /api/analyze")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--stub-port", type=int, default=9000)
+    parser.add_argument("--api-port", type=int, default=8001)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["STUB_LLM_LATENCY"] = str(args.latency)
+    env["OPENAI_API_KEY"] = "stub"
+    env["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}/v1"
+    # All load comes from one address; measure throughput, not the limiter
+    env["RATE_LIMIT_ENABLED"] = "false"
+
+    stub = start_process(["benchmarks/stub_llm_server.py", "--port", str(args.stub_port)], env)
+    api = start_process(["-m", "uvicorn", "api:app", "--port", str(args.api_port),
+                         "--log-level", "warning"], env)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.stub_port}/stats")
+        await wait_until_up(f"http://127.0.0.1:{args.api_port}/")
+
+        url = f"http://127.0.0.1:{args.api_port}/api/analyze"
+        limits = httpx.Limits(max_connections=max(args.levels))
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            print(f"{'concurrency':>12} {'req/s':>10}")
+            for level in args.levels:
+                rps = await run_level(client, url, level, args.rounds)
+                print(f"{level:>12} {rps:>10.2f}")
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Checks that identical concurrent analyses cause exactly one upstream call.
+
+Starts the stub LLM server, fires N simultaneous /api/analyze requests with
+the same answers at the in-process API, and compares the number of requests
+the stub received with the single-flight counters. Exits non-zero on
+failure.
+
+Usage:
+    python benchmarks/singleflight_check.py --requests 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Single-flight concurrency check")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--stub-port", type=int, default=9001)
+    args = parser.parse_args()
+
+    env = dict(os.environ, STUB_LLM_LATENCY="0.5")
+    stub = subprocess.Popen([sys.executable, "benchmarks/stub_llm_server.py", "--port", str(args.stub_port)],
+                            cwd=ROOT, env=env)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}/v1"
+    os.environ["RESULT_STORE_PATH"] = ":memory:"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    try:
+        stats_url = f"http://127.0.0.1:{args.stub_port}/stats"
+        async with httpx.AsyncClient() as client:
+            deadline = time.monotonic() + 15
+            while True:
+                try:
+                    before = (await client.get(stats_url)).json()["requests"]
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise
+                    await asyncio.sleep(0.1)
+
+        import api
+        from singleflight import get_singleflight
+
+        body = {"answers": [{"question": "How do you prefer to work?",
+                             "answer": f"Independently - check {time.time()}"}]}
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+            responses = await asyncio.gather(*(
+                client.post("/api/analyze", json=body) for _ in range(args.requests)
+            ))
+            upstream = (await httpx.AsyncClient().get(stats_url)).json()["requests"] - before
+
+        ok = all(response.status_code == 200 for response in responses) and upstream == 1
+        print(f"requests={args.requests} upstream_calls={upstream} singleflight={get_singleflight().stats()}")
+        print("PASS" if ok else "FAIL")
+        return 0 if ok else 1
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,126 @@
+"""
+Minimal stand-in for the OpenAI chat completions API.
+
+Replies to POST /v1/chat/completions with a canned career analysis, so the
+API can be load tested without network access or cost. Each request waits
+for a time to first token drawn from a log-normal distribution around
+STUB_LLM_LATENCY, then for the completion tokens at STUB_LLM_TOKENS_PER_SECOND
+(0 means instantly). Streaming requests receive the same content as
+server-sent event chunks paced at that token rate. A fraction
+STUB_LLM_ERROR_RATE of requests fail with HTTP 500.
+
+Usage:
+    STUB_LLM_LATENCY=2.0 python benchmarks/stub_llm_server.py --port 9000
+    python benchmarks/stub_llm_server.py --latency 0.5 --latency-sigma 0.4 --tokens-per-second 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import SAMPLE_ANALYSIS
+
+settings = {
+    "latency": float(os.getenv("STUB_LLM_LATENCY", "1.0")),
+    "latency_sigma": float(os.getenv("STUB_LLM_LATENCY_SIGMA", "0")),
+    "tokens_per_second": float(os.getenv("STUB_LLM_TOKENS_PER_SECOND", "0")),
+    "error_rate": float(os.getenv("STUB_LLM_ERROR_RATE", "0")),
+}
+STREAM_CHUNK_CHARS = 16
+CHARS_PER_TOKEN = 4
+
+app = FastAPI()
+stats = {"requests": 0, "errors": 0}
+
+
+def sample_latency():
+    if settings["latency_sigma"] <= 0:
+        return settings["latency"]
+    return settings["latency"] * random.lognormvariate(0, settings["latency_sigma"])
+
+
+def generation_seconds(text):
+    if settings["tokens_per_second"] <= 0:
+        return 0.0
+    return len(text) / CHARS_PER_TOKEN / settings["tokens_per_second"]
+
+
+async def stream_chunks(completion_id, model, content):
+    await asyncio.sleep(sample_latency())
+    pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+    for piece in pieces:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(generation_seconds(piece))
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    stats["requests"] += 1
+    if random.random() < settings["error_rate"]:
+        stats["errors"] += 1
+        await asyncio.sleep(sample_latency())
+        return JSONResponse(status_code=500, content={"error": {"message": "Simulated upstream failure"}})
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_chunks(f"chatcmpl-stub-{stats['requests']}", body.get("model", "stub"),
+                          json.dumps(SAMPLE_ANALYSIS, indent=4)),
+            media_type="text/event-stream"
+        )
+    content = json.dumps(SAMPLE_ANALYSIS)
+    await asyncio.sleep(sample_latency() + generation_seconds(content))
+    prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // CHARS_PER_TOKEN
+    completion_tokens = len(content) // CHARS_PER_TOKEN
+    return {
+        "id": f"chatcmpl-stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "settings": settings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, help="Median time to first token in seconds")
+    parser.add_argument("--latency-sigma", type=float, help="Log-normal sigma of the latency (0 = fixed)")
+    parser.add_argument("--tokens-per-second", type=float, help="Completion token rate (0 = instant)")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests that fail with HTTP 500")
+    args = parser.parse_args()
+    for name in settings:
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
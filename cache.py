@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import config
+from questionnaire import answer_pairs
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_answers(answers):
+    """
+    Converts answers into a canonical, order-independent list of pairs.
+
+    Args:
+        answers: A dict of question -> answer, or an iterable of objects/dicts
+            with "question" and "answer" fields
+
+    Returns:
+        list: Sorted [question, answer] pairs with whitespace collapsed
+    """
+    return sorted(
+        [" ".join(str(question).split()), " ".join(str(answer).split())]
+        for question, answer in answer_pairs(answers)
+    )
+
+
+def answer_hash(answers):
+    """
+    Returns a stable SHA-256 hex digest of a normalized answer set.
+    """
+    payload = json.dumps(normalize_answers(answers), separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def result_hash(analysis):
+    """
+    Returns a stable SHA-256 hex digest of an analysis, e.g. for ETags.
+    """
+    payload = json.dumps(analysis, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def configured_models():
+    """
+    Returns the models of every configured LLM backend, as one string.
+
+    The router may send any request to any backend, so a cached analysis is
+    keyed on all of them; changing a backend's model never serves analyses
+    written by the old one.
+    """
+    return ",".join(sorted({spec.get("model", config.OPENAI_MODEL) for spec in config.LLM_PROVIDERS}))
+
+
+def make_cache_key(answers, model=None, prompt_version=None, temperature=None):
+    """
+    Builds the content-addressed cache key for an analysis request.
+
+    Args:
+        answers: The assessment answers (see normalize_answers)
+        model (str): Model name (default: configured_models())
+        prompt_version (str): Prompt version (default: config.PROMPT_VERSION)
+        temperature (float): Sampling temperature (default: config.ANALYSIS_TEMPERATURE)
+
+    Returns:
+        str: SHA-256 hex digest identifying the request
+    """
+    payload = json.dumps({
+        "answers": normalize_answers(answers),
+        "model": model or configured_models(),
+        "prompt_version": prompt_version or config.PROMPT_VERSION,
+        "temperature": config.ANALYSIS_TEMPERATURE if temperature is None else temperature,
+    }, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteTier:
+    """
+    On-disk cache tier storing zlib-compressed JSON in a single SQLite table.
+
+    set() only enqueues the entry; a background thread compresses and writes
+    queued entries in batches, like the result store, and get() serves them
+    from memory until they are written. Reads use their own connection, so
+    they never wait for a write to commit.
+    """
+
+    BATCH_SIZE = 100
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer", daemon=True)
+        self._writer.start()
+
+    def get(self, key):
+        with self._pending_lock:
+            entry = self._pending.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            return value if expires_at is None or expires_at >= time.time() else None
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return json.loads(zlib.decompress(blob))
+
+    def set(self, key, value, expires_at=None):
+        with self._pending_lock:
+            self._pending[key] = (value, expires_at)
+        self._queue.put((key, value, expires_at))
+
+    def flush(self):
+        """
+        Blocks until every entry set so far has been written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Writes outstanding entries and stops the writer thread.
+        """
+        self._queue.put(None)
+        self._writer.join()
+        self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                if entries:
+                    self._write_batch(entries)
+            except sqlite3.Error as error:
+                logger.error("Failed to write %d cache entries: %s", len(entries), error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, entries):
+        rows = [
+            (key, zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")), expires_at)
+            for key, value, expires_at in entries
+        ]
+        self._conn.executemany("INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)", rows)
+        self._conn.commit()
+        with self._pending_lock:
+            for key, value, expires_at in entries:
+                # A newer set() for the same key stays pending until it is written
+                if self._pending.get(key) == (value, expires_at):
+                    del self._pending[key]
+
+
+class ResultCache:
+    """
+    Two-tier cache for generated analyses.
+
+    Lookups hit an in-memory LRU with TTL first and fall back to the optional
+    SQLite tier; disk hits are promoted back into memory. Cached analyses are
+    shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None, db_path=None):
+        self.max_entries = config.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = config.CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SQLiteTier(db_path) if db_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached analysis for key, or None on a miss.
+
+        Reads the disk tier on the calling thread; coroutines use aget().
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._disk_result(key, self._disk.get(key) if self._disk is not None else None)
+
+    async def aget(self, key):
+        """
+        Like get(), but reads the disk tier on a worker thread so the event
+        loop never waits on SQLite or decompression.
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        disk_value = None
+        if self._disk is not None:
+            disk_value = await asyncio.get_running_loop().run_in_executor(None, self._disk.get, key)
+        return self._disk_result(key, disk_value)
+
+    def _memory_get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at >= now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+        return None
+
+    def _disk_result(self, key, value):
+        if value is not None:
+            self._remember(key, value)
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, persist=True, expires=True):
+        """
+        Stores an analysis in memory and, when enabled, queues it for the
+        disk tier (see flush()).
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value (dict): The analysis to cache
+            persist (bool): Whether to also write the on-disk tier
+            expires (bool): Whether the on-disk entry expires after the TTL
+        """
+        self._remember(key, value)
+        if persist and self._disk is not None:
+            self._disk.set(key, value, time.time() + self.ttl_seconds if expires else None)
+
+    def contains(self, key):
+        """
+        Returns True if key is cached, without touching the hit/miss counters.
+        """
+        return self._in_memory(key) or (self._disk is not None and self._disk.get(key) is not None)
+
+    async def acontains(self, key):
+        """
+        Like contains(), but reads the disk tier on a worker thread.
+        """
+        if self._in_memory(key):
+            return True
+        if self._disk is None:
+            return False
+        return await asyncio.get_running_loop().run_in_executor(None, self._disk.get, key) is not None
+
+    def _in_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            return entry is not None and entry[1] >= time.monotonic()
+
+    def flush(self):
+        """
+        Blocks until queued disk writes have been written.
+        """
+        if self._disk is not None:
+            self._disk.flush()
+
+    def close(self):
+        """
+        Writes queued entries and closes the disk tier.
+        """
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current memory tier size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "disk_enabled": self._disk is not None,
+            }
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    """
+    Returns the process-wide result cache configured from config.py.
+    """
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(db_path=config.CACHE_DB_PATH)
+    return _result_cache
+
+
+def close_result_cache():
+    global _result_cache
+    if _result_cache is not None:
+        _result_cache.close()
+    _result_cache = None
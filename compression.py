@@ -0,0 +1,152 @@
+import zlib
+import config
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Media types worth compressing; audio and images are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def _accepted_encodings(header):
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """
+    Returns "br", "gzip" or None for an Accept-Encoding header value.
+    """
+    accepted = _accepted_encodings(accept_encoding or "")
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = None
+    best_quality = 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """
+    Incremental gzip or brotli compressor.
+
+    Every chunk is flushed, so streamed NDJSON and SSE events reach the
+    client as soon as they are written instead of waiting for more output.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=config.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 16 + MAX_WBITS writes a gzip header and trailer
+            self._zlib = zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, final):
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with brotli or gzip, as
+    negotiated through Accept-Encoding.
+
+    Only compressible media types are touched, and single-message bodies
+    smaller than minimum_size are sent as is. Streaming responses are
+    compressed chunk by chunk without buffering. Strong ETags become weak,
+    since the compressed bytes differ from the identity representation.
+    """
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = config.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def compressing_send(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if start_message is not None:
+                # First body message: decide whether to compress
+                headers = [(name.lower(), value) for name, value in start_message["headers"]]
+                content_type = next((value for name, value in headers if name == b"content-type"), b"").decode("latin-1")
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                compressible = (
+                    content_type.startswith(COMPRESSIBLE_TYPES)
+                    and not any(name == b"content-encoding" for name, _ in headers)
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if compressible:
+                    compressor = _Compressor(encoding)
+                    headers = [
+                        (name, b"W/" + value if name == b"etag" and not value.startswith(b"W/") else value)
+                        for name, value in headers if name != b"content-length"
+                    ]
+                    headers.append((b"content-encoding", encoding.encode("latin-1")))
+                if content_type.startswith(COMPRESSIBLE_TYPES):
+                    headers.append((b"vary", b"Accept-Encoding"))
+                await send({**start_message, "headers": headers})
+                start_message = None
+
+            if compressor is None:
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(message.get("body", b""), final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, compressing_send)
+        if start_message is not None:
+            # Response ended without a body message
+            await send(start_message)
@@ -1,4 +1,6 @@
+import json
 import os
+from tempfile import gettempdir
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -6,6 +8,143 @@ load_dotenv()
 
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+# LLM request limits (per worker process)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# LLM routing (llm_router.py). LLM_PROVIDERS is a JSON list of backends, e.g.
+# [{"name": "primary", "type": "openai"},
+#  {"name": "backup", "type": "openai", "base_url": "...", "api_key_env": "BACKUP_API_KEY",
+#   "model": "...", "tokens_per_minute": 90000},
+#  {"name": "local", "type": "fake", "latency_median": 0.5, "error_rate": 0.05}]
+# When unset, the single OpenAI backend configured above is used.
+LLM_PROVIDERS = json.loads(os.getenv("LLM_PROVIDERS") or "[]") or [{"name": "openai", "type": "openai"}]
+LLM_ROUTER_WINDOW_SIZE = int(os.getenv("LLM_ROUTER_WINDOW_SIZE", "100"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+# Token prices in USD per 1K tokens, used for cost metrics. Backends in
+# LLM_PROVIDERS can override them with prompt_cost_per_1k/completion_cost_per_1k.
+LLM_PROMPT_COST_PER_1K = float(os.getenv("LLM_PROMPT_COST_PER_1K", "0.0005"))
+LLM_COMPLETION_COST_PER_1K = float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0.0015"))
+
+# Response compression (compression.py): brotli when the optional package is
+# installed and the client accepts it, else gzip
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "500"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Observability: Prometheus metrics endpoint and log verbosity
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Analysis generation settings (part of the result cache key)
+PROMPT_VERSION = "1"
+PROMPT_MODE = os.getenv("PROMPT_MODE", "full")  # "full" or "compact"
+ANALYSIS_TEMPERATURE = 0.7
+ANALYSIS_MAX_TOKENS = 2000
+
+# Targeted repair: sections missing from a response are re-requested alone,
+# each with its own completion budget
+REPAIR_MAX_ATTEMPTS = int(os.getenv("REPAIR_MAX_ATTEMPTS", "1"))
+REPAIR_SECTION_MAX_TOKENS = {
+    "profile_summary": 300,
+    "strengths": 300,
+    "areas_for_development": 300,
+    "recommended_paths": 1200
+}
+
+# Serve the rule-based analysis (rules.py) when the LLM call fails
+RULES_FALLBACK_ENABLED = os.getenv("RULES_FALLBACK_ENABLED", "true").lower() == "true"
+
+# Result cache: in-memory LRU tier plus an optional SQLite tier
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH") or None
+
+# Near-duplicate reuse (nearest.py). Distances count the questions answered
+# differently, weighted by their impact (an average question counts 1).
+# Within NEAREST_SERVE_DISTANCE the nearest earlier analysis is returned as
+# is (0 disables serving); within NEAREST_SEED_DISTANCE the model adapts it
+# with a NEAREST_SEED_MAX_TOKENS completion budget instead of writing a new one.
+NEAREST_ENABLED = os.getenv("NEAREST_ENABLED", "false").lower() == "true"
+NEAREST_SERVE_DISTANCE = float(os.getenv("NEAREST_SERVE_DISTANCE", "0"))
+NEAREST_SEED_DISTANCE = float(os.getenv("NEAREST_SEED_DISTANCE", "1.0"))
+NEAREST_SEED_MAX_TOKENS = int(os.getenv("NEAREST_SEED_MAX_TOKENS", "600"))
+NEAREST_MAX_ENTRIES = int(os.getenv("NEAREST_MAX_ENTRIES", "50000"))
+
+# Job mode for /api/analyze
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "16"))
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "500"))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "10000"))
+# Highest priority a client may ask for (0 is the default)
+JOB_MAX_PRIORITY = int(os.getenv("JOB_MAX_PRIORITY", "10"))
+
+# Admission control for LLM-backed endpoints (rate_limit.py): a token bucket
+# of RATE_LIMIT_BURST requests per client refilled at RATE_LIMIT_REQUESTS_PER_MINUTE,
+# and a shared budget of RATE_LIMIT_TOKENS_PER_MINUTE estimated LLM tokens.
+# Requests that fit within RATE_LIMIT_MAX_WAIT_SECONDS wait, the rest get a
+# 429 with Retry-After. 0 disables a limit. The "sqlite" backend shares the
+# buckets between the worker processes on a host.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_REQUESTS_PER_MINUTE = float(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_TOKENS_PER_MINUTE = float(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "90000"))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "2"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "sqlite"
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", os.path.join(gettempdir(), "career_assessment_rate_limit.db"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Clients are identified by this header when sent, else by address
+RATE_LIMIT_API_KEY_HEADER = os.getenv("RATE_LIMIT_API_KEY_HEADER", "X-API-Key")
+# Only enable behind a proxy that sets X-Forwarded-For
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+# Batch analysis (POST /api/analyze/batch and main.py --batch)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Assessment result store
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "assessments.db")
+RESULT_STORE_BATCH_SIZE = int(os.getenv("RESULT_STORE_BATCH_SIZE", "100"))
+RESULT_STORE_FLUSH_SECONDS = float(os.getenv("RESULT_STORE_FLUSH_SECONDS", "0.5"))
+
+# Text-to-speech settings
+TTS_BACKEND = os.getenv("TTS_BACKEND", "polly")  # "polly" or "fake"
+TTS_DEFAULT_VOICE = os.getenv("TTS_DEFAULT_VOICE", "Joanna")
+TTS_ENGINE = os.getenv("TTS_ENGINE", "neural")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or os.path.join(gettempdir(), "career_assessment_tts")
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "8"))
+TTS_CHUNK_BYTES = 16 * 1024
+
+# Static question audio written by presynthesize.py and served at /audio
+TTS_STATIC_DIR = os.getenv("TTS_STATIC_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "frontend", "public", "audio"
+)
+TTS_PRESYNTHESIZE_ON_STARTUP = os.getenv("TTS_PRESYNTHESIZE_ON_STARTUP", "false").lower() == "true"
+
+# Question bank file (.json or .jsonl, see questionnaire.load_question_bank)
+# used instead of ASSESSMENT_CATEGORIES and CAREER_PATH_AFFINITIES below
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH") or None
+
+# Adaptive questioning (adaptive.py): ask the most informative question next
+# and stop once one career path is this likely
+ADAPTIVE_CONFIDENCE_THRESHOLD = float(os.getenv("ADAPTIVE_CONFIDENCE_THRESHOLD", "0.8"))
+ADAPTIVE_MIN_QUESTIONS = int(os.getenv("ADAPTIVE_MIN_QUESTIONS", "3"))
+ADAPTIVE_MAX_QUESTIONS = int(os.getenv("ADAPTIVE_MAX_QUESTIONS", "0"))  # 0 = no limit
+ADAPTIVE_MIN_GAIN = float(os.getenv("ADAPTIVE_MIN_GAIN", "0.01"))  # bits
+# How strongly affinity weights separate paths in the answer likelihood
+ADAPTIVE_SHARPNESS = float(os.getenv("ADAPTIVE_SHARPNESS", "3.0"))
+ADAPTIVE_SESSION_TTL_SECONDS = float(os.getenv("ADAPTIVE_SESSION_TTL_SECONDS", "3600"))
+ADAPTIVE_MAX_SESSIONS = int(os.getenv("ADAPTIVE_MAX_SESSIONS", "10000"))
 
 # Assessment Questions by Category
 ASSESSMENT_CATEGORIES = {
@@ -64,14 +203,14 @@ ASSESSMENT_CATEGORIES = {
                     "2": "Hands-on learning - I learn best by doing and experimenting",
                     "3": "Mixed approach - I combine different learning methods"
                 }
-            }
+            },
             {
                 "question": "Would you prefer to start a new skill or grow an existing skill?",
                 "options": {
                     "1": "New Skill - I want to learn something new",
                     "2": "Grow an Existing Skill - I want to improve my existing skills"
                 }
-            },
+            }
         ]
     },
     "career_goals": {
@@ -126,21 +265,79 @@ CAREER_PATHS = {
     "software_development": {
         "title": "Software Development",
         "description": "Focus on building and maintaining software applications",
-        "skills": ["Programming", "Problem Solving", "System Design"]
+        "skills": ["Programming", "Problem Solving", "System Design"],
+        "learning_resources": ["CS50 (free, Harvard/edX)", "The Pragmatic Programmer (book)", "freeCodeCamp projects"]
     },
     "data_science": {
         "title": "Data Science",
         "description": "Analyze and interpret complex data sets",
-        "skills": ["Statistics", "Machine Learning", "Data Analysis"]
+        "skills": ["Statistics", "Machine Learning", "Data Analysis"],
+        "learning_resources": ["Kaggle Learn (free)", "Andrew Ng's Machine Learning Specialization (Coursera)", "Python for Data Analysis (book)"]
     },
     "product_management": {
         "title": "Product Management",
         "description": "Lead product development and strategy",
-        "skills": ["Communication", "Strategic Thinking", "User Research"]
+        "skills": ["Communication", "Strategic Thinking", "User Research"],
+        "learning_resources": ["Inspired by Marty Cagan (book)", "Product School webinars (free)", "Google Project Management Certificate (Coursera)"]
     },
     "cybersecurity": {
         "title": "Cybersecurity",
         "description": "Protect systems and data from threats",
-        "skills": ["Security", "Networking", "Risk Assessment"]
+        "skills": ["Security", "Networking", "Risk Assessment"],
+        "learning_resources": ["TryHackMe learning paths", "CompTIA Security+ study guide", "OWASP Top 10 (free)"]
+    }
+}
+
+# How strongly each answer points towards each career path, used by the
+# rule-based scoring in rules.py. Keyed by question, then option number.
+CAREER_PATH_AFFINITIES = {
+    "What is your level of technical/professional expertise?": {
+        "1": {"software_development": 0.5, "data_science": 0.2, "product_management": 0.5, "cybersecurity": 0.2},
+        "2": {"software_development": 1.0, "data_science": 0.8, "product_management": 0.6, "cybersecurity": 0.8},
+        "3": {"software_development": 1.0, "data_science": 1.2, "product_management": 0.4, "cybersecurity": 1.2}
+    },
+    "How would you rate your problem-solving abilities?": {
+        "1": {"software_development": 0.2, "product_management": 0.4},
+        "2": {"software_development": 1.0, "data_science": 0.8, "cybersecurity": 0.8},
+        "3": {"software_development": 1.0, "data_science": 1.2, "cybersecurity": 1.0}
+    },
+    "What is your experience with professional tools and software?": {
+        "1": {"product_management": 0.5},
+        "2": {"software_development": 0.8, "data_science": 0.8, "cybersecurity": 0.6},
+        "3": {"software_development": 1.0, "data_science": 1.0, "cybersecurity": 1.2}
+    },
+    "How do you prefer to work?": {
+        "1": {"software_development": 0.8, "data_science": 1.0, "cybersecurity": 0.8},
+        "2": {"software_development": 1.0, "data_science": 0.6, "product_management": 0.6, "cybersecurity": 0.6},
+        "3": {"software_development": 0.4, "product_management": 1.2}
+    },
+    "How do you handle deadlines and pressure?": {
+        "1": {"software_development": 0.4, "data_science": 0.6},
+        "2": {"software_development": 0.6, "product_management": 0.6},
+        "3": {"product_management": 1.0, "cybersecurity": 1.0}
+    },
+    "What is your preferred learning style?": {
+        "1": {"data_science": 0.8, "cybersecurity": 0.8},
+        "2": {"software_development": 1.0, "cybersecurity": 0.6},
+        "3": {"data_science": 0.4, "product_management": 0.6}
+    },
+    "Would you prefer to start a new skill or grow an existing skill?": {
+        "1": {"data_science": 0.6, "cybersecurity": 0.6},
+        "2": {"software_development": 0.6, "product_management": 0.4}
+    },
+    "What type of work environment interests you most?": {
+        "1": {"data_science": 0.6, "product_management": 0.4, "cybersecurity": 1.0},
+        "2": {"software_development": 1.0, "data_science": 0.6, "product_management": 0.8},
+        "3": {"software_development": 0.6, "product_management": 1.2}
+    },
+    "What role do you see yourself in?": {
+        "1": {"software_development": 1.0, "data_science": 1.0, "cybersecurity": 1.0},
+        "2": {"software_development": 0.6, "product_management": 0.8},
+        "3": {"product_management": 1.4}
+    },
+    "What is your primary career goal?": {
+        "1": {"software_development": 0.8, "data_science": 1.0, "cybersecurity": 1.0},
+        "2": {"product_management": 1.2},
+        "3": {"software_development": 1.0, "data_science": 0.8, "product_management": 0.8}
     }
 } 
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from llm_router import Provider
+
+SAMPLE_ANALYSIS = {
+    "profile_summary": "A motivated graduate with solid problem-solving skills.",
+    "strengths": ["Problem solving", "Collaboration"],
+    "areas_for_development": ["Public speaking"],
+    "recommended_paths": [
+        {
+            "title": "Software Development",
+            "description": "Matches the stated interest in building things.",
+            "required_skills": ["Programming", "System Design"],
+            "learning_resources": ["CS50", "The Pragmatic Programmer"],
+            "next_steps": ["Build a portfolio project"]
+        }
+    ]
+}
+
+
+class FakeProviderError(Exception):
+    """
+    Simulated upstream failure raised by FakeProvider.
+    """
+
+
+class FakeProvider(Provider):
+    """
+    Offline LLM provider with a configurable latency distribution.
+
+    Latency is drawn from a log-normal distribution around latency_median,
+    so a long tail can be simulated for hedging and ranking experiments.
+    Every request returns SAMPLE_ANALYSIS unless content is given.
+    """
+
+    def __init__(self, name="fake", latency_median=0.5, latency_sigma=0.3, error_rate=0.0,
+                 tokens_per_second=200, content=None, seed=None, **kwargs):
+        super().__init__(name, "fake-model", **kwargs)
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self.content = content or json.dumps(SAMPLE_ANALYSIS)
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def sample_latency(self):
+        if self.latency_sigma <= 0:
+            return self.latency_median
+        return self.latency_median * self._random.lognormvariate(0, self.latency_sigma)
+
+    def _maybe_fail(self):
+        if self._random.random() < self.error_rate:
+            raise FakeProviderError(f"Simulated failure from {self.name}")
+
+    async def complete(self, messages, timeout=None, **kwargs):
+        from openai.types.chat import ChatCompletion
+        self.calls += 1
+        await asyncio.sleep(self.sample_latency())
+        self._maybe_fail()
+        prompt_tokens = sum(len(message["content"]) // 4 for message in messages)
+        # Like a real model, stop at max_tokens and report the cut-off
+        content = self.content
+        max_tokens = kwargs.get("max_tokens")
+        finish_reason = "stop"
+        if max_tokens and len(content) // 4 > max_tokens:
+            content = content[:max_tokens * 4]
+            finish_reason = "length"
+        completion_tokens = len(content) // 4
+        return ChatCompletion.model_validate({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    async def stream(self, messages, timeout=None, **kwargs):
+        self.calls += 1
+        # The sampled latency is time to first token; the rest follows at tokens_per_second
+        await asyncio.sleep(self.sample_latency())
+        self._maybe_fail()
+        piece_chars = 16
+        delay = piece_chars / 4 / self.tokens_per_second
+        for start in range(0, len(self.content), piece_chars):
+            yield self.content[start:start + piece_chars]
+            await asyncio.sleep(delay)
@@ -0,0 +1,48 @@
+import hashlib
+import io
+import random
+import time
+
+
+class FakeAudioStream(io.BytesIO):
+    """
+    In-memory stand-in for the botocore StreamingBody returned by Polly.
+    """
+
+
+class FakePollyClient:
+    """
+    Offline stand-in for the boto3 Polly client.
+
+    Returns deterministic, incompressible MP3-framed bytes whose size grows
+    with the text length, after an optional delay, so TTS code paths can be
+    exercised and benchmarked without AWS credentials.
+    """
+
+    VOICES = [
+        {"Id": "Joanna", "Name": "Joanna", "Gender": "Female", "LanguageCode": "en-US"},
+        {"Id": "Matthew", "Name": "Matthew", "Gender": "Male", "LanguageCode": "en-US"},
+    ]
+
+    def __init__(self, latency_seconds=0.0, bytes_per_char=160):
+        self.latency_seconds = latency_seconds
+        self.bytes_per_char = bytes_per_char
+        self.calls = 0
+
+    def synthesize_speech(self, Text, OutputFormat="mp3", VoiceId="Joanna", Engine="neural", **kwargs):
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        seed = hashlib.sha256(f"{Engine}|{VoiceId}|{Text}".encode("utf-8")).digest()
+        size = max(len(Text), 1) * self.bytes_per_char
+        # Seeded random bytes: deterministic, and as incompressible as real MP3 frames
+        body = random.Random(seed).randbytes(size)
+        audio = b"ID3\x04\x00\x00\x00\x00\x00\x00" + body
+        return {
+            "AudioStream": FakeAudioStream(audio),
+            "ContentType": "audio/mpeg",
+            "RequestCharacters": len(Text),
+        }
+
+    def describe_voices(self, **kwargs):
+        return {"Voices": list(self.VOICES)}
@@ -9,7 +9,6 @@ import {
   CircularProgress,
 } from '@mui/material';
 import ArrowBackIosNewIcon from '@mui/icons-material/ArrowBackIosNew';
-import axios from 'axios';
 import ChatBot from '../components/ChatBot';
 
 // Questions for the assessment
@@ -47,11 +46,57 @@ function Assessment() {
   const navigate = useNavigate();
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [preview, setPreview] = useState({ profile_summary: null, strengths: [] });
+
+  // Reads the NDJSON stream and shows sections as soon as they are ready
+  const streamAnalysis = async (answers) => {
+    const response = await fetch('http://localhost:8000/api/analyze/stream', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ answers })
+    });
+    if (!response.ok) {
+      throw new Error(`Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.event === 'complete') {
+          return { ...event.analysis, assessment_id: event.assessment_id };
+        }
+        if (event.event === 'error') {
+          throw new Error(event.detail);
+        }
+        if (event.event === 'preview') {
+          // Rule-based preview, replaced as soon as the LLM sections arrive
+          setPreview({ profile_summary: event.analysis.profile_summary, strengths: [] });
+          continue;
+        }
+        if (event.section === 'profile_summary') {
+          setPreview((prev) => ({ ...prev, profile_summary: event.value }));
+        } else if (event.section === 'strengths') {
+          setPreview((prev) => ({ ...prev, strengths: [...prev.strengths, event.item] }));
+        }
+      }
+    }
+    throw new Error('Analysis stream ended unexpectedly');
+  };
 
   const handleComplete = async (chatAnswers) => {
     try {
       setLoading(true);
       setError(null);
+      setPreview({ profile_summary: null, strengths: [] });
 
       // Format answers for API
       const formattedAnswers = Object.entries(chatAnswers).map(([question, answer]) => ({
@@ -60,15 +105,13 @@ function Assessment() {
       }));
 
       // Send to backend
-      const response = await axios.post('http://localhost:8000/api/analyze', {
-        answers: formattedAnswers
-      });
+      const analysis = await streamAnalysis(formattedAnswers);
 
       // Store results in localStorage
-      localStorage.setItem('assessmentResults', JSON.stringify(response.data));
+      localStorage.setItem('assessmentResults', JSON.stringify(analysis));
       
-      // Navigate to results
-      navigate('/results');
+      // Navigate to results; the ID lets a reload fetch the stored report
+      navigate(`/results?id=${analysis.assessment_id}`);
     } catch (err) {
       setError('Failed to analyze answers. Please try again.');
       console.error('Error:', err);
@@ -120,6 +163,22 @@ function Assessment() {
               <CircularProgress size={24} />
             </Box>
           )}
+
+          {loading && preview.profile_summary && (
+            <Box sx={{ mt: 2 }}>
+              <Typography variant="subtitle2" sx={{ fontWeight: 600, mb: 1 }}>
+                Profile Summary
+              </Typography>
+              <Typography variant="body2" color="text.secondary">
+                {preview.profile_summary}
+              </Typography>
+              {preview.strengths.map((strength, index) => (
+                <Typography key={index} variant="body2" sx={{ mt: 0.5 }}>
+                  • {strength}
+                </Typography>
+              ))}
+            </Box>
+          )}
         </CardContent>
       </Card>
     </Box>
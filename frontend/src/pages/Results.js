@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { useNavigate } from 'react-router-dom';
+import { useNavigate, useSearchParams } from 'react-router-dom';
 import {
   Typography,
   Box,
@@ -34,22 +34,39 @@ function Results() {
   const [results, setResults] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [searchParams] = useSearchParams();
+  const assessmentId = searchParams.get('id');
 
   useEffect(() => {
-    try {
-      const storedResults = localStorage.getItem('assessmentResults');
-      if (storedResults) {
-        setResults(JSON.parse(storedResults));
-      } else {
-        setError('No assessment results found. Please take the assessment first.');
+    const loadResults = async () => {
+      try {
+        const storedResults = localStorage.getItem('assessmentResults');
+        const parsedResults = storedResults ? JSON.parse(storedResults) : null;
+        if (parsedResults && (!assessmentId || parsedResults.assessment_id === assessmentId)) {
+          setResults(parsedResults);
+        } else if (assessmentId) {
+          // Fetch the stored report instead of generating a new one. Only the
+          // analysis is needed; the browser revalidates it with its ETag.
+          const response = await fetch(`http://localhost:8000/api/assessments/${assessmentId}?fields=analysis`);
+          if (!response.ok) {
+            throw new Error(`Request failed with status ${response.status}`);
+          }
+          const record = await response.json();
+          const fetchedResults = { ...record.analysis, assessment_id: record.assessment_id };
+          localStorage.setItem('assessmentResults', JSON.stringify(fetchedResults));
+          setResults(fetchedResults);
+        } else {
+          setError('No assessment results found. Please take the assessment first.');
+        }
+      } catch (err) {
+        setError('Error loading results. Please try again.');
+        console.error('Error:', err);
+      } finally {
+        setLoading(false);
       }
-    } catch (err) {
-      setError('Error loading results. Please try again.');
-      console.error('Error:', err);
-    } finally {
-      setLoading(false);
-    }
-  }, []);
+    };
+    loadResults();
+  }, [assessmentId]);
 
   if (loading) {
     return (
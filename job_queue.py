@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+import config
+
+
+class QueueFull(Exception):
+    """
+    Raised when a job is submitted while the queue is at capacity.
+    """
+
+
+class Job:
+    """
+    A queued unit of work and its outcome.
+    """
+
+    def __init__(self, payload, priority=0, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class QueueBackend:
+    """
+    Storage and ordering for jobs.
+
+    Implementations must hand out jobs highest priority first (FIFO within
+    a priority) and raise QueueFull from put() when they cannot accept more.
+    Payloads and results are plain JSON-compatible data, so a backend may
+    keep them outside the process.
+    """
+
+    async def put(self, job):
+        raise NotImplementedError
+
+    async def get(self):
+        """
+        Waits for and returns the next job to run.
+        """
+        raise NotImplementedError
+
+    async def save(self, job):
+        """
+        Persists the current state of a job.
+        """
+        raise NotImplementedError
+
+    async def load(self, job_id):
+        """
+        Returns the job with job_id, or None if it is unknown.
+        """
+        raise NotImplementedError
+
+    def qsize(self):
+        raise NotImplementedError
+
+
+class InMemoryQueueBackend(QueueBackend):
+    """
+    Process-local backend using a bounded asyncio priority queue.
+
+    Finished jobs are kept for lookups until history_size newer jobs have
+    been submitted.
+    """
+
+    def __init__(self, max_size=None, history_size=None):
+        self.max_size = config.JOB_QUEUE_MAX_SIZE if max_size is None else max_size
+        self.history_size = config.JOB_HISTORY_SIZE if history_size is None else history_size
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_size)
+        self._jobs = OrderedDict()
+        self._sequence = itertools.count()
+
+    async def put(self, job):
+        try:
+            self._queue.put_nowait((-job.priority, next(self._sequence), job.id))
+        except asyncio.QueueFull:
+            raise QueueFull("Job queue is full")
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done:
+                break
+            del self._jobs[oldest_id]
+
+    async def get(self):
+        _, _, job_id = await self._queue.get()
+        return self._jobs[job_id]
+
+    async def save(self, job):
+        self._jobs[job.id] = job
+
+    async def load(self, job_id):
+        return self._jobs.get(job_id)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class JobQueue:
+    """
+    Runs submitted jobs on a bounded pool of worker tasks.
+
+    Args:
+        handler: Async callable taking a job payload and returning its result
+        backend (QueueBackend): Job storage (default: InMemoryQueueBackend)
+        workers (int): Number of jobs run concurrently (default: JOB_QUEUE_WORKERS)
+    """
+
+    def __init__(self, handler, backend=None, workers=None):
+        self.handler = handler
+        self.backend = backend or InMemoryQueueBackend()
+        self.workers = workers or config.JOB_QUEUE_WORKERS
+        self._tasks = []
+        self._done_events = {}
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload, priority=0):
+        """
+        Queues a job and returns it immediately.
+
+        Raises:
+            QueueFull: If the backend cannot accept more jobs
+        """
+        job = Job(payload, priority)
+        await self.backend.put(job)
+        self._done_events[job.id] = asyncio.Event()
+        return job
+
+    async def get(self, job_id):
+        return await self.backend.load(job_id)
+
+    async def wait(self, job_id, timeout=None):
+        """
+        Waits until a job finishes (or timeout passes) and returns it.
+        """
+        event = self._done_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return await self.backend.load(job_id)
+
+    async def _work(self):
+        while True:
+            job = await self.backend.get()
+            job.status = "running"
+            job.started_at = time.time()
+            await self.backend.save(job)
+            try:
+                job.result = await self.handler(job.payload)
+                job.status = "succeeded"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            job.finished_at = time.time()
+            await self.backend.save(job)
+            event = self._done_events.pop(job.id, None)
+            if event is not None:
+                event.set()
@@ -0,0 +1,72 @@
+import config
+from llm_router import LLMRouter, build_provider
+
+# Shared router, created on first use so that importing this module never
+# needs an API key or an event loop. Both main.py and the API go through it.
+_router = None
+
+
+def get_router():
+    """
+    Returns the process-wide LLMRouter built from config.LLM_PROVIDERS.
+
+    Each OpenAI-compatible backend keeps one pooled httpx connection pool, so
+    keep-alive connections to the upstream API are reused across assessments.
+    """
+    global _router
+    if _router is None:
+        _router = LLMRouter([build_provider(spec) for spec in config.LLM_PROVIDERS])
+    return _router
+
+
+async def create_chat_completion(messages, timeout=None, **kwargs):
+    """
+    Sends a chat completion request without blocking the event loop.
+
+    The request is routed to the fastest healthy backend and hedged to a
+    second backend if it runs past the first one's tail latency.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        timeout (float): Per-request timeout in seconds (default: LLM_TIMEOUT_SECONDS)
+        **kwargs: Extra completion parameters (temperature, max_tokens, ...)
+
+    Returns:
+        ChatCompletion: The completion returned by the chosen backend
+    """
+    return await get_router().complete(messages, timeout=timeout, **kwargs)
+
+
+async def stream_chat_completion(messages, timeout=None, **kwargs):
+    """
+    Streams a chat completion, yielding content deltas as they arrive.
+
+    The concurrency slot is held until the stream is fully consumed.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        timeout (float): Per-request timeout in seconds (default: LLM_TIMEOUT_SECONDS)
+        **kwargs: Extra completion parameters (temperature, max_tokens, ...)
+
+    Yields:
+        str: Non-empty content deltas
+    """
+    async for delta in get_router().stream(messages, timeout=timeout, **kwargs):
+        yield delta
+
+
+def stats():
+    """
+    Returns routing statistics, or None before the first request.
+    """
+    return _router.stats() if _router is not None else None
+
+
+async def close():
+    """
+    Closes every backend's HTTP connection pool.
+    """
+    global _router
+    if _router is not None:
+        await _router.close()
+    _router = None
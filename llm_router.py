@@ -0,0 +1,442 @@
+import asyncio
+import os
+import time
+from collections import deque
+from types import SimpleNamespace
+import config
+import metrics
+from prompts import count_tokens
+
+
+class NoBackendAvailable(Exception):
+    """
+    Raised when every backend is failing, circuit-broken or over budget.
+    """
+
+
+class Provider:
+    """
+    An LLM backend able to serve chat completions.
+
+    Implementations return OpenAI-shaped ChatCompletion objects from
+    complete() and yield content deltas from stream().
+    """
+
+    def __init__(self, name, model, tokens_per_minute=None, prompt_cost_per_1k=None, completion_cost_per_1k=None):
+        self.name = name
+        self.model = model
+        self.tokens_per_minute = tokens_per_minute
+        self.prompt_cost_per_1k = (
+            config.LLM_PROMPT_COST_PER_1K if prompt_cost_per_1k is None else prompt_cost_per_1k)
+        self.completion_cost_per_1k = (
+            config.LLM_COMPLETION_COST_PER_1K if completion_cost_per_1k is None else completion_cost_per_1k)
+
+    async def complete(self, messages, timeout=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, timeout=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+
+class OpenAIProvider(Provider):
+    """
+    Any OpenAI-compatible endpoint, reached through a pooled AsyncOpenAI client.
+    """
+
+    def __init__(self, name, model, api_key=None, base_url=None, **kwargs):
+        super().__init__(name, model, **kwargs)
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+
+    def get_client(self):
+        # Created on first use so that building the router needs no API key,
+        # and the SDK is only imported by processes that actually call it
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+                ),
+                timeout=config.LLM_TIMEOUT_SECONDS,
+            )
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                timeout=config.LLM_TIMEOUT_SECONDS,
+                max_retries=config.LLM_MAX_RETRIES,
+            )
+        return self._client
+
+    async def complete(self, messages, timeout=None, **kwargs):
+        return await self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            timeout=timeout or config.LLM_TIMEOUT_SECONDS,
+            **kwargs
+        )
+
+    async def stream(self, messages, timeout=None, **kwargs):
+        stream = await self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            timeout=timeout or config.LLM_TIMEOUT_SECONDS,
+            stream=True,
+            **kwargs
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+
+
+class Backend:
+    """
+    Routing state for one provider: latency/error window, circuit breaker
+    and token budget.
+    """
+
+    def __init__(self, provider, index):
+        self.provider = provider
+        self.index = index
+        self.samples = deque(maxlen=config.LLM_ROUTER_WINDOW_SIZE)
+        self.token_window = deque()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    def latency_percentile(self, percentile):
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        position = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[position]
+
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def score(self):
+        """
+        Lower is better: median latency inflated by the recent error rate.
+        """
+        median = self.latency_percentile(50)
+        if median is None:
+            # Untried backends rank first; ones that have only failed rank last
+            median = config.LLM_TIMEOUT_SECONDS if self.samples else 0.0
+        return median * (1 + 4 * self.error_rate())
+
+    def circuit_state(self, now=None):
+        if self.opened_at is None:
+            return "closed"
+        now = time.monotonic() if now is None else now
+        if now - self.opened_at >= config.LLM_CIRCUIT_RESET_SECONDS:
+            return "half_open"
+        return "open"
+
+    def claim_trial(self):
+        """
+        Takes the single trial slot of a half-open circuit.
+
+        Returns:
+            bool: Whether this request is the trial and must release the slot
+        """
+        if self.circuit_state() != "half_open":
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def release_trial(self):
+        self.trial_in_flight = False
+
+    def available(self):
+        state = self.circuit_state()
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def tokens_used(self, now):
+        while self.token_window and now - self.token_window[0][0] >= 60:
+            self.token_window.popleft()
+        return sum(tokens for _, tokens in self.token_window)
+
+    def has_budget(self, tokens):
+        if self.provider.tokens_per_minute is None:
+            return True
+        return self.tokens_used(time.monotonic()) + tokens <= self.provider.tokens_per_minute
+
+    def record(self, latency, ok):
+        metrics.LLM_REQUEST_SECONDS.observe(latency, backend=self.name, outcome="ok" if ok else "error")
+        self.requests += 1
+        self.samples.append((latency, ok))
+        if ok:
+            self.consecutive_failures = 0
+            self.opened_at = None
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= config.LLM_CIRCUIT_FAILURE_THRESHOLD:
+                # Trip the breaker, or re-open it after a failed half-open trial
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": self.error_rate(),
+            "p50_seconds": self.latency_percentile(50),
+            "p95_seconds": self.latency_percentile(95),
+            "circuit": self.circuit_state(),
+            "tokens_last_minute": self.tokens_used(time.monotonic()),
+            "tokens_per_minute": self.provider.tokens_per_minute,
+        }
+
+
+class LLMRouter:
+    """
+    Routes completions across providers by recent latency and errors.
+
+    Each request goes to the best-ranked backend that has a closed (or
+    half-open) circuit and enough token budget. If it fails, the next backend
+    is tried. When a non-streaming request runs past the primary's p95
+    latency, a hedged copy goes to the next backend and the first success
+    wins.
+    """
+
+    def __init__(self, providers):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.backends = [Backend(provider, index) for index, provider in enumerate(providers)]
+        self._semaphore = None
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+        return self._semaphore
+
+    def estimate_tokens(self, messages, max_tokens=None):
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        return prompt_tokens + (max_tokens or 0)
+
+    def ranked(self, tokens, exclude=()):
+        """
+        Returns usable backends, best first.
+        """
+        candidates = [
+            backend for backend in self.backends
+            if backend.name not in exclude and backend.available() and backend.has_budget(tokens)
+        ]
+        return sorted(candidates, key=lambda backend: (backend.score(), backend.index))
+
+    def hedge_delay(self, backend):
+        if not config.LLM_HEDGE_ENABLED:
+            return None
+        if sum(1 for _, ok in backend.samples if ok) < config.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(backend.latency_percentile(config.LLM_HEDGE_PERCENTILE), config.LLM_HEDGE_MIN_DELAY)
+
+    async def _call(self, backend, messages, tokens, kwargs):
+        now = time.monotonic()
+        entry = [now, tokens]
+        backend.token_window.append(entry)
+        start = time.monotonic()
+        try:
+            response = await backend.provider.complete(messages, **kwargs)
+        except asyncio.CancelledError:
+            # The losing side of a hedge; not a backend failure
+            metrics.LLM_REQUEST_SECONDS.observe(time.monotonic() - start, backend=backend.name, outcome="cancelled")
+            raise
+        except Exception:
+            backend.record(time.monotonic() - start, ok=False)
+            raise
+        backend.record(time.monotonic() - start, ok=True)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            # Replace the estimate with the real token count
+            entry[1] = usage.total_tokens
+            provider = backend.provider
+            metrics.record_usage(backend.name, usage, provider.prompt_cost_per_1k, provider.completion_cost_per_1k)
+        return response
+
+    def _start(self, backend, messages, tokens, kwargs):
+        # The half-open trial slot is claimed before the task first runs, so
+        # concurrent requests ranking backends in between already see it taken
+        trial = backend.claim_trial()
+        task = asyncio.create_task(self._call(backend, messages, tokens, kwargs))
+        if trial:
+            task.add_done_callback(lambda _: backend.release_trial())
+        return task
+
+    async def _hedged(self, primary, backups, messages, tokens, kwargs, tried):
+        first = self._start(primary, messages, tokens, kwargs)
+        delay = self.hedge_delay(primary)
+        if delay is None or not backups:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        # Backups were ranked before the wait; skip any that became unusable
+        backups = [backend for backend in backups if backend.available() and backend.has_budget(tokens)]
+        if not backups:
+            return await first
+        backup = backups[0]
+        tried.add(backup.name)
+        self.hedges += 1
+        second = self._start(backup, messages, tokens, kwargs)
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+
+    async def complete(self, messages, timeout=None, **kwargs):
+        """
+        Returns a chat completion from the best available backend.
+
+        Raises:
+            NoBackendAvailable: If no backend can take the request
+        """
+        kwargs.pop("model", None)
+        kwargs["timeout"] = timeout
+        tokens = self.estimate_tokens(messages, kwargs.get("max_tokens"))
+        tried = set()
+        error = None
+        async with self._get_semaphore():
+            while True:
+                candidates = self.ranked(tokens, exclude=tried)
+                if not candidates:
+                    if error is not None:
+                        raise error
+                    raise NoBackendAvailable("No LLM backend is available or within its token budget")
+                primary = candidates[0]
+                tried.add(primary.name)
+                try:
+                    return await self._hedged(primary, candidates[1:], messages, tokens, kwargs, tried)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = e
+
+    async def stream(self, messages, timeout=None, **kwargs):
+        """
+        Streams content deltas from the best available backend.
+
+        Fails over to the next backend only until the first delta arrives.
+        """
+        kwargs.pop("model", None)
+        prompt_tokens = self.estimate_tokens(messages)
+        tokens = prompt_tokens + (kwargs.get("max_tokens") or 0)
+        tried = set()
+        error = None
+        async with self._get_semaphore():
+            while True:
+                candidates = self.ranked(tokens, exclude=tried)
+                if not candidates:
+                    if error is not None:
+                        raise error
+                    raise NoBackendAvailable("No LLM backend is available or within its token budget")
+                backend = candidates[0]
+                tried.add(backend.name)
+                trial = backend.claim_trial()
+                backend.token_window.append([time.monotonic(), tokens])
+                start = time.monotonic()
+                started = False
+                parts = []
+                try:
+                    async for delta in backend.provider.stream(messages, timeout=timeout, **kwargs):
+                        if not started:
+                            # Rank streaming backends by time to first token
+                            backend.record(time.monotonic() - start, ok=True)
+                            started = True
+                        parts.append(delta)
+                        yield delta
+                    # Streams carry no usage block, so count the tokens locally
+                    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=count_tokens("".join(parts)))
+                    provider = backend.provider
+                    metrics.record_usage(backend.name, usage, provider.prompt_cost_per_1k, provider.completion_cost_per_1k)
+                    return
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if started:
+                        raise
+                    backend.record(time.monotonic() - start, ok=False)
+                    error = e
+                finally:
+                    if trial:
+                        backend.release_trial()
+
+    def stats(self):
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "backends": {backend.name: backend.stats() for backend in self.backends},
+        }
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.provider.close()
+        self._semaphore = None
+
+
+def build_provider(spec):
+    """
+    Creates a provider from a config.LLM_PROVIDERS entry.
+    """
+    kind = spec.get("type", "openai")
+    name = spec.get("name", kind)
+    options = {
+        "tokens_per_minute": spec.get("tokens_per_minute"),
+        "prompt_cost_per_1k": spec.get("prompt_cost_per_1k"),
+        "completion_cost_per_1k": spec.get("completion_cost_per_1k"),
+    }
+    if kind == "openai":
+        api_key = os.getenv(spec["api_key_env"]) if "api_key_env" in spec else config.OPENAI_API_KEY
+        return OpenAIProvider(
+            name,
+            spec.get("model", config.OPENAI_MODEL),
+            api_key=api_key,
+            base_url=spec.get("base_url", config.OPENAI_BASE_URL),
+            **options
+        )
+    if kind == "fake":
+        from fake_llm import FakeProvider
+        return FakeProvider(
+            name,
+            latency_median=spec.get("latency_median", 0.5),
+            latency_sigma=spec.get("latency_sigma", 0.3),
+            error_rate=spec.get("error_rate", 0.0),
+            tokens_per_second=spec.get("tokens_per_second", 200),
+            content=spec.get("content"),
+            **options
+        )
+    raise ValueError(f"Unknown LLM provider type: {kind}")
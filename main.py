@@ -1,149 +1,132 @@
-import os
+import argparse
 import json
-from openai import OpenAI
-from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
+import sys
 import config
+from metrics import configure_logging
+from questionnaire import QuestionnaireError, get_questionnaire
 
-console = Console()
+# Heavy SDKs (openai, httpx, rich, numpy) are imported where they are first
+# needed, so the first question appears quickly and --help or --batch never
+# load the terminal UI.
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
 class CareerAssessment:
     def __init__(self):
-        # Initialize OpenAI client with minimal configuration
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
         self.answers = {}
 
     def collect_answers(self):
+        from rich.panel import Panel
+        console = get_console()
         console.print(Panel.fit("Career Assessment Questionnaire", style="bold blue"))
         console.print("Please answer the following questions to help us understand your profile.\n")
         
-        for category, data in config.ASSESSMENT_CATEGORIES.items():
-            console.print(Panel.fit(f"[bold]{data['title']}[/bold]", style="bold green"))
-            for i, question_data in enumerate(data['questions'], 1):
-                console.print(f"\n[bold]{i}. {question_data['question']}[/bold]")
-                for option_num, option_text in question_data['options'].items():
+        for category in get_questionnaire().categories:
+            console.print(Panel.fit(f"[bold]{category.title}[/bold]", style="bold green"))
+            for i, question in enumerate(category.questions, 1):
+                console.print(f"\n[bold]{i}. {question.text}[/bold]")
+                for option_num, option_text in question.options.items():
                     console.print(f"   {option_num}. {option_text}")
                 
+                choices = f"1-{len(question.options)}"
                 while True:
-                    answer = input("\nYour choice (1-3): ")
-                    if answer in ['1', '2', '3']:
-                        self.answers[question_data['question']] = question_data['options'][answer]
+                    answer = question.option_text(input(f"\nYour choice ({choices}): "))
+                    if answer is not None:
+                        self.answers[question.text] = answer
                         break
                     else:
-                        console.print("[red]Please enter a valid choice (1-3)[/red]")
+                        console.print(f"[red]Please enter a valid choice ({choices})[/red]")
                 
                 console.print()
             console.print("\n" + "="*50 + "\n")
 
+    def collect_answers_adaptive(self):
+        from rich.panel import Panel
+        from adaptive import get_questioner
+        console = get_console()
+        console.print(Panel.fit("Career Assessment Questionnaire", style="bold blue"))
+        console.print("Each question is chosen from your previous answers; we stop once your profile is clear.\n")
+
+        questioner = get_questioner()
+        session = questioner.start()
+        while not session.done:
+            question = questioner.questions[session.next_question]
+            console.print(f"\n[bold]{len(session.answers) + 1}. {question.text}[/bold]")
+            for option_num, option_text in question.options.items():
+                console.print(f"   {option_num}. {option_text}")
+
+            choices = f"1-{len(question.options)}"
+            while True:
+                answer = question.option_text(input(f"\nYour choice ({choices}): "))
+                if answer is not None:
+                    break
+                console.print(f"[red]Please enter a valid choice ({choices})[/red]")
+            questioner.answer(session, question.text, answer)
+            self.answers[question.text] = answer
+
+        scores = questioner.scores(session)
+        top = next(iter(scores))
+        console.print(
+            f"\n[green]Done after {len(session.answers)} of {len(questioner.questions)} questions "
+            f"({questioner.questionnaire.career_paths[top]['title']}: {scores[top]:.0%} likely).[/green]"
+        )
+        console.print("\n" + "="*50 + "\n")
+
     def generate_analysis(self):
-        # Prepare the prompt for ChatGPT
-        prompt = f"""As a career counselor, analyze the following assessment answers from a fresh graduate and provide detailed career guidance in JSON format.
-
-Assessment Answers:
-{self._format_answers()}
-
-Please provide a comprehensive analysis in the following JSON structure:
-{{
-    "profile_summary": "A detailed summary of the person's profile, including their skills, work style, and career aspirations. Focus on their strengths and potential areas for growth.",
-    "strengths": [
-        "List of key strengths identified from their answers, with specific examples from their responses",
-        "Include both technical and soft skills",
-        "Highlight unique combinations of skills that make them stand out"
-    ],
-    "areas_for_development": [
-        "List of areas that need improvement based on their responses",
-        "Include specific suggestions for development",
-        "Focus on both technical and soft skills"
-    ],
-    "recommended_paths": [
-        {{
-            "title": "Career path title",
-            "description": "Detailed description of why this path is suitable, based on their answers",
-            "required_skills": [
-                "List of specific skills needed for this path",
-                "Include both technical and soft skills",
-                "Prioritize skills based on their current level"
-            ],
-            "learning_resources": [
-                "List of specific learning resources (courses, books, platforms)",
-                "Include both free and paid options",
-                "Prioritize resources based on their learning style"
-            ],
-            "next_steps": [
-                "List of immediate actionable steps to pursue this path",
-                "Include both short-term and long-term goals",
-                "Make steps specific and measurable"
-            ]
-        }}
-    ]
-}}
-
-Guidelines for the analysis:
-1. Focus on actionable insights and specific recommendations
-2. Consider their learning style and work preferences
-3. Suggest realistic career paths based on their current skill level
-4. Provide specific resources and next steps
-5. Highlight unique combinations of skills that could lead to niche opportunities
-6. Consider both technical and soft skills in the recommendations
-7. Explore various industries and roles that match their profile
-8. Consider their preferred work environment and career goals
-9. Suggest both traditional and emerging career paths
-10. Include opportunities for growth and advancement
-
-Ensure the response is valid JSON and follows this exact structure. Provide detailed and specific recommendations based on the person's answers.
-"""
+        import asyncio
+        from rich.panel import Panel
+        from cache import get_result_cache, make_cache_key
+        from prompts import get_prompt_engine
+        from schemas import InvalidAnalysisError
+
+        console = get_console()
+        # Reuse a previous analysis of the same answers if one is cached
+        result_cache = get_result_cache()
+        prompt_engine = get_prompt_engine()
+        cache_key = make_cache_key(self.answers, prompt_version=prompt_engine.version)
+        # contains() first, so a miss is only counted once, by analysis.generate_analysis
+        cached = result_cache.get(cache_key) if result_cache.contains(cache_key) else None
+        if cached is not None:
+            console.print("\n[green]Using cached analysis for these answers.[/green]")
+            return cached
+
+        # Render the prompt for ChatGPT
+        rendered = prompt_engine.render(self.answers)
+        prompt = rendered.user_prompt
 
         # Display the prompt that will be sent to ChatGPT
         console.print("\n[bold yellow]Prompt being sent to ChatGPT:[/bold yellow]")
         console.print(Panel(prompt, title="ChatGPT Prompt", style="yellow"))
+        console.print(f"[dim]Prompt size: ~{rendered.token_count} tokens[/dim]")
 
         try:
-            # Create a chat completion with the latest API practices
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a career counselor specializing in helping fresh graduates find their ideal career path. Provide detailed, specific, and actionable recommendations in valid JSON format. Consider all possible career paths and industries."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
-            
-            # Get the content from the response
-            content = response.choices[0].message.content
-            
-            # Parse the JSON response
-            try:
-                analysis_json = json.loads(content)
-                return analysis_json
-            except json.JSONDecodeError as e:
-                console.print(f"[red]Error parsing JSON response: {str(e)}[/red]")
-                console.print("[yellow]Raw response:[/yellow]")
-                console.print(content)
-                return None
-                
+            # Generate, validate and (if needed) repair through the shared pipeline
+            return asyncio.run(self._generate(result_cache))
+        except InvalidAnalysisError as e:
+            console.print(f"[red]Error parsing JSON response: {str(e)}[/red]")
+            return None
         except Exception as e:
             console.print(f"[red]Error generating analysis: {str(e)}[/red]")
             return None
 
-    def _format_answers(self):
-        formatted = ""
-        for category, data in config.ASSESSMENT_CATEGORIES.items():
-            formatted += f"\n{data['title']}\n"
-            formatted += "=" * len(data['title']) + "\n\n"
-            for question_data in data['questions']:
-                formatted += f"Q: {question_data['question']}\nA: {self.answers[question_data['question']]}\n\n"
-        return formatted
+    async def _generate(self, result_cache):
+        import llm_client
+        from analysis import generate_analysis
+        try:
+            return await generate_analysis(self.answers, result_cache=result_cache)
+        finally:
+            await llm_client.close()
 
     def display_report(self, analysis):
+        from rich.panel import Panel
+        from result_store import get_result_store
+        console = get_console()
         if analysis:
             console.print("\n[bold green]Career Assessment Report[/bold green]")
             
@@ -172,26 +155,105 @@ Ensure the response is valid JSON and follows this exact structure. Provide deta
                     title=f"Career Path: {path['title']}"
                 ))
             
-            # Save the analysis to a JSON file
+            # Save the analysis to the result store
             try:
-                with open('career_analysis.json', 'w', encoding='utf-8') as f:
-                    json.dump(analysis, f, indent=4, ensure_ascii=False)
-                console.print("\n[green]Analysis saved to career_analysis.json[/green]")
+                record = get_result_store().add(self.answers, analysis)
+                console.print(f"\n[green]Analysis saved as assessment {record['id']} in {config.RESULT_STORE_PATH}[/green]")
             except Exception as e:
-                console.print(f"[red]Error saving analysis to file: {str(e)}[/red]")
+                console.print(f"[red]Error saving analysis: {str(e)}[/red]")
         else:
             console.print("[red]Failed to generate analysis report.[/red]")
 
-def main():
-    if not config.OPENAI_API_KEY:
-        console.print("[red]Error: OPENAI_API_KEY not found in environment variables.[/red]")
-        console.print("Please create a .env file with your OpenAI API key.")
-        return
+async def run_batch_file(input_file, output_file, fmt, concurrency):
+    """
+    Analyzes every record in input_file and writes JSONL results to output_file.
+
+    Returns:
+        int: Number of records that failed
+    """
+    import llm_client
+    from analysis import generate_analysis
+    from batch import aiter_records, run_batch
+    from result_store import get_result_store
+
+    async def lines():
+        for line in input_file:
+            yield line
+
+    async def analyze_and_store(answers):
+        analysis = await generate_analysis(answers)
+        record = get_result_store().add(answers, analysis)
+        return {**analysis, "assessment_id": record["id"]}
+
+    failures = 0
+    try:
+        async for result in run_batch(aiter_records(lines(), fmt), analyze_and_store, concurrency):
+            failures += result["status"] != "ok"
+            output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output_file.flush()
+    finally:
+        await llm_client.close()
+    return failures
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Career assessment")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Analyze answers from a JSONL/CSV file ('-' for stdin) without prompting")
+    parser.add_argument("--output", metavar="OUTPUT", default="-",
+                        help="Where to write JSONL results in batch mode (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Batch input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY,
+                        help="Analyses run in parallel in batch mode")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Ask only the most informative questions, stopping once the result is clear")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging()
+    from cache import close_result_cache
+    from result_store import close_result_store
+    needs_openai_key = any(
+        spec.get("type", "openai") == "openai" and "api_key_env" not in spec for spec in config.LLM_PROVIDERS
+    )
+    if needs_openai_key and not config.OPENAI_API_KEY:
+        print("Error: OPENAI_API_KEY not found in environment variables.", file=sys.stderr)
+        print("Please create a .env file with your OpenAI API key.", file=sys.stderr)
+        return 1
+
+    if args.batch:
+        fmt = args.format or ("csv" if args.batch.lower().endswith(".csv") else "jsonl")
+        input_file = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8", newline="")
+        output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        import asyncio
+        try:
+            failures = asyncio.run(run_batch_file(input_file, output_file, fmt, args.concurrency))
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            if output_file is not sys.stdout:
+                output_file.close()
+            close_result_store()
+            close_result_cache()
+        return 1 if failures else 0
+
+    try:
+        get_questionnaire()
+    except QuestionnaireError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
     assessment = CareerAssessment()
-    assessment.collect_answers()
+    if args.adaptive:
+        assessment.collect_answers_adaptive()
+    else:
+        assessment.collect_answers()
     analysis = assessment.generate_analysis()
     assessment.display_report(analysis)
+    close_result_store()
+    close_result_cache()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import config
+
+logger = logging.getLogger("career_assessment.requests")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels[name]) for name in self.label_names)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels, in Prometheus layout.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", key + (("le", _format_value(float(bound))),), bucket_count
+            yield f"{self.name}_bucket", key + (("le", "+Inf"),), count
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, count
+
+
+class Registry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+
+    Collectors are callables invoked at scrape time that return
+    (name, kind, help, [(labels_dict, value), ...]) tuples, for values that
+    already live elsewhere (cache sizes, queue depth, circuit state).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"])
+STAGE_SECONDS = registry.histogram(
+    "analysis_stage_seconds", "Time spent in each analysis stage", ["stage"])
+LLM_REQUEST_SECONDS = registry.histogram(
+    "llm_request_seconds", "Upstream LLM request latency per backend", ["backend", "outcome"])
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens reported in completion usage", ["backend", "kind"])
+LLM_COST = registry.counter(
+    "llm_cost_usd_total", "Estimated LLM spend from token usage", ["backend"])
+CACHE_LOOKUPS = registry.counter(
+    "analysis_cache_lookups_total", "Result cache lookups for analyses", ["result"])
+NEAREST_LOOKUPS = registry.counter(
+    "analysis_nearest_lookups_total", "Near-duplicate lookups, by whether the neighbor was served, adapted or missed",
+    ["result"])
+NEAREST_COMPLETION_TOKENS_SAVED = registry.counter(
+    "analysis_nearest_completion_tokens_saved_total", "Estimated completion tokens saved by near-duplicate reuse")
+DEDUP_OUTCOMES = registry.counter(
+    "analysis_singleflight_total", "Uncached analyses that ran upstream or joined an in-flight call", ["outcome"])
+ANALYSIS_RESULTS = registry.counter(
+    "analysis_results_total", "Analyses served, by source", ["source"])
+TTS_SECONDS = registry.histogram(
+    "tts_synthesis_seconds", "Time to produce speech audio", ["source"])
+TTS_CHARACTERS = registry.counter(
+    "tts_characters_total", "Characters sent to the speech backend")
+RATE_LIMIT_DECISIONS = registry.counter(
+    "rate_limit_decisions_total", "Admission decisions for LLM-backed requests", ["outcome"])
+ADAPTIVE_QUESTIONS = registry.histogram(
+    "adaptive_session_questions", "Questions asked per completed adaptive session", ["reason"],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100))
+
+# Stage timings and annotations for the request being handled, read by the
+# middleware when it writes the request log
+_request_context = ContextVar("request_context", default=None)
+
+
+def observe_stage(stage, seconds):
+    """
+    Records a stage duration in the histogram and the current request log.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    context = _request_context.get()
+    if context is not None:
+        stages = context["stages"]
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    """
+    Times the enclosed block as an analysis stage.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def annotate(**fields):
+    """
+    Adds fields (cache outcome, tokens, ...) to the current request log.
+    """
+    context = _request_context.get()
+    if context is not None:
+        context["fields"].update(fields)
+
+
+def record_usage(backend, usage, prompt_cost_per_1k, completion_cost_per_1k):
+    """
+    Counts the tokens and estimated cost of one completion.
+    """
+    LLM_TOKENS.inc(usage.prompt_tokens, backend=backend, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, backend=backend, kind="completion")
+    cost = (usage.prompt_tokens * prompt_cost_per_1k + usage.completion_tokens * completion_cost_per_1k) / 1000
+    LLM_COST.inc(cost, backend=backend)
+    context = _request_context.get()
+    if context is not None:
+        fields = context["fields"]
+        fields["prompt_tokens"] = fields.get("prompt_tokens", 0) + usage.prompt_tokens
+        fields["completion_tokens"] = fields.get("completion_tokens", 0) + usage.completion_tokens
+        fields["cost_usd"] = round(fields.get("cost_usd", 0.0) + cost, 6)
+
+
+def _route_template(scope):
+    # Label by route template, not raw path, to keep label cardinality bounded
+    from starlette.routing import Match
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request and writes one structured
+    log line per request with its stage timings.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streaming
+    request bodies and responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope)
+        context = {"stages": {}, "fields": {}}
+        token = _request_context.set(context)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            _request_context.reset(token)
+            HTTP_REQUEST_SECONDS.observe(duration, method=scope["method"], route=route, status=str(status))
+            if route != config.METRICS_PATH:
+                logger.info(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 2),
+                    "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in context["stages"].items()},
+                    **context["fields"],
+                }))
+
+
+def configure_logging():
+    """
+    Sends application logs to stderr at config.LOG_LEVEL.
+    """
+    logging.basicConfig(
+        level=config.LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    # httpx logs every upstream request at INFO, which would double the volume
+    logging.getLogger("httpx").setLevel(logging.WARNING)
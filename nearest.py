@@ -0,0 +1,230 @@
+import threading
+import numpy as np
+import config
+from questionnaire import answer_pairs
+from rules import get_rule_engine
+
+
+class Neighbor:
+    """
+    The closest indexed analysis to a query and how far away its answers are.
+    """
+
+    def __init__(self, distance, answers, analysis):
+        self.distance = distance
+        self.answers = answers
+        self.analysis = analysis
+
+    def changes(self, answers):
+        """
+        Returns (question, neighbor answer, query answer) for every question
+        answered differently; either answer may be None.
+        """
+        mine = dict(answer_pairs(answers))
+        theirs = dict(self.answers)
+        return [
+            (question, theirs.get(question), mine.get(question))
+            for question in list(theirs) + [question for question in mine if question not in theirs]
+            if theirs.get(question) != mine.get(question)
+        ]
+
+
+class NearestIndex:
+    """
+    Nearest-neighbor search over the answer vectors of earlier analyses.
+
+    Answers are one-hot encoded over every (question, option) pair by the
+    rule engine's AnswerEncoder. The distance between two answer sets counts
+    the questions answered differently, each weighted by how much its options
+    move the rule-engine scores, so that a changed learning style weighs less
+    than a changed career goal. Weights are scaled so the average question
+    counts 1 and no question counts less than 0.25; a question answered in
+    only one of the two sets counts half. Only analyses whose answers lead
+    to the same best rule-engine path are candidates, so a changed answer
+    that flips the recommendation never reuses the other path's guidance.
+    Answers the encoder does not recognize (free text, unknown questions)
+    would not count towards the distance at all, so answer sets with any of
+    them are neither indexed nor matched. A query costs one
+    (entries x options) matrix-vector product.
+
+    Holds at most max_entries analyses, replacing the oldest when full.
+    """
+
+    def __init__(self, rule_engine=None, max_entries=None):
+        rule_engine = get_rule_engine() if rule_engine is None else rule_engine
+        self.max_entries = config.NEAREST_MAX_ENTRIES if max_entries is None else max_entries
+        self.rule_engine = rule_engine
+        self.encoder = rule_engine.encoder
+        feature_question = np.array(self.encoder.feature_question, dtype=np.intp)
+
+        # Impact of a question: the largest L1 difference in path weights
+        # between two of its options
+        impact = np.zeros(len(self.encoder.questions))
+        for question in range(len(impact)):
+            rows = rule_engine.weights[feature_question == question]
+            impact[question] = np.abs(rows[:, np.newaxis, :] - rows[np.newaxis, :, :]).sum(axis=2).max()
+        mean_impact = impact.mean()
+        relative = impact / mean_impact if mean_impact > 0 else np.ones_like(impact)
+        self.question_weights = np.maximum(relative, 0.25)
+        self._feature_weights = self.question_weights[feature_question].astype(np.float32)
+
+        self._vectors = np.zeros((0, self.encoder.size), dtype=np.float32)
+        self._weighted_norms = np.zeros(0, dtype=np.float32)
+        self._top_paths = np.zeros(0, dtype=np.intp)
+        self._entries = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _encode(self, answers):
+        """
+        Returns the one-hot vector for answers, or None if any question or
+        answer is not one the encoder knows.
+        """
+        indices = self.encoder.indices(answers)
+        if len(indices) < len(answer_pairs(answers)):
+            return None
+        vector = np.zeros(self.encoder.size, dtype=np.float32)
+        vector[indices] = 1.0
+        return vector
+
+    def _top_path(self, vector):
+        return int(np.argmax(self.rule_engine.score_matrix(vector[np.newaxis, :])[0]))
+
+    def _distances(self, vector, top_path):
+        # For one-hot rows, sum(w * |x - y|) / 2 = (w.x + w.y - 2 w.(x*y)) / 2
+        count = len(self._entries)
+        weighted = vector * self._feature_weights
+        distances = (self._weighted_norms[:count] + weighted.sum() - 2 * (self._vectors[:count] @ weighted)) / 2
+        distances[self._top_paths[:count] != top_path] = np.inf
+        return distances
+
+    def nearest(self, answers):
+        """
+        Returns the Neighbor closest to answers, or None if no indexed
+        analysis shares their best path or answers cannot be fully encoded.
+        """
+        vector = self._encode(answers)
+        if vector is None:
+            return None
+        top_path = self._top_path(vector)
+        with self._lock:
+            if not self._entries:
+                return None
+            distances = self._distances(vector, top_path)
+            row = int(np.argmin(distances))
+            if distances[row] == np.inf:
+                return None
+            stored_answers, analysis = self._entries[row]
+            return Neighbor(max(float(distances[row]), 0.0), stored_answers, analysis)
+
+    def add(self, answers, analysis):
+        """
+        Indexes an analysis under its answers. Analyses that are not the
+        model's own work for these answers (rule fallbacks, served or adapted
+        neighbors) carry a "source" and are skipped, as are exact duplicates
+        and answers that cannot be fully encoded.
+        """
+        if self.max_entries <= 0 or "source" in analysis:
+            return
+        vector = self._encode(answers)
+        if vector is None:
+            return
+        top_path = self._top_path(vector)
+        entry = (answer_pairs(answers), analysis)
+        with self._lock:
+            if self._entries and self._distances(vector, top_path).min() <= 0:
+                return
+            if len(self._entries) < self.max_entries:
+                if len(self._entries) == len(self._vectors):
+                    self._grow()
+                row = len(self._entries)
+                self._entries.append(entry)
+            else:
+                row = self._next
+                self._next = (self._next + 1) % self.max_entries
+                self._entries[row] = entry
+            self._vectors[row] = vector
+            self._weighted_norms[row] = vector @ self._feature_weights
+            self._top_paths[row] = top_path
+
+    def _grow(self):
+        capacity = min(max(2 * len(self._vectors), 256), self.max_entries)
+        vectors = np.zeros((capacity, self.encoder.size), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        top_paths = np.zeros(capacity, dtype=np.intp)
+        count = len(self._entries)
+        vectors[:count] = self._vectors[:count]
+        norms[:count] = self._weighted_norms[:count]
+        top_paths[:count] = self._top_paths[:count]
+        self._vectors = vectors
+        self._weighted_norms = norms
+        self._top_paths = top_paths
+
+    def stats(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+
+class NearestStats:
+    """
+    Counts near-duplicate lookups and the LLM tokens reuse saved.
+
+    Savings are measured against a full analysis of the same answers: its
+    rendered prompt and the average full completion so far. A served
+    neighbor saves both; an adapted seed saves the difference to what the
+    adaptation used. Seed prompts carry the earlier analysis, so prompt
+    savings can be negative while completion savings are not; the cost
+    estimate nets both at config prices.
+    """
+
+    def __init__(self):
+        self.lookups = 0
+        self.served = 0
+        self.seeded = 0
+        self.prompt_tokens_saved = 0
+        self.completion_tokens_saved = 0
+
+    def record_hit(self, result, prompt_tokens_saved, completion_tokens_saved):
+        self.lookups += 1
+        if result == "served":
+            self.served += 1
+        else:
+            self.seeded += 1
+        self.prompt_tokens_saved += prompt_tokens_saved
+        self.completion_tokens_saved += completion_tokens_saved
+
+    def record_miss(self):
+        self.lookups += 1
+
+    def stats(self):
+        hits = self.served + self.seeded
+        cost = (
+            self.prompt_tokens_saved * config.LLM_PROMPT_COST_PER_1K
+            + self.completion_tokens_saved * config.LLM_COMPLETION_COST_PER_1K
+        ) / 1000
+        return {
+            "lookups": self.lookups,
+            "served": self.served,
+            "seeded": self.seeded,
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+            "prompt_tokens_saved": self.prompt_tokens_saved,
+            "completion_tokens_saved": self.completion_tokens_saved,
+            "cost_saved_usd": round(cost, 6),
+        }
+
+
+nearest_stats = NearestStats()
+
+_nearest_index = None
+
+
+def get_nearest_index():
+    """
+    Returns the process-wide NearestIndex.
+    """
+    global _nearest_index
+    if _nearest_index is None:
+        _nearest_index = NearestIndex()
+    return _nearest_index
@@ -0,0 +1,128 @@
+"""
+Precomputes analyses for the enumerable answer space.
+
+Walks every answer combination from config.ASSESSMENT_CATEGORIES (or a slice
+of them), generates analyses with bounded parallelism and a request-rate cap,
+and stores them in the SQLite cache tier that the API reads from. Answer sets
+already in the store are skipped, so an interrupted run resumes where it
+stopped when started again with the same arguments.
+
+Usage:
+    python precompute.py --db results.db --concurrency 8 --rps 2
+    python precompute.py --db results.db --start 0 --limit 500
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import sys
+import time
+import config
+import llm_client
+from analysis import generate_analysis
+from cache import ResultCache, make_cache_key
+from metrics import configure_logging
+from prompts import get_prompt_engine
+from questionnaire import count_answer_sets, iter_answer_sets
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most `rate` start per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def precompute(db_path, start=0, limit=None, concurrency=4, rps=None):
+    """
+    Generates and stores analyses for a slice of the answer space.
+
+    Args:
+        db_path (str): SQLite file shared with the API (CACHE_DB_PATH)
+        start (int): Index of the first answer set to process
+        limit (int): Maximum number of answer sets to process (default: all)
+        concurrency (int): Number of analyses generated in parallel
+        rps (float): Maximum LLM requests started per second (default: unlimited)
+
+    Returns:
+        dict: Counts of generated, skipped and failed answer sets
+    """
+    # Skip the memory tier: results only need to land on disk
+    store = ResultCache(max_entries=0, db_path=db_path)
+    limiter = RateLimiter(rps)
+    stop = None if limit is None else start + limit
+    answer_sets = itertools.islice(iter_answer_sets(), start, stop)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"generated": 0, "skipped": 0, "failed": 0}
+    # Same key as generate_analysis, so reruns skip what is already stored
+    prompt_version = get_prompt_engine().version
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, answers = item
+            if await store.acontains(make_cache_key(answers, prompt_version=prompt_version)):
+                counts["skipped"] += 1
+                continue
+            await limiter.wait()
+            try:
+                await generate_analysis(answers, result_cache=store, expires=False, reuse=False)
+                counts["generated"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning("Answer set %d failed: %s", index, e)
+            done = counts["generated"] + counts["failed"]
+            if done % 50 == 0:
+                logger.info("Progress: %s", counts)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for item in enumerate(answer_sets, start):
+        await queue.put(item)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    await llm_client.close()
+    # Disk writes are queued; wait for them before the process exits
+    await asyncio.get_running_loop().run_in_executor(None, store.close)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute analyses for every answer combination")
+    parser.add_argument("--db", default=config.CACHE_DB_PATH, help="SQLite store (default: CACHE_DB_PATH)")
+    parser.add_argument("--start", type=int, default=0, help="Index of the first answer set")
+    parser.add_argument("--limit", type=int, default=None, help="Number of answer sets to process")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel LLM requests")
+    parser.add_argument("--rps", type=float, default=None, help="Maximum requests started per second")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("a store is required: pass --db or set CACHE_DB_PATH")
+
+    configure_logging()
+    logger.info("Answer space: %d combinations", count_answer_sets())
+    counts = asyncio.run(precompute(args.db, args.start, args.limit, args.concurrency, args.rps))
+    print(f"Done: {counts}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
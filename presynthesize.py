@@ -0,0 +1,106 @@
+"""
+Pre-synthesizes spoken prompts for every question and option.
+
+The questionnaire text never changes between users, so its audio is
+generated once with parallel workers and written as static, content-named
+MP3 files plus a manifest.json mapping each text to its file. The frontend
+(or a CDN in front of it) can then serve question audio without any
+per-session TTS calls.
+
+Usage:
+    python presynthesize.py --output frontend/public/audio --workers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import config
+from questionnaire import iter_questions
+from tts_service import get_tts_service
+
+
+def iter_prompt_texts(categories=None):
+    """
+    Yields (question, text) for every question and option prompt.
+    """
+    for _, question_data in iter_questions(categories):
+        question = question_data["question"]
+        yield question, question
+        for option_num, option_text in question_data["options"].items():
+            yield question, f"{option_num}. {option_text}"
+
+
+def _export(source, target):
+    if os.path.exists(target):
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+async def presynthesize(output_dir, workers=None, voice_id=None, engine=None, tts_service=None):
+    """
+    Synthesizes all question and option prompts into output_dir.
+
+    Args:
+        output_dir (str): Directory for the MP3 files and manifest.json
+        workers (int): Number of prompts synthesized in parallel (default: TTS_MAX_WORKERS)
+        voice_id (str): The voice ID to use (default: config.TTS_DEFAULT_VOICE)
+        engine (str): The Polly engine to use (default: config.TTS_ENGINE)
+        tts_service (TTSService): Service to synthesize with (default: shared service)
+
+    Returns:
+        dict: The manifest that was written
+    """
+    tts_service = tts_service or get_tts_service()
+    voice_id = voice_id or config.TTS_DEFAULT_VOICE
+    engine = engine or config.TTS_ENGINE
+    semaphore = asyncio.Semaphore(workers or config.TTS_MAX_WORKERS)
+    os.makedirs(output_dir, exist_ok=True)
+
+    async def synthesize(text):
+        async with semaphore:
+            path = await tts_service.synthesize_to_file(text, voice_id, engine)
+        filename = os.path.basename(path)
+        _export(path, os.path.join(output_dir, filename))
+        return filename
+
+    prompts = list(iter_prompt_texts())
+    texts = list(dict.fromkeys(text for _, text in prompts))
+    filenames = await asyncio.gather(*(synthesize(text) for text in texts))
+    files_by_text = dict(zip(texts, filenames))
+
+    manifest = {"voice": voice_id, "engine": engine, "questions": {}}
+    for question, text in prompts:
+        entry = manifest["questions"].setdefault(question, {"question": None, "options": {}})
+        if text == question:
+            entry["question"] = files_by_text[text]
+        else:
+            entry["options"][text] = files_by_text[text]
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize question and option audio")
+    parser.add_argument("--output", default=config.TTS_STATIC_DIR, help="Output directory (default: TTS_STATIC_DIR)")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel synthesis workers")
+    parser.add_argument("--voice", default=None, help="Polly voice ID")
+    parser.add_argument("--engine", default=None, help="Polly engine")
+    args = parser.parse_args()
+
+    manifest = asyncio.run(presynthesize(args.output, args.workers, args.voice, args.engine))
+    print(f"Wrote audio for {len(manifest['questions'])} questions to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import json
+import time
+import config
+from questionnaire import answer_pairs
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+SYSTEM_PROMPT = "You are a career counselor specializing in helping fresh graduates find their ideal career path. Provide detailed, specific, and actionable recommendations in valid JSON format. Consider all possible career paths and industries."
+
+# Static text around the answer block, kept as plain strings so nothing but
+# the answers is formatted per request.
+PROMPT_HEADER = """As a career counselor, analyze the following assessment answers from a fresh graduate and provide detailed career guidance in JSON format.
+
+Assessment Answers:
+"""
+
+FULL_SCHEMA = """
+
+Please provide a comprehensive analysis in the following JSON structure:
+{
+    "profile_summary": "A detailed summary of the person's profile, including their skills, work style, and career aspirations. Focus on their strengths and potential areas for growth.",
+    "strengths": [
+        "List of key strengths identified from their answers, with specific examples from their responses",
+        "Include both technical and soft skills",
+        "Highlight unique combinations of skills that make them stand out"
+    ],
+    "areas_for_development": [
+        "List of areas that need improvement based on their responses",
+        "Include specific suggestions for development",
+        "Focus on both technical and soft skills"
+    ],
+    "recommended_paths": [
+        {
+            "title": "Career path title",
+            "description": "Detailed description of why this path is suitable, based on their answers",
+            "required_skills": [
+                "List of specific skills needed for this path",
+                "Include both technical and soft skills",
+                "Prioritize skills based on their current level"
+            ],
+            "learning_resources": [
+                "List of specific learning resources (courses, books, platforms)",
+                "Include both free and paid options",
+                "Prioritize resources based on their learning style"
+            ],
+            "next_steps": [
+                "List of immediate actionable steps to pursue this path",
+                "Include both short-term and long-term goals",
+                "Make steps specific and measurable"
+            ]
+        }
+    ]
+}
+
+Guidelines for the analysis:
+1. Focus on actionable insights and specific recommendations
+2. Consider their learning style and work preferences
+3. Suggest realistic career paths based on their current skill level
+4. Provide specific resources and next steps
+5. Highlight unique combinations of skills that could lead to niche opportunities
+6. Consider both technical and soft skills in the recommendations
+7. Explore various industries and roles that match their profile
+8. Consider their preferred work environment and career goals
+9. Suggest both traditional and emerging career paths
+10. Include opportunities for growth and advancement
+
+Ensure the response is valid JSON and follows this exact structure. Provide detailed and specific recommendations based on the person's answers.
+"""
+
+COMPACT_SYSTEM_PROMPT = "You are a career counselor for fresh graduates. Reply with specific, actionable career guidance as valid JSON."
+
+COMPACT_HEADER = "Analyze these career assessment answers from a fresh graduate.\n\nAnswers:\n"
+
+COMPACT_SCHEMA = """
+Return JSON with exactly these keys:
+{"profile_summary":str,"strengths":[str],"areas_for_development":[str],"recommended_paths":[{"title":str,"description":str,"required_skills":[str],"learning_resources":[str],"next_steps":[str]}]}
+Base everything on the answers: cite them in strengths, give concrete development suggestions, realistic traditional and emerging paths, free and paid resources matched to the learning style, and measurable short- and long-term next steps.
+"""
+
+
+# Per-section schemas used when re-requesting only the sections that were
+# missing or malformed in a response
+SECTION_SCHEMAS = {
+    "profile_summary": '"profile_summary": "A detailed summary of the person\'s profile, including their skills, work style, and career aspirations"',
+    "strengths": '"strengths": ["Key strengths identified from their answers, with specific examples"]',
+    "areas_for_development": '"areas_for_development": ["Areas to improve, each with a specific development suggestion"]',
+    "recommended_paths": '"recommended_paths": [{"title": "Career path title", "description": "Why this path suits them", "required_skills": ["..."], "learning_resources": ["Specific free and paid resources"], "next_steps": ["Specific, measurable actions"]}]',
+}
+
+REPAIR_INSTRUCTIONS = """
+An earlier analysis of these answers is missing valid values for: {sections}.
+Sections that are already complete, for consistency:
+{context}
+
+Return a JSON object with only these keys:
+{{
+{schemas}
+}}
+"""
+
+SEED_INSTRUCTIONS = """
+Below is an analysis written for someone whose answers differ from these only in:
+{changes}
+
+Earlier analysis:
+{context}
+
+Adapt it to the answers above. Return a JSON object with only the sections that must change ({sections}), each complete and in the same format. Leave out sections that still fit as they are; return {{}} if nothing needs to change.
+"""
+
+
+def count_tokens(text):
+    """
+    Returns the number of tokens in text.
+
+    Uses tiktoken when it is installed and falls back to the usual estimate
+    of four characters per token otherwise.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model(config.OPENAI_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def format_answers(answers):
+    """
+    Formats answers as the Q/A block embedded in the analysis prompt.
+    """
+    return "\n".join([
+        f"Q: {question}\nA: {answer}\n"
+        for question, answer in answer_pairs(answers)
+    ])
+
+
+class RenderedPrompt:
+    """
+    Chat messages for one analysis request and their token count.
+    """
+
+    def __init__(self, messages, token_count, render_seconds):
+        self.messages = messages
+        self.token_count = token_count
+        self.render_seconds = render_seconds
+
+    @property
+    def user_prompt(self):
+        return self.messages[-1]["content"]
+
+
+class PromptEngine:
+    """
+    Renders analysis prompts from precompiled static parts.
+
+    The system prompt, header and schema are assembled and token-counted once
+    at construction; each render only formats the answer block and counts its
+    tokens, so token counts are exact up to the boundaries between parts.
+    """
+
+    def __init__(self, compact=False):
+        self.compact = compact
+        self.version = f"{config.PROMPT_VERSION}-compact" if compact else config.PROMPT_VERSION
+        self.system_prompt = COMPACT_SYSTEM_PROMPT if compact else SYSTEM_PROMPT
+        self._header = COMPACT_HEADER if compact else PROMPT_HEADER
+        self._schema = COMPACT_SCHEMA if compact else FULL_SCHEMA
+        self._static_tokens = (
+            count_tokens(self.system_prompt)
+            + count_tokens(self._header)
+            + count_tokens(self._schema)
+        )
+
+    def render(self, answers):
+        """
+        Builds the chat messages for a set of answers.
+
+        Args:
+            answers: The assessment answers (dict or list of question/answer items)
+
+        Returns:
+            RenderedPrompt: The messages and their token count
+        """
+        start = time.perf_counter()
+        answer_block = format_answers(answers)
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": "".join((self._header, answer_block, self._schema))}
+        ]
+        token_count = self._static_tokens + count_tokens(answer_block)
+        return RenderedPrompt(messages, token_count, time.perf_counter() - start)
+
+
+    def render_repair(self, answers, sections, partial):
+        """
+        Builds messages that re-request only the given sections.
+
+        Args:
+            answers: The assessment answers (dict or list of question/answer items)
+            sections (list): Names of the sections to regenerate
+            partial (dict): The sections that are already valid
+
+        Returns:
+            RenderedPrompt: The messages and their token count
+        """
+        start = time.perf_counter()
+        context = json.dumps(
+            {key: value for key, value in partial.items() if key in SECTION_SCHEMAS},
+            ensure_ascii=False, separators=(",", ":")
+        )
+        instructions = REPAIR_INSTRUCTIONS.format(
+            sections=", ".join(sections),
+            context=context,
+            schemas=",\n".join(f"    {SECTION_SCHEMAS[name]}" for name in sections)
+        )
+        answer_block = format_answers(answers)
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": "".join((self._header, answer_block, instructions))}
+        ]
+        token_count = (
+            count_tokens(self.system_prompt) + count_tokens(self._header)
+            + count_tokens(answer_block) + count_tokens(instructions)
+        )
+        return RenderedPrompt(messages, token_count, time.perf_counter() - start)
+
+    def render_seed(self, answers, changes, seed):
+        """
+        Builds messages that adapt an analysis written for similar answers.
+
+        The model returns only the sections that need to change, so the
+        completion budget can be a fraction of a full analysis.
+
+        Args:
+            answers: The assessment answers (dict or list of question/answer items)
+            changes (list): (question, earlier answer, current answer) for each
+                question answered differently; either answer may be None
+            seed (dict): The analysis to adapt
+
+        Returns:
+            RenderedPrompt: The messages and their token count
+        """
+        start = time.perf_counter()
+        context = json.dumps(
+            {key: value for key, value in seed.items() if key in SECTION_SCHEMAS},
+            ensure_ascii=False, separators=(",", ":")
+        )
+        instructions = SEED_INSTRUCTIONS.format(
+            changes="\n".join(
+                f"Q: {question}\nEarlier: {earlier or '(not answered)'}\nNow: {current or '(not answered)'}"
+                for question, earlier, current in changes
+            ),
+            context=context,
+            sections=", ".join(SECTION_SCHEMAS)
+        )
+        answer_block = format_answers(answers)
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": "".join((self._header, answer_block, instructions))}
+        ]
+        token_count = (
+            count_tokens(self.system_prompt) + count_tokens(self._header)
+            + count_tokens(answer_block) + count_tokens(instructions)
+        )
+        return RenderedPrompt(messages, token_count, time.perf_counter() - start)
+
+
+_engines = {}
+
+
+def get_prompt_engine(compact=None):
+    """
+    Returns the shared prompt engine (default mode: config.PROMPT_MODE).
+    """
+    if compact is None:
+        compact = config.PROMPT_MODE == "compact"
+    if compact not in _engines:
+        _engines[compact] = PromptEngine(compact=compact)
+    return _engines[compact]
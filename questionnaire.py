@@ -0,0 +1,338 @@
+import itertools
+import json
+import config
+
+
+class QuestionnaireError(ValueError):
+    """
+    Raised when question definitions are malformed.
+    """
+
+
+class Question:
+    """
+    One parsed question: its category key, text and numbered options.
+    """
+
+    def __init__(self, category, data):
+        self.category = category
+        self.text = data["question"]
+        self.options = dict(data["options"])
+        self.data = data
+
+    def option_text(self, choice):
+        """
+        Returns the option text for a choice number, or None if it is not valid.
+        """
+        return self.options.get(str(choice).strip())
+
+
+class Category:
+    def __init__(self, key, title, questions):
+        self.key = key
+        self.title = title
+        self.questions = questions
+
+
+class Questionnaire:
+    """
+    Question definitions, parsed and validated once.
+
+    Checks that every category has a title and questions, that every question
+    has unique text and options numbered "1".."n" with distinct texts, and
+    that career-path affinities only refer to known questions, options and
+    paths, so a broken config fails at load time instead of mid-assessment.
+
+    The raw category and affinity dicts stay available as `definitions` and
+    `affinities`, in the config.ASSESSMENT_CATEGORIES and
+    config.CAREER_PATH_AFFINITIES shapes, for components that take those,
+    along with the `career_paths` they were checked against.
+    """
+
+    def __init__(self, categories=None, affinities=None, career_paths=None):
+        categories = config.ASSESSMENT_CATEGORIES if categories is None else categories
+        affinities = config.CAREER_PATH_AFFINITIES if affinities is None else affinities
+        career_paths = config.CAREER_PATHS if career_paths is None else career_paths
+        self.definitions = categories
+        self.affinities = affinities
+        self.career_paths = career_paths
+        errors = []
+        self.categories = []
+        self.questions = []
+        self._by_text = {}
+        if not isinstance(categories, dict) or not categories:
+            raise QuestionnaireError("Questionnaire has no categories")
+
+        for key, data in categories.items():
+            if not isinstance(data, dict) or not data.get("title"):
+                errors.append(f"category {key!r} has no title")
+                continue
+            if not data.get("questions"):
+                errors.append(f"category {key!r} has no questions")
+                continue
+            questions = []
+            for position, question_data in enumerate(data["questions"], 1):
+                problem = _question_problem(question_data)
+                if problem:
+                    errors.append(f"question {position} in {key!r} {problem}")
+                    continue
+                question = Question(key, question_data)
+                if question.text in self._by_text:
+                    errors.append(f"question {question.text!r} is defined twice")
+                    continue
+                self._by_text[question.text] = question
+                questions.append(question)
+            self.categories.append(Category(key, data["title"], questions))
+            self.questions.extend(questions)
+
+        for text, options in affinities.items():
+            question = self._by_text.get(text)
+            if question is None:
+                errors.append(f"affinities refer to unknown question {text!r}")
+                continue
+            if not isinstance(options, dict) or not all(isinstance(weights, dict) for weights in options.values()):
+                errors.append(f"affinities for {text!r} must map option numbers to {{path: weight}}")
+                continue
+            for choice, weights in options.items():
+                if choice not in question.options:
+                    errors.append(f"affinities refer to unknown option {choice!r} of {text!r}")
+                unknown = set(weights) - set(career_paths)
+                if unknown:
+                    errors.append(f"affinities for {text!r} refer to unknown paths {sorted(unknown)}")
+
+        if errors:
+            raise QuestionnaireError("Invalid questionnaire: " + "; ".join(errors))
+
+    def question(self, text):
+        """
+        Returns the Question with the given text, or None.
+        """
+        return self._by_text.get(text)
+
+
+def _question_problem(question_data):
+    if not isinstance(question_data, dict) or not question_data.get("question"):
+        return "has no text"
+    options = question_data.get("options")
+    if not isinstance(options, dict) or len(options) < 2:
+        return "needs at least two options"
+    if list(options) != [str(number) for number in range(1, len(options) + 1)]:
+        return 'must number its options "1".."n" in order'
+    if not all(options.values()) or len(set(options.values())) != len(options):
+        return "has empty or duplicate options"
+    return None
+
+
+def _read_bank_records(path):
+    with open(path, encoding="utf-8") as f:
+        if not path.endswith(".jsonl"):
+            return json.load(f)
+        records = []
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise QuestionnaireError(f"{path}:{line_number}: {e}")
+        return {"questions": records}
+
+
+def load_question_bank(path, career_paths=None):
+    """
+    Loads and validates a question bank file.
+
+    A .json bank holds {"categories": {key: {"title": ..., "questions": [...]}}}
+    in the config.ASSESSMENT_CATEGORIES shape. A .jsonl bank holds one question
+    per line with "category" and "category_title" fields, which suits banks of
+    hundreds of generated or exported items. In both, a question may carry
+    its own "affinities" ({option number: {path key: weight}}), which are
+    merged into the bank's affinity table.
+
+    Args:
+        path (str): Path to a .json or .jsonl file
+        career_paths (dict): Known career paths (default: config.CAREER_PATHS)
+
+    Returns:
+        Questionnaire: The validated bank
+
+    Raises:
+        QuestionnaireError: If the file cannot be parsed or the bank is invalid
+    """
+    try:
+        data = _read_bank_records(path)
+    except (OSError, json.JSONDecodeError) as e:
+        raise QuestionnaireError(f"Cannot read question bank {path}: {e}")
+    if not isinstance(data, dict):
+        raise QuestionnaireError(f"Question bank {path} must be a JSON object")
+
+    categories = {}
+    for key, category in (data.get("categories") or {}).items():
+        if not isinstance(category, dict):
+            raise QuestionnaireError(f"Category {key!r} in {path} must be an object")
+        categories[key] = {**category, "questions": list(category.get("questions") or [])}
+    for record in data.get("questions") or []:
+        if not isinstance(record, dict) or not record.get("category"):
+            raise QuestionnaireError(f"Every question in {path} needs a category")
+        record = dict(record)
+        key = record.pop("category")
+        category = categories.setdefault(key, {"title": record.get("category_title") or key, "questions": []})
+        record.pop("category_title", None)
+        category["questions"].append(record)
+
+    affinities = dict(data.get("affinities") or {})
+    for category in categories.values():
+        questions = []
+        for question_data in category["questions"]:
+            if isinstance(question_data, dict) and "affinities" in question_data:
+                question_data = dict(question_data)
+                affinities[question_data.get("question")] = question_data.pop("affinities")
+            questions.append(question_data)
+        category["questions"] = questions
+    return Questionnaire(categories, affinities, career_paths)
+
+
+_questionnaire = None
+
+
+def get_questionnaire():
+    """
+    Returns the process-wide Questionnaire: the bank at
+    config.QUESTION_BANK_PATH when set, else config.ASSESSMENT_CATEGORIES.
+
+    Raises:
+        QuestionnaireError: If the configured questions are invalid
+    """
+    global _questionnaire
+    if _questionnaire is None:
+        if config.QUESTION_BANK_PATH:
+            _questionnaire = load_question_bank(config.QUESTION_BANK_PATH)
+        else:
+            _questionnaire = Questionnaire()
+    return _questionnaire
+
+
+def iter_questions(categories=None):
+    """
+    Yields (category_key, question_data) for every question in order.
+
+    Args:
+        categories (dict): Question categories (default: the validated
+            questions from get_questionnaire())
+    """
+    if categories is None:
+        for question in get_questionnaire().questions:
+            yield question.category, question.data
+        return
+    for category, data in categories.items():
+        for question_data in data["questions"]:
+            yield category, question_data
+
+
+def answer_pairs(answers):
+    """
+    Returns (question, answer) pairs in their original order.
+
+    Args:
+        answers: A dict of question -> answer, or an iterable of objects/dicts
+            with "question" and "answer" fields
+    """
+    if isinstance(answers, dict):
+        return list(answers.items())
+    pairs = []
+    for answer in answers:
+        if isinstance(answer, dict):
+            pairs.append((answer["question"], answer["answer"]))
+        else:
+            pairs.append((answer.question, answer.answer))
+    return pairs
+
+
+def count_answer_sets(categories=None):
+    """
+    Returns the number of distinct complete answer sets.
+    """
+    total = 1
+    for _, question_data in iter_questions(categories):
+        total *= len(question_data["options"])
+    return total
+
+
+def iter_answer_sets(categories=None):
+    """
+    Enumerates every complete answer set in a deterministic order.
+
+    Yields:
+        dict: question -> option text, one entry per question
+    """
+    questions = [question_data for _, question_data in iter_questions(categories)]
+    option_lists = [list(question_data["options"].values()) for question_data in questions]
+    for combination in itertools.product(*option_lists):
+        yield {
+            question_data["question"]: option
+            for question_data, option in zip(questions, combination)
+        }
+
+
+def _normalize_text(text):
+    return " ".join(str(text).split())
+
+
+class AnswerEncoder:
+    """
+    Maps answer sets to one-hot vectors over every (question, option) pair.
+
+    Answers may give either the option text or the option number.
+    Unknown questions and options are ignored.
+    """
+
+    def __init__(self, categories=None):
+        self.features = []
+        self.questions = []
+        self.feature_question = []
+        self._index = {}
+        for _, question_data in iter_questions(categories):
+            question = _normalize_text(question_data["question"])
+            question_index = len(self.questions)
+            self.questions.append(question_data["question"])
+            for option_num, option_text in question_data["options"].items():
+                feature = len(self.features)
+                self.features.append((question_data["question"], option_num, option_text))
+                self.feature_question.append(question_index)
+                self._index[(question, _normalize_text(option_text))] = feature
+                self._index[(question, str(option_num))] = feature
+
+    @property
+    def size(self):
+        return len(self.features)
+
+    def indices(self, answers):
+        """
+        Returns the feature indices selected by an answer set.
+        """
+        selected = []
+        for question, answer in answer_pairs(answers):
+            feature = self._index.get((_normalize_text(question), _normalize_text(answer)))
+            if feature is not None:
+                selected.append(feature)
+        return selected
+
+    def encode(self, answers):
+        """
+        Returns the one-hot float32 vector for an answer set.
+        """
+        # numpy is only needed for encoding; plain questionnaire use skips it
+        import numpy as np
+        vector = np.zeros(self.size, dtype=np.float32)
+        vector[self.indices(answers)] = 1.0
+        return vector
+
+    def encode_many(self, answer_sets):
+        """
+        Returns a (len(answer_sets), size) matrix of one-hot rows.
+        """
+        import numpy as np
+        matrix = np.zeros((len(answer_sets), self.size), dtype=np.float32)
+        for row, answers in enumerate(answer_sets):
+            matrix[row, self.indices(answers)] = 1.0
+        return matrix
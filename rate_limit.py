@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import config
+import metrics
+
+GLOBAL_TOKENS_KEY = "global:tokens"
+
+
+class RateLimited(Exception):
+    """
+    Raised when a request would have to wait longer than allowed for a bucket.
+    """
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(
+            "Too many requests from this client" if scope == "client"
+            else "LLM token budget exhausted, try again later"
+        )
+
+
+class RequestTooLarge(Exception):
+    """
+    Raised when a request needs more LLM tokens than the budget holds, so no
+    amount of waiting would admit it.
+    """
+
+    def __init__(self, tokens, limit):
+        self.tokens = tokens
+        self.limit = limit
+        super().__init__(
+            f"Request needs about {tokens} LLM tokens, more than the budget of {limit:g} per minute"
+        )
+
+
+def take_tokens(tokens, updated_at, now, amount, rate, capacity, max_wait):
+    """
+    Refills a token bucket and tries to take amount from it.
+
+    When the bucket is short but the shortfall refills within max_wait, the
+    tokens are taken anyway and the balance goes negative; the caller waits
+    until it is covered. Later callers see the debt and queue behind it.
+    A negative amount gives tokens back, up to capacity.
+
+    Args:
+        tokens (float): Balance at updated_at
+        updated_at (float): Time of the last update
+        now (float): Current time, on the same clock
+        amount (float): Tokens requested
+        rate (float): Refill rate in tokens per second
+        capacity (float): Bucket size (the burst allowance)
+        max_wait (float): Longest acceptable wait in seconds
+
+    Returns:
+        tuple: (new balance, seconds to wait, admitted)
+    """
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= amount:
+        return min(tokens - amount, capacity), 0.0, True
+    wait = (amount - tokens) / rate
+    if wait <= max_wait:
+        return tokens - amount, wait, True
+    return tokens, wait, False
+
+
+class RateLimitBackend:
+    """
+    Storage for token buckets.
+
+    acquire() must refill and update a bucket atomically (see take_tokens),
+    so that every worker sharing the backend sees the same balances. A
+    bucket that does not exist yet starts full.
+    """
+
+    async def acquire(self, key, amount, rate, capacity, max_wait):
+        """
+        Returns (seconds to wait, admitted) for amount tokens from bucket key.
+        """
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local buckets, for single-worker deployments. At most max_keys
+    buckets are kept; the least recently used is dropped (and starts full
+    again) when a new client arrives.
+    """
+
+    def __init__(self, max_keys=None):
+        self.max_keys = config.RATE_LIMIT_MAX_KEYS if max_keys is None else max_keys
+        self._buckets = OrderedDict()
+
+    async def acquire(self, key, amount, rate, capacity, max_wait):
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens, wait, admitted = take_tokens(tokens, updated_at, now, amount, rate, capacity, max_wait)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait, admitted
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in a SQLite file shared by every worker process on the host.
+
+    Each acquire runs in one immediate transaction on a worker thread, so
+    concurrent workers serialize on the database lock. Buckets idle for an
+    hour are full again, so they are pruned every PRUNE_EVERY acquires.
+    """
+
+    PRUNE_EVERY = 1000
+    IDLE_SECONDS = 3600
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._calls = 0
+
+    def _acquire(self, key, amount, rate, capacity, max_wait):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Wall-clock time, since the buckets are shared between processes
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens, wait, admitted = take_tokens(tokens, updated_at, now, amount, rate, capacity, max_wait)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                self._calls += 1
+                if self._calls % self.PRUNE_EVERY == 0:
+                    self._conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - self.IDLE_SECONDS,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait, admitted
+
+    async def acquire(self, key, amount, rate, capacity, max_wait):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._acquire, key, amount, rate, capacity, max_wait)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def client_key(headers, client_host):
+    """
+    Identifies the client a request is charged to.
+
+    Uses the API key header when present (hashed, so keys never sit in
+    memory or on disk), else the first X-Forwarded-For address when
+    config.RATE_LIMIT_TRUST_FORWARDED is set, else the peer address.
+    """
+    api_key = headers.get(config.RATE_LIMIT_API_KEY_HEADER)
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+    if config.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return "ip:" + forwarded
+    return "ip:" + (client_host or "unknown")
+
+
+class RateLimiter:
+    """
+    Admission control for LLM-backed requests.
+
+    Every client has a token bucket of `burst` requests refilled at
+    requests_per_minute, and all clients share a bucket of LLM tokens
+    refilled at tokens_per_minute, charged with each request's estimated
+    prompt and completion tokens. A request that fits within max_wait
+    seconds of refill waits for it (queued); otherwise RateLimited is raised
+    with the number of seconds after which it would fit. A limit of 0
+    disables that bucket.
+
+    Args:
+        backend (RateLimitBackend): Bucket storage (default: config.RATE_LIMIT_BACKEND)
+    """
+
+    def __init__(self, backend=None, requests_per_minute=None, burst=None, tokens_per_minute=None, max_wait=None):
+        self.backend = build_backend() if backend is None else backend
+        self.requests_per_minute = (
+            config.RATE_LIMIT_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        )
+        self.burst = config.RATE_LIMIT_BURST if burst is None else burst
+        self.tokens_per_minute = config.RATE_LIMIT_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.max_wait = config.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"client": 0, "tokens": 0, "too_large": 0}
+        self.wait_seconds = 0.0
+
+    async def _take(self, scope, key, amount, per_minute, capacity, max_wait):
+        wait, admitted = await self.backend.acquire(key, amount, per_minute / 60, capacity, max_wait)
+        if not admitted:
+            self.rejected[scope] += 1
+            metrics.RATE_LIMIT_DECISIONS.inc(outcome="rejected_" + scope)
+            raise RateLimited(scope, max(1, math.ceil(wait)))
+        return wait
+
+    async def admit(self, client, tokens):
+        """
+        Admits one request, waiting if it has to queue.
+
+        Args:
+            client (str): Key from client_key()
+            tokens (int): Estimated LLM tokens; 0 for requests that will not
+                reach the model
+
+        Raises:
+            RequestTooLarge: If tokens exceeds the whole token budget
+            RateLimited: If the client or the token budget is over its limit
+                for longer than max_wait
+        """
+        if tokens and 0 < self.tokens_per_minute < tokens:
+            self.rejected["too_large"] += 1
+            metrics.RATE_LIMIT_DECISIONS.inc(outcome="rejected_too_large")
+            raise RequestTooLarge(tokens, self.tokens_per_minute)
+        wait = 0.0
+        client_key = "client:" + client
+        if self.requests_per_minute > 0:
+            wait = await self._take("client", client_key, 1, self.requests_per_minute, self.burst, self.max_wait)
+        if tokens and self.tokens_per_minute > 0:
+            try:
+                # The client wait overlaps with the token wait, so only the rest counts
+                wait = max(wait, await self._take(
+                    "tokens", GLOBAL_TOKENS_KEY, tokens, self.tokens_per_minute, self.tokens_per_minute,
+                    self.max_wait - wait))
+            except RateLimited:
+                # Not the client's fault: give its request back, so a drained
+                # budget does not also use up every client's quota
+                await self.refund(client, 0)
+                raise
+        await self._wait(wait)
+
+    async def refund(self, client, tokens):
+        """
+        Gives back what admit() charged, for a request that was admitted but
+        could not run after all (for example because the job queue is full).
+        """
+        if self.requests_per_minute > 0:
+            await self.backend.acquire("client:" + client, -1, self.requests_per_minute / 60, self.burst, 0)
+        if tokens and self.tokens_per_minute > 0:
+            await self.backend.acquire(
+                GLOBAL_TOKENS_KEY, -tokens, self.tokens_per_minute / 60, self.tokens_per_minute, 0)
+
+    async def acquire_tokens(self, tokens):
+        """
+        Takes tokens from the shared budget, waiting as long as it takes.
+        For work that cannot be rejected halfway, such as batch rows.
+        """
+        if tokens and self.tokens_per_minute > 0:
+            await self._wait(await self._take(
+                "tokens", GLOBAL_TOKENS_KEY, tokens, self.tokens_per_minute, self.tokens_per_minute, math.inf))
+        else:
+            await self._wait(0.0)
+
+    async def _wait(self, wait):
+        self.admitted += 1
+        metrics.RATE_LIMIT_DECISIONS.inc(outcome="queued" if wait > 0 else "admitted")
+        if wait > 0:
+            self.queued += 1
+            self.wait_seconds += wait
+            with metrics.stage("rate_limit_wait"):
+                await asyncio.sleep(wait)
+
+    def stats(self):
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "average_wait_seconds": self.wait_seconds / self.queued if self.queued else 0.0,
+        }
+
+
+def build_backend():
+    """
+    Creates the bucket backend named by config.RATE_LIMIT_BACKEND.
+    """
+    if config.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitBackend(config.RATE_LIMIT_DB_PATH)
+    if config.RATE_LIMIT_BACKEND == "memory":
+        return InMemoryRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {config.RATE_LIMIT_BACKEND}")
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """
+    Returns the process-wide RateLimiter.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
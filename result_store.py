@@ -0,0 +1,207 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import config
+from cache import answer_hash, normalize_answers
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStore:
+    """
+    Append-only store of completed assessments backed by SQLite.
+
+    Records are indexed by assessment ID, answer hash and creation time.
+    add() only enqueues the record; a background thread writes queued
+    records in batches, so request handlers never wait on disk I/O. Records
+    that are still queued are served from memory by get().
+    """
+
+    def __init__(self, path, batch_size=None, flush_interval=None):
+        self.path = path
+        self.batch_size = batch_size or config.RESULT_STORE_BATCH_SIZE
+        self.flush_interval = flush_interval or config.RESULT_STORE_FLUSH_SECONDS
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            "id TEXT PRIMARY KEY, answer_hash TEXT NOT NULL, created_at REAL NOT NULL, "
+            "answers TEXT NOT NULL, analysis TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_answer_hash ON assessments (answer_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_created_at ON assessments (created_at)")
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+        self._writer.start()
+
+    def add(self, answers, analysis):
+        """
+        Records a completed assessment.
+
+        Args:
+            answers: The assessment answers (dict or list of question/answer items)
+            analysis (dict): The generated analysis
+
+        Returns:
+            dict: The stored record, including its new "id"
+        """
+        record = {
+            "id": uuid.uuid4().hex,
+            "answer_hash": answer_hash(answers),
+            "created_at": time.time(),
+            "answers": normalize_answers(answers),
+            "analysis": analysis,
+        }
+        with self._pending_lock:
+            self._pending[record["id"]] = record
+        self._queue.put(record)
+        return record
+
+    def get(self, assessment_id):
+        """
+        Returns the record for assessment_id, or None if it does not exist.
+        """
+        with self._pending_lock:
+            record = self._pending.get(assessment_id)
+        if record is not None:
+            return record
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT id, answer_hash, created_at, answers, analysis FROM assessments WHERE id = ?",
+                (assessment_id,)
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def find_by_answer_hash(self, digest, limit=10):
+        """
+        Returns the most recent stored records for an answer hash.
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, answer_hash, created_at, answers, analysis FROM assessments "
+                "WHERE answer_hash = ? ORDER BY created_at DESC LIMIT ?",
+                (digest, limit)
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def list_since(self, since, limit=100):
+        """
+        Returns stored records created at or after the given timestamp.
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, answer_hash, created_at, answers, analysis FROM assessments "
+                "WHERE created_at >= ? ORDER BY created_at LIMIT ?",
+                (since, limit)
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def recent(self, limit=100):
+        """
+        Returns the most recently written records, newest first.
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, answer_hash, created_at, answers, analysis FROM assessments "
+                "ORDER BY created_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def flush(self):
+        """
+        Blocks until every record added so far has been written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Writes outstanding records and stops the writer thread.
+        """
+        self._queue.put(None)
+        self._writer.join()
+        with self._db_lock:
+            self._conn.close()
+
+    def _row_to_record(self, row):
+        return {
+            "id": row[0],
+            "answer_hash": row[1],
+            "created_at": row[2],
+            "answers": json.loads(row[3]),
+            "analysis": json.loads(row[4]),
+        }
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+            records = [record for record in batch if record is not None]
+            try:
+                if records:
+                    self._write_batch(records)
+            except sqlite3.Error as error:
+                logger.error("Failed to write %d assessments: %s", len(records), error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, records):
+        rows = [
+            (
+                record["id"],
+                record["answer_hash"],
+                record["created_at"],
+                json.dumps(record["answers"], ensure_ascii=False),
+                json.dumps(record["analysis"], ensure_ascii=False),
+            )
+            for record in records
+        ]
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT INTO assessments (id, answer_hash, created_at, answers, analysis) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        with self._pending_lock:
+            for record in records:
+                self._pending.pop(record["id"], None)
+
+
+_result_store = None
+
+
+def get_result_store():
+    """
+    Returns the process-wide result store configured from config.py.
+    """
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore(config.RESULT_STORE_PATH)
+    return _result_store
+
+
+def close_result_store():
+    global _result_store
+    if _result_store is not None:
+        _result_store.close()
+    _result_store = None
@@ -0,0 +1,152 @@
+import numpy as np
+import config
+from questionnaire import AnswerEncoder, get_questionnaire
+
+
+def _option_label(option_text):
+    return option_text.split(" - ")[0].strip()
+
+
+class RuleEngine:
+    """
+    Deterministic career-path matching from the questionnaire affinities
+    (config.CAREER_PATH_AFFINITIES, or the question bank when one is set).
+
+    Answers are one-hot encoded and multiplied by a precomputed
+    (options x paths) weight matrix, then normalized by the best score
+    reachable for the questions that were answered. No network calls are
+    made, so this serves as an instant preview and as the fallback when the
+    LLM is unavailable.
+    """
+
+    def __init__(self, categories=None, career_paths=None, affinities=None):
+        categories = get_questionnaire().definitions if categories is None else categories
+        self.career_paths = config.CAREER_PATHS if career_paths is None else career_paths
+        affinities = get_questionnaire().affinities if affinities is None else affinities
+        self.encoder = AnswerEncoder(categories)
+        self.path_keys = list(self.career_paths)
+        path_index = {key: i for i, key in enumerate(self.path_keys)}
+
+        self.weights = np.zeros((self.encoder.size, len(self.path_keys)), dtype=np.float32)
+        for feature, (question, option_num, _) in enumerate(self.encoder.features):
+            for path_key, weight in affinities.get(question, {}).get(option_num, {}).items():
+                self.weights[feature, path_index[path_key]] = weight
+
+        # Best achievable weight per (question, path), for normalization
+        self._feature_question = np.array(self.encoder.feature_question, dtype=np.intp)
+        self.question_max = np.zeros((len(self.encoder.questions), len(self.path_keys)), dtype=np.float32)
+        np.maximum.at(self.question_max, self._feature_question, self.weights)
+
+        self._skill_questions = {
+            question_data["question"]
+            for question_data in categories.get("skills_and_experience", {}).get("questions", [])
+        }
+
+    def score_matrix(self, encoded):
+        """
+        Scores one-hot rows against every path.
+
+        Args:
+            encoded (np.ndarray): (n, options) one-hot matrix from AnswerEncoder
+
+        Returns:
+            np.ndarray: (n, paths) match scores between 0 and 1
+        """
+        raw = encoded @ self.weights
+        answered = np.zeros((encoded.shape[0], len(self.encoder.questions)), dtype=np.float32)
+        rows, features = np.nonzero(encoded)
+        answered[rows, self._feature_question[features]] = 1.0
+        reachable = answered @ self.question_max
+        return np.divide(raw, reachable, out=np.zeros_like(raw), where=reachable > 0)
+
+    def score(self, answers):
+        """
+        Returns {path_key: score} for one answer set, best match first.
+        """
+        scores = self.score_matrix(self.encoder.encode(answers)[np.newaxis, :])[0]
+        order = np.argsort(-scores, kind="stable")
+        return {self.path_keys[i]: float(scores[i]) for i in order}
+
+    def analyze(self, answers, top_n=3):
+        """
+        Builds a structured analysis in the config.OUTPUT_FORMAT shape.
+
+        Args:
+            answers: The assessment answers (dict or list of question/answer items)
+            top_n (int): Number of recommended paths to include
+
+        Returns:
+            dict: The analysis, with "source" set to "rules"
+        """
+        encoded = self.encoder.encode(answers)
+        scores = self.score(answers)
+        ranked = list(scores)[:top_n]
+        top_key = ranked[0]
+        top_column = self.path_keys.index(top_key)
+        selected = [int(i) for i in np.nonzero(encoded)[0]]
+
+        labels = [_option_label(self.encoder.features[i][2]) for i in selected]
+        if not selected:
+            summary = "Not enough recognized answers yet to match you with a career path."
+        else:
+            summary = (
+                f"Your answers point most strongly to {self.career_paths[top_key]['title']} "
+                f"({scores[top_key]:.0%} match)"
+            )
+            if len(ranked) > 1:
+                second = ranked[1]
+                summary += f", followed by {self.career_paths[second]['title']} ({scores[second]:.0%} match)"
+            summary += ". Key traits from your answers: " + "; ".join(labels) + "."
+
+        # Answers that contributed most to the best match are the strengths
+        contributions = sorted(selected, key=lambda i: -self.weights[i, top_column])
+        strengths = [
+            self.encoder.features[i][2] for i in contributions[:3]
+            if self.weights[i, top_column] > 0
+        ]
+
+        areas = [
+            f"Build practical experience in {skill} for {self.career_paths[top_key]['title']}"
+            for skill in self.career_paths[top_key]["skills"]
+        ]
+        for i in selected:
+            question, option_num, option_text = self.encoder.features[i]
+            if option_num == "1" and question in self._skill_questions:
+                areas.append(f"Grow beyond the '{_option_label(option_text)}' level: {question}")
+
+        recommended_paths = []
+        for path_key in ranked:
+            path = self.career_paths[path_key]
+            skills = path["skills"]
+            recommended_paths.append({
+                "title": path["title"],
+                "description": f"{path['description']}. {scores[path_key]:.0%} match with your answers.",
+                "required_skills": list(skills),
+                "learning_resources": list(path.get("learning_resources", [])),
+                "next_steps": [
+                    f"Complete one introductory course or tutorial in {skills[0]}",
+                    f"Build a small portfolio project that demonstrates {skills[-1]}",
+                    f"Talk to someone working in {path['title']} about their day-to-day work"
+                ]
+            })
+
+        return {
+            "profile_summary": summary,
+            "strengths": strengths,
+            "areas_for_development": areas,
+            "recommended_paths": recommended_paths,
+            "source": "rules"
+        }
+
+
+_rule_engine = None
+
+
+def get_rule_engine():
+    """
+    Returns the shared rule engine for the configured questionnaire.
+    """
+    global _rule_engine
+    if _rule_engine is None:
+        _rule_engine = RuleEngine()
+    return _rule_engine
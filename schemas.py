@@ -0,0 +1,124 @@
+import json
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from stream_parser import ITEMIZED_SECTIONS, SectionStreamParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class InvalidAnalysisError(Exception):
+    """
+    Raised when model output still lacks required sections after repair.
+    """
+
+
+class CareerPath(BaseModel):
+    title: str
+    description: str
+    required_skills: List[str]
+    learning_resources: List[str]
+    next_steps: List[str]
+
+
+class Analysis(BaseModel):
+    """
+    A career analysis in the config.OUTPUT_FORMAT shape.
+
+    Extra keys (such as "source") are kept.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    profile_summary: str = Field(min_length=1)
+    strengths: List[str] = Field(min_length=1)
+    areas_for_development: List[str] = Field(min_length=1)
+    recommended_paths: List[CareerPath] = Field(min_length=1)
+
+
+REQUIRED_SECTIONS = list(Analysis.model_fields)
+
+_section_adapters = {
+    name: TypeAdapter(field.annotation) for name, field in Analysis.model_fields.items()
+}
+_path_adapter = TypeAdapter(CareerPath)
+
+
+def loads(text):
+    """
+    Parses JSON with orjson when it is installed, else the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _salvage(text):
+    # Recover every complete section from truncated or malformed output
+    data = {}
+    for event in SectionStreamParser().feed(text):
+        if "item" in event:
+            data.setdefault(event["section"], []).append(event["item"])
+        else:
+            data[event["section"]] = event["value"]
+    return data
+
+
+def parse_analysis(text):
+    """
+    Parses and validates model output section by section.
+
+    Valid sections are kept even when others are missing or malformed; for
+    recommended_paths, individual invalid entries are dropped. Truncated
+    output is salvaged up to the last complete section.
+
+    Args:
+        text (str): Raw completion content
+
+    Returns:
+        tuple: (data, invalid_sections) where data holds the valid sections
+            and invalid_sections lists the required ones still needed
+    """
+    try:
+        raw = loads(text)
+    except ValueError:
+        raw = _salvage(text)
+    if not isinstance(raw, dict):
+        raw = {}
+
+    data = {}
+    invalid = []
+    for name in REQUIRED_SECTIONS:
+        value = raw.get(name)
+        if name == "recommended_paths" and isinstance(value, list):
+            value = [item for item in value if _is_valid_path(item)]
+        try:
+            data[name] = _section_adapters[name].validate_python(value)
+        except ValidationError:
+            invalid.append(name)
+            continue
+        if name in ITEMIZED_SECTIONS and not data[name]:
+            del data[name]
+            invalid.append(name)
+        elif name == "profile_summary" and not data[name].strip():
+            del data[name]
+            invalid.append(name)
+    data.update((key, value) for key, value in raw.items() if key not in REQUIRED_SECTIONS)
+    return _dump(data), invalid
+
+
+def _is_valid_path(item):
+    try:
+        _path_adapter.validate_python(item)
+        return True
+    except ValidationError:
+        return False
+
+
+def _dump(data):
+    return {
+        key: [path.model_dump() for path in value] if key == "recommended_paths" else value
+        for key, value in data.items()
+    }
+
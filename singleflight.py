@@ -0,0 +1,142 @@
+import asyncio
+
+
+class _Broadcast:
+    """
+    Items produced by one shared stream, replayed to every subscriber.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def publish(self, item):
+        self.items.append(item)
+        self._notify()
+
+    def finish(self, error=None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same task and receive the same
+    result or exception. Cancelling one waiter never cancels the shared work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self.executions = 0
+        self.collapsed = 0
+
+    async def do(self, key, func):
+        """
+        Runs func() once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Identity of the work, e.g. a cache key
+            func: Zero-argument callable returning an awaitable
+
+        Returns:
+            The result of the shared call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key, func):
+        """
+        Runs the async iterator func() once for all concurrent callers with
+        the same key.
+
+        Every caller receives every item from the first one, including those
+        produced before it joined, followed by the shared exception if the
+        work failed. The work runs as its own task, so a caller that stops
+        iterating never cuts it short for the others.
+
+        Args:
+            key (str): Identity of the work, e.g. a cache key
+            func: Zero-argument callable returning an async iterator
+
+        Yields:
+            The items of the shared stream
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.executions += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, func(), broadcast))
+        else:
+            self.collapsed += 1
+        async for item in broadcast.subscribe():
+            yield item
+
+    async def _pump(self, key, items, broadcast):
+        error = None
+        try:
+            async for item in items:
+                broadcast.publish(item)
+        except asyncio.CancelledError:
+            error = RuntimeError("Shared stream was cancelled")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._streams.pop(key, None)
+            broadcast.finish(error)
+
+    def stats(self):
+        """
+        Returns how many calls ran upstream and how many were collapsed.
+        """
+        return {
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
+
+
+_singleflight = None
+
+
+def get_singleflight():
+    """
+    Returns the process-wide SingleFlight used for analysis requests.
+    """
+    global _singleflight
+    if _singleflight is None:
+        _singleflight = SingleFlight()
+    return _singleflight
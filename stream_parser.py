@@ -0,0 +1,117 @@
+import json
+
+# Top-level keys whose array items are emitted one by one
+ITEMIZED_SECTIONS = ("strengths", "areas_for_development", "recommended_paths")
+
+_INVALID = object()
+
+
+def _decode(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
+
+
+class SectionStreamParser:
+    """
+    Incrementally scans a streamed JSON object and reports finished parts.
+
+    Feed it completion chunks as they arrive. Every top-level value is
+    reported once it is complete, and items of the arrays listed in
+    ITEMIZED_SECTIONS are reported individually as soon as each one closes,
+    without waiting for the rest of the document. Values that are not valid
+    JSON (such as an unquoted word) are skipped rather than ending the scan,
+    so the sections around them are still reported.
+    """
+
+    def __init__(self, itemized_sections=ITEMIZED_SECTIONS):
+        self.itemized_sections = set(itemized_sections)
+        self.text = ""
+        self._pos = 0
+        self._stack = []
+        self._starts = {}
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._in_scalar = False
+
+    def feed(self, chunk):
+        """
+        Consumes the next chunk of the document.
+
+        Returns:
+            list: Events, either {"section": key, "value": value} for a
+                finished top-level value or {"section": key, "index": i,
+                "item": value} for a finished item of an itemized array
+        """
+        self.text += chunk
+        events = []
+        for i in range(self._pos, len(self.text)):
+            char = self.text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(i + 1, events)
+                continue
+
+            if self._in_scalar and (char in ",}]" or char.isspace()):
+                self._in_scalar = False
+                self._finish(self._starts.pop(len(self._stack)), i, events)
+
+            if char == '"':
+                self._in_string = True
+                self._string_is_key = self._expects_key()
+                if self._string_is_key:
+                    self._key_start = i
+                else:
+                    self._starts[len(self._stack)] = i
+            elif char in "{[":
+                self._starts[len(self._stack)] = i
+                self._stack.append({"type": char, "key": None, "expect": "key", "index": 0})
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                    self._finish(self._starts.pop(len(self._stack)), i + 1, events)
+            elif char == ":":
+                if self._stack:
+                    self._stack[-1]["expect"] = "value"
+            elif char == ",":
+                if self._stack:
+                    self._stack[-1]["expect"] = "key"
+                    self._stack[-1]["index"] += 1
+            elif not char.isspace() and not self._in_scalar and self._stack:
+                self._in_scalar = True
+                self._starts[len(self._stack)] = i
+        self._pos = len(self.text)
+        return events
+
+    def _expects_key(self):
+        return bool(self._stack) and self._stack[-1]["type"] == "{" and self._stack[-1]["expect"] == "key"
+
+    def _end_string(self, end, events):
+        if self._string_is_key:
+            self._stack[-1]["key"] = _decode(self.text[self._key_start:end])
+        else:
+            self._finish(self._starts.pop(len(self._stack)), end, events)
+
+    def _finish(self, start, end, events):
+        depth = len(self._stack)
+        if depth == 1:
+            key = self._stack[0]["key"]
+            value = _decode(self.text[start:end])
+            if key not in self.itemized_sections and value is not _INVALID:
+                events.append({"section": key, "value": value})
+        elif depth == 2 and self._stack[1]["type"] == "[":
+            key = self._stack[0]["key"]
+            item = _decode(self.text[start:end])
+            if key in self.itemized_sections and item is not _INVALID:
+                events.append({
+                    "section": key,
+                    "index": self._stack[1]["index"],
+                    "item": item
+                })
@@ -0,0 +1,16 @@
+import os
+import sys
+
+# Configure the app before any module reads config: offline LLM and speech,
+# no disk cache, an in-memory result store and no admission control
+os.environ.update({
+    "LLM_PROVIDERS": '[{"name": "fake", "type": "fake", "latency_median": 0.0, "latency_sigma": 0}]',
+    "CACHE_DB_PATH": "",
+    "RESULT_STORE_PATH": ":memory:",
+    "TTS_BACKEND": "fake",
+    "TTS_PRESYNTHESIZE_ON_STARTUP": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import aiter_lines
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _lines(*chunks):
+    async def collect():
+        return [line async for line in aiter_lines(_chunks(*chunks))]
+    return asyncio.run(collect())
+
+
+def test_multibyte_character_split_across_chunks():
+    data = '{"answers": {"Q": "café"}}\nnaïve\n'.encode("utf-8")
+    split = data.index("é".encode("utf-8")) + 1
+    assert _lines(data[:split], data[split:]) == ['{"answers": {"Q": "café"}}', "naïve"]
+
+
+def test_every_split_point_decodes_the_same():
+    data = "日本語\nemoji 🎯 line\n".encode("utf-8")
+    for split in range(len(data) + 1):
+        assert _lines(data[:split], data[split:]) == ["日本語", "emoji 🎯 line"]
+
+
+def test_last_line_without_newline():
+    assert _lines(b"first\nsec", b"ond") == ["first", "second"]
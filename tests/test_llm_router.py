@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import config
+from fake_llm import FakeProvider
+from llm_router import LLMRouter, NoBackendAvailable
+
+MESSAGES = [{"role": "user", "content": "Analyze these answers"}]
+
+
+def _complete(router, count=1):
+    async def run():
+        return await asyncio.gather(
+            *(router.complete(MESSAGES) for _ in range(count)), return_exceptions=True)
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def router_config(monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGE_ENABLED", False)
+    monkeypatch.setattr(config, "LLM_CIRCUIT_FAILURE_THRESHOLD", 3)
+
+
+def test_fails_over_to_next_backend():
+    failing = FakeProvider("a", latency_median=0, error_rate=1.0)
+    healthy = FakeProvider("b", latency_median=0)
+    router = LLMRouter([failing, healthy])
+
+    [response] = _complete(router)
+
+    assert response.choices[0].message.content
+    assert (failing.calls, healthy.calls) == (1, 1)
+    assert router.backends[0].failures == 1
+
+
+def test_circuit_opens_after_failure_threshold():
+    failing = FakeProvider("a", latency_median=0, error_rate=1.0)
+    router = LLMRouter([failing])
+    backend = router.backends[0]
+
+    for _ in range(config.LLM_CIRCUIT_FAILURE_THRESHOLD):
+        assert backend.circuit_state() == "closed"
+        _complete(router)
+
+    assert backend.circuit_state() == "open"
+    [error] = _complete(router)
+    assert isinstance(error, NoBackendAvailable)
+    assert failing.calls == config.LLM_CIRCUIT_FAILURE_THRESHOLD
+
+
+def test_half_open_circuit_lets_one_trial_through(monkeypatch):
+    monkeypatch.setattr(config, "LLM_CIRCUIT_FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(config, "LLM_CIRCUIT_RESET_SECONDS", 0)
+    provider = FakeProvider("a", latency_median=0.05, latency_sigma=0, error_rate=1.0)
+    router = LLMRouter([provider])
+    _complete(router)
+    assert router.backends[0].circuit_state() == "half_open"
+    provider.error_rate = 0.0
+    provider.calls = 0
+
+    results = _complete(router, 10)
+
+    assert provider.calls == 1
+    assert sum(1 for result in results if isinstance(result, NoBackendAvailable)) == 9
+    assert router.backends[0].circuit_state() == "closed"
+
+
+def test_hedge_to_faster_backend_wins(monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(config, "LLM_HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(config, "LLM_HEDGE_MIN_DELAY", 0.05)
+    slow = FakeProvider("a", latency_median=1.0, latency_sigma=0)
+    fast = FakeProvider("b", latency_median=0, latency_sigma=0)
+    router = LLMRouter([slow, fast])
+    # Past samples rank the slow backend first and give it a short p95
+    router.backends[0].record(0.01, ok=True)
+    router.backends[1].record(0.1, ok=True)
+
+    [response] = _complete(router)
+
+    assert response.choices[0].message.content
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert (router.hedges, router.hedge_wins) == (1, 1)
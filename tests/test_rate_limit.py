@@ -0,0 +1,66 @@
+import asyncio
+import httpx
+import pytest
+import api
+import cache
+import config
+import rate_limit
+from job_queue import QueueFull
+from questionnaire import get_questionnaire
+from rate_limit import GLOBAL_TOKENS_KEY, InMemoryRateLimitBackend, RateLimiter, RequestTooLarge
+
+
+def _answers():
+    return [
+        {"question": question.text, "answer": list(question.options.values())[0]}
+        for question in get_questionnaire().questions
+    ]
+
+
+def test_request_larger_than_budget_is_rejected_without_charge():
+    backend = InMemoryRateLimitBackend()
+    limiter = RateLimiter(backend, requests_per_minute=60, burst=1, tokens_per_minute=1000, max_wait=0)
+
+    with pytest.raises(RequestTooLarge):
+        asyncio.run(limiter.admit("a", 1001))
+
+    assert "client:a" not in backend._buckets
+    assert limiter.stats()["rejected"]["too_large"] == 1
+
+
+def test_refund_restores_client_and_token_buckets():
+    backend = InMemoryRateLimitBackend()
+    limiter = RateLimiter(backend, requests_per_minute=60, burst=1, tokens_per_minute=1000, max_wait=0)
+
+    async def run():
+        await limiter.admit("a", 800)
+        await limiter.refund("a", 800)
+        # Both buckets are full again, so the same request fits at once
+        await limiter.admit("a", 800)
+
+    asyncio.run(run())
+    assert limiter.stats()["queued"] == 0
+
+
+def test_full_job_queue_refunds_admission(monkeypatch):
+    backend = InMemoryRateLimitBackend()
+    limiter = RateLimiter(backend, requests_per_minute=60, burst=1, tokens_per_minute=1_000_000, max_wait=0)
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "_rate_limiter", limiter)
+    monkeypatch.setattr(cache, "_result_cache", cache.ResultCache(db_path=None))
+
+    async def full(payload, priority=0):
+        raise QueueFull("Job queue is full")
+    monkeypatch.setattr(api.job_queue, "submit", full)
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post("/api/analyze?mode=job", json={"answers": _answers()}) for _ in range(3)]
+
+    responses = asyncio.run(run())
+
+    # With a burst of 1, the second request would be rate limited had the
+    # first kept its charge
+    assert [response.json()["detail"] for response in responses] == ["Job queue is full"] * 3
+    assert backend._buckets[GLOBAL_TOKENS_KEY][0] == pytest.approx(1_000_000, rel=1e-4)
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import httpx
+import pytest
+import api
+import cache
+import config
+import llm_client
+import metrics
+import singleflight
+from fake_llm import FakeProvider
+from llm_router import LLMRouter
+from questionnaire import get_questionnaire
+from result_store import get_result_store
+
+
+@pytest.fixture(autouse=True)
+def failing_llm(monkeypatch):
+    monkeypatch.setattr(llm_client, "_router", LLMRouter([FakeProvider(latency_median=0.0, error_rate=1.0)]))
+    monkeypatch.setattr(cache, "_result_cache", cache.ResultCache(db_path=None))
+    monkeypatch.setattr(singleflight, "_singleflight", singleflight.SingleFlight())
+
+
+def _stream(answers):
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/analyze/stream", json={"answers": answers})
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _answers():
+    return [
+        {"question": question.text, "answer": list(question.options.values())[-1]}
+        for question in get_questionnaire().questions
+    ]
+
+
+def test_stream_completes_with_rule_analysis_when_llm_fails():
+    before = metrics.ANALYSIS_RESULTS.value(source="rules")
+
+    events = _stream(_answers())
+
+    assert [event.get("event") for event in events] == ["preview", "complete"]
+    complete = events[-1]
+    assert complete["analysis"]["source"] == "rules"
+    assert get_result_store().get(complete["assessment_id"])["analysis"] == complete["analysis"]
+    assert metrics.ANALYSIS_RESULTS.value(source="rules") == before + 1
+
+
+def test_stream_reports_error_when_fallback_disabled(monkeypatch):
+    monkeypatch.setattr(config, "RULES_FALLBACK_ENABLED", False)
+
+    events = _stream(_answers())
+
+    assert events[-1]["event"] == "error"
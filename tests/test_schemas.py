@@ -0,0 +1,35 @@
+import json
+import pytest
+from fake_llm import SAMPLE_ANALYSIS
+from schemas import parse_analysis
+from stream_parser import SectionStreamParser
+
+DOCUMENT = json.dumps({**SAMPLE_ANALYSIS, "confidence": 0.8, "notes": "Uses \"quotes\", {braces} and [brackets]"})
+
+
+def _events(text, size):
+    parser = SectionStreamParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return events
+
+
+def test_parse_analysis_keeps_sections_around_invalid_value():
+    data, invalid = parse_analysis('{"profile_summary": "x", "confidence": High, "strengths": ["a"]}')
+
+    assert data == {"profile_summary": "x", "strengths": ["a"]}
+    assert invalid == ["areas_for_development", "recommended_paths"]
+
+
+@pytest.mark.parametrize("text", [
+    DOCUMENT,
+    json.dumps(SAMPLE_ANALYSIS, indent=2),
+    '{"profile_summary": "x", "confidence": High, "strengths": ["a", "b"], "score": 7}',
+])
+def test_stream_parser_events_do_not_depend_on_chunk_size(text):
+    expected = _events(text, len(text))
+
+    assert expected
+    for size in range(1, len(text)):
+        assert _events(text, size) == expected, f"chunk size {size}"
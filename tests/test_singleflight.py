@@ -0,0 +1,60 @@
+import asyncio
+import json
+import httpx
+import pytest
+import api
+import cache
+import llm_client
+import singleflight
+from fake_llm import FakeProvider
+from llm_router import LLMRouter
+from questionnaire import get_questionnaire
+
+CONCURRENCY = 10
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    # A slow first token keeps every request in flight at once
+    provider = FakeProvider(latency_median=0.2, latency_sigma=0)
+    monkeypatch.setattr(llm_client, "_router", LLMRouter([provider]))
+    monkeypatch.setattr(cache, "_result_cache", cache.ResultCache(db_path=None))
+    monkeypatch.setattr(singleflight, "_singleflight", singleflight.SingleFlight())
+    return provider
+
+
+def _answers(option):
+    return [
+        {"question": question.text, "answer": list(question.options.values())[option]}
+        for question in get_questionnaire().questions
+    ]
+
+
+def _post_concurrently(path, body):
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.post(path, json=body) for _ in range(CONCURRENCY)])
+    return asyncio.run(run())
+
+
+def test_identical_analyze_requests_share_one_llm_call(provider):
+    responses = _post_concurrently("/api/analyze", {"answers": _answers(0)})
+
+    assert [response.status_code for response in responses] == [200] * CONCURRENCY
+    assert provider.calls == 1
+    assert singleflight.get_singleflight().stats()["collapsed"] == CONCURRENCY - 1
+
+
+def test_identical_stream_requests_share_one_llm_call(provider):
+    responses = _post_concurrently("/api/analyze/stream", {"answers": _answers(1)})
+
+    assert provider.calls == 1
+    assert singleflight.get_singleflight().stats()["collapsed"] == CONCURRENCY - 1
+    streams = [[json.loads(line) for line in response.text.splitlines()] for response in responses]
+    # Every request gets the full sequence of section events, not just the result
+    sections = [[event for event in stream if "section" in event] for stream in streams]
+    assert sections[0] and all(events == sections[0] for events in sections)
+    analyses = [stream[-1]["analysis"] for stream in streams]
+    assert all(stream[-1]["event"] == "complete" for stream in streams)
+    assert all(analysis == analyses[0] for analysis in analyses)
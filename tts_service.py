@@ -1,58 +1,206 @@
-import boto3
+import asyncio
+import hashlib
+import logging
 import os
-from botocore.exceptions import BotoCoreError, ClientError
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
-import os
-import sys
-import subprocess
-from tempfile import gettempdir
 from base64 import b64encode
+import config
+import metrics
+from fake_polly import FakePollyClient
 
-class TTSService:
-    def __init__(self):
-        self.polly = boto3.client('polly',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-west-2')
-        )
-        
-    async def synthesize_speech(self, text, voice_id="Joanna"):
+logger = logging.getLogger(__name__)
+
+
+def _aws_errors():
+    # Imported on demand so that workers using the fake backend, or no TTS at
+    # all, never load botocore
+    from botocore.exceptions import BotoCoreError, ClientError
+    return BotoCoreError, ClientError
+
+
+class AudioCache:
+    """
+    Content-addressed store of synthesized MP3 files on disk.
+
+    Files are named by a hash of (engine, voice, text), so identical requests
+    map to the same file and can be served straight from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text, voice_id, engine):
+        return hashlib.sha256(f"{engine}|{voice_id}|{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key):
         """
-        Converts text to speech using Amazon Polly and returns the audio as a base64 string.
-        
-        Args:
-            text (str): The text to convert to speech
-            voice_id (str): The voice ID to use (default: Joanna)
-            
-        Returns:
-            dict: Contains the audio data as base64 and the content type
+        Returns the cached file path for key, or None if it is not cached.
         """
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def open_writer(self, key):
+        """
+        Returns (file, temp_path) for writing a new entry; call commit() when done.
+        """
+        temp_path = f"{self.path_for(key)}.{uuid.uuid4().hex}.tmp"
+        return open(temp_path, "wb"), temp_path
+
+    def commit(self, key, temp_path):
+        # Atomic rename, so readers never see a partially written file
+        os.replace(temp_path, self.path_for(key))
+        return self.path_for(key)
+
+    def discard(self, temp_path):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+class TTSService:
+    def __init__(self, polly_client=None, cache_dir=None):
+        if polly_client is not None:
+            self.polly = polly_client
+        elif config.TTS_BACKEND == "fake":
+            self.polly = FakePollyClient()
+        else:
+            import boto3
+            self.polly = boto3.client('polly',
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                region_name=os.getenv('AWS_REGION', 'us-west-2')
+            )
+        self.cache = AudioCache(cache_dir or config.TTS_CACHE_DIR)
+        # boto3 is blocking, so Polly calls and stream reads run in this pool
+        self._executor = ThreadPoolExecutor(max_workers=config.TTS_MAX_WORKERS, thread_name_prefix="tts")
+
+    async def _run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _request_speech(self, text, voice_id, engine):
         try:
-            # Request speech synthesis
             response = self.polly.synthesize_speech(
                 Text=text,
                 OutputFormat='mp3',
                 VoiceId=voice_id,
-                Engine='neural'
+                Engine=engine
             )
-            
-            # Access the audio stream from the response
-            if "AudioStream" in response:
-                with closing(response["AudioStream"]) as stream:
-                    # Read the audio data
-                    audio_data = stream.read()
-                    # Convert to base64
-                    audio_base64 = b64encode(audio_data).decode('utf-8')
-                    
-                    return {
-                        "audio": audio_base64,
-                        "content_type": "audio/mpeg"
-                    }
-                    
-        except (BotoCoreError, ClientError) as error:
-            print(error)
+        except _aws_errors() as error:
+            logger.error("Polly synthesis failed: %s", error)
+            raise Exception("Failed to synthesize speech")
+        if "AudioStream" not in response:
             raise Exception("Failed to synthesize speech")
-            
+        return response["AudioStream"]
+
+    async def stream_speech(self, text, voice_id=None, engine=None):
+        """
+        Streams speech audio, serving from the cache when possible.
+
+        Uncached audio is forwarded chunk by chunk as Polly produces it and
+        written to the cache at the same time.
+
+        Args:
+            text (str): The text to convert to speech
+            voice_id (str): The voice ID to use (default: config.TTS_DEFAULT_VOICE)
+            engine (str): The Polly engine to use (default: config.TTS_ENGINE)
+
+        Yields:
+            bytes: MP3 audio chunks
+        """
+        voice_id = voice_id or config.TTS_DEFAULT_VOICE
+        engine = engine or config.TTS_ENGINE
+        key = self.cache.key(text, voice_id, engine)
+        path = self.cache.get(key)
+        start = time.perf_counter()
+        if path is not None:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = await self._run_blocking(f.read, config.TTS_CHUNK_BYTES)
+                    if not chunk:
+                        metrics.TTS_SECONDS.observe(time.perf_counter() - start, source="cache")
+                        return
+                    yield chunk
+
+        metrics.TTS_CHARACTERS.inc(len(text))
+        stream = await self._run_blocking(self._request_speech, text, voice_id, engine)
+        metrics.observe_stage("tts_request", time.perf_counter() - start)
+        writer, temp_path = self.cache.open_writer(key)
+        completed = False
+        try:
+            with closing(stream), writer:
+                while True:
+                    chunk = await self._run_blocking(stream.read, config.TTS_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    yield chunk
+            completed = True
+            metrics.TTS_SECONDS.observe(time.perf_counter() - start, source="polly")
+        finally:
+            if completed:
+                self.cache.commit(key, temp_path)
+            else:
+                self.cache.discard(temp_path)
+
+    async def synthesize_to_file(self, text, voice_id=None, engine=None):
+        """
+        Returns the path of a cached MP3 for text, synthesizing it if needed.
+
+        Args:
+            text (str): The text to convert to speech
+            voice_id (str): The voice ID to use (default: config.TTS_DEFAULT_VOICE)
+            engine (str): The Polly engine to use (default: config.TTS_ENGINE)
+
+        Returns:
+            str: Path to the MP3 file in the audio cache
+        """
+        voice_id = voice_id or config.TTS_DEFAULT_VOICE
+        engine = engine or config.TTS_ENGINE
+        key = self.cache.key(text, voice_id, engine)
+        path = self.cache.get(key)
+        if path is None:
+            async for _ in self.stream_speech(text, voice_id, engine):
+                pass
+            path = self.cache.path_for(key)
+        return path
+
+    def audio_key(self, text, voice_id=None, engine=None):
+        """
+        Returns the content hash identifying the audio for text, e.g. for ETags.
+        """
+        return self.cache.key(text, voice_id or config.TTS_DEFAULT_VOICE, engine or config.TTS_ENGINE)
+
+    async def synthesize_speech(self, text, voice_id=None):
+        """
+        Converts text to speech using Amazon Polly and returns the audio as a base64 string.
+
+        Prefer synthesize_to_file or stream_speech for HTTP responses; base64
+        adds a third to the payload size.
+
+        Args:
+            text (str): The text to convert to speech
+            voice_id (str): The voice ID to use (default: config.TTS_DEFAULT_VOICE)
+
+        Returns:
+            dict: Contains the audio data as base64 and the content type
+        """
+        path = await self.synthesize_to_file(text, voice_id)
+        with open(path, "rb") as f:
+            audio_data = await self._run_blocking(f.read)
+        return {
+            "audio": b64encode(audio_data).decode('utf-8'),
+            "content_type": "audio/mpeg"
+        }
+
     def get_available_voices(self):
         """
         Returns a list of available voices from Amazon Polly.
@@ -60,6 +208,19 @@ class TTSService:
         try:
             response = self.polly.describe_voices()
             return response['Voices']
-        except (BotoCoreError, ClientError) as error:
-            print(error)
-            raise Exception("Failed to get available voices") 
\ No newline at end of file
+        except _aws_errors() as error:
+            logger.error("Polly voice listing failed: %s", error)
+            raise Exception("Failed to get available voices")
+
+
+_tts_service = None
+
+
+def get_tts_service():
+    """
+    Returns the process-wide TTSService, created on first use.
+    """
+    global _tts_service
+    if _tts_service is None:
+        _tts_service = TTSService()
+    return _tts_service